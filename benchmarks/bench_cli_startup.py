@@ -0,0 +1,97 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Measure flowzo CLI cold-start time per command.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_cli_startup --runs 5
+    python -m benchmarks.bench_cli_startup --output startup.json
+
+Each command runs with ``--help`` in a fresh interpreter under
+``python -X importtime``, so the numbers cover argument parsing and module
+imports but not the command's own work. Reports the best wall time and
+import time over ``--runs`` runs and flags heavy dependencies that were
+imported.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+
+COMMANDS: List[List[str]] = [
+    [],
+    ["start"],
+    ["daemon"],
+    ["serve"],
+    ["next"],
+    ["stats"],
+    ["export"],
+    ["ledger", "compact"],
+    ["ledger", "merge"],
+    ["auth", "github"],
+    ["auth", "linear"],
+]
+
+# Modules no command should need just to parse its arguments
+HEAVY_MODULES = ("sqlalchemy", "sqlmodel", "httpx", "keyring", "pydantic", "flowzo_ledger.database")
+
+
+def measure(command: Sequence[str], runs: int = 3) -> Dict[str, object]:
+    """Return best-of-``runs`` wall and import milliseconds for ``flowzo <command> --help``."""
+    best_wall = best_import = float("inf")
+    imported: List[str] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "flowzo_cli.main", *command, "--help"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        best_wall = min(best_wall, (time.perf_counter() - start) * 1000)
+
+        total_us = 0
+        modules = set()
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                modules.add(name.strip())
+                # Top-level imports are not indented; their cumulative time covers the rest
+                if not name.startswith("  "):
+                    total_us += int(cumulative)
+        best_import = min(best_import, total_us / 1000)
+        imported = sorted(module for module in HEAVY_MODULES if module in modules)
+
+    return {
+        "command": " ".join(command) or "(root)",
+        "wall_ms": best_wall,
+        "import_ms": best_import,
+        "heavy_imports": imported,
+    }
+
+
+def main() -> None:
+    """Parse arguments and print per-command startup times."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Also write JSON results here")
+    args = parser.parse_args()
+
+    results = [measure(command, args.runs) for command in COMMANDS]
+    for result in results:
+        heavy = ", ".join(result["heavy_imports"]) or "-"
+        print(f"{result['command']:>16}: {result['wall_ms']:7.1f} ms wall, {result['import_ms']:7.1f} ms imports, heavy: {heavy}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
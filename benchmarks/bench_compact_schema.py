@@ -0,0 +1,105 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Compare on-disk size and throughput of the compact and legacy event layouts.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_compact_schema --events 100000
+
+The legacy layout stores ``event_type``/``state`` as text and ``data`` as a
+JSON string; the compact layout is the current ``session_events`` table.
+Both are written and read through SQLAlchemy Core so ORM overhead does not
+skew the comparison.
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, insert, select
+
+from flowzo_ledger.codec import get_default_codec
+from flowzo_ledger.database import create_ledger_engine
+from flowzo_ledger.models import SessionEvent
+
+legacy_metadata = MetaData()
+legacy_events = Table(
+    "session_events",
+    legacy_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("session_id", String, index=True),
+    Column("timestamp", Float),
+    Column("event_type", String),
+    Column("state", String),
+    Column("data", String),
+)
+
+EVENT_TYPES = ["state_transition", "session_started", "focus_phase_started", "session_completed"]
+STATES = ["priming", "active", "cooldown", "idle"]
+
+
+def _synthetic_rows(count: int) -> List[Dict[str, Any]]:
+    """Build event rows resembling what SessionEngine emits."""
+    return [
+        {
+            "session_id": f"session_{i // 200}",
+            "timestamp": 1700000000.0 + i,
+            "event_type": EVENT_TYPES[i % len(EVENT_TYPES)],
+            "state": STATES[i % len(STATES)],
+            "data": {"from_state": STATES[i % len(STATES)], "to_state": STATES[(i + 1) % len(STATES)], "seq": i},
+        }
+        for i in range(count)
+    ]
+
+
+def _measure(db_path: Path, table: Table, rows: List[Dict[str, Any]], legacy: bool) -> Dict[str, float]:
+    """Insert and read back ``rows``, returning throughput and file size."""
+    engine = create_ledger_engine(str(db_path))
+    table.metadata.create_all(engine, tables=[table])
+    if legacy:
+        rows = [{**row, "data": json.dumps(row["data"])} for row in rows]
+    
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(insert(table), rows)
+    insert_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        for row in conn.execute(select(table.c.event_type, table.c.state, table.c.data)):
+            _payload = json.loads(row.data) if legacy else row.data
+    read_seconds = time.perf_counter() - start
+    
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.exec_driver_sql("VACUUM")
+    engine.dispose()
+    
+    return {
+        "size_bytes": db_path.stat().st_size,
+        "inserts_per_second": len(rows) / insert_seconds,
+        "reads_per_second": len(rows) / read_seconds,
+    }
+
+
+def main() -> None:
+    """Parse arguments and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+    
+    rows = _synthetic_rows(args.events)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = _measure(Path(tmp) / "legacy.db", legacy_events, rows, legacy=True)
+        compact = _measure(Path(tmp) / "compact.db", SessionEvent.__table__, rows, legacy=False)
+    
+    print(f"events: {args.events}, codec: {get_default_codec().name}")
+    print(f"{'':>20} {'legacy':>14} {'compact':>14}")
+    for key in legacy:
+        print(f"{key:>20} {legacy[key]:>14.0f} {compact[key]:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Benchmark get_recent_sessions read throughput while a writer logs events.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_concurrent_reads --readers 4 --seconds 5
+    python -m benchmarks.bench_concurrent_reads --baseline
+
+``--baseline`` opens the ledger with SQLite's default settings (rollback
+journal, full sync, no mmap) for comparison with the tuned WAL connection layer.
+"""
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from flowzo_ledger.database import FlowLedger
+
+# SQLite defaults, keeping the driver's 5 s lock timeout
+BASELINE_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "mmap_size": 0,
+    "cache_size": -2000,
+    "temp_store": "DEFAULT",
+}
+
+
+def _open_ledger(db_path: str, baseline: bool) -> FlowLedger:
+    """Open a ledger with tuned or default SQLite settings."""
+    return FlowLedger(db_path, pragmas=BASELINE_PRAGMAS if baseline else None)
+
+
+def _writer(db_path: str, baseline: bool, stop: multiprocessing.Event) -> None:
+    """Log events one transaction at a time until told to stop."""
+    ledger = _open_ledger(db_path, baseline)
+    i = 0
+    while not stop.is_set():
+        ledger.log_session_event(
+            session_id=f"bench_{i % 50}",
+            timestamp=time.time(),
+            event_type="state_transition",
+            state="active",
+            data={"seq": i},
+        )
+        i += 1
+
+
+def _reader(
+    db_path: str,
+    baseline: bool,
+    seconds: float,
+    results: "multiprocessing.Queue[tuple[int, int]]",
+) -> None:
+    """Call get_recent_sessions in a loop and report calls and errors."""
+    ledger = _open_ledger(db_path, baseline)
+    calls = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            ledger.get_recent_sessions(limit=20)
+            calls += 1
+        except Exception:  # noqa: BLE001 - lock errors count against throughput
+            errors += 1
+    results.put((calls, errors))
+
+
+def run(readers: int, seconds: float, baseline: bool) -> dict:
+    """Run the benchmark and return aggregate read throughput."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        ledger = _open_ledger(db_path, baseline)
+        for i in range(500):
+            ledger.create_session_record(
+                session_id=f"bench_{i}",
+                start_time=datetime.utcnow(),
+                duration_seconds=1500,
+            )
+        ledger.engine.dispose()
+        
+        stop = multiprocessing.Event()
+        results: multiprocessing.Queue = multiprocessing.Queue()
+        writer = multiprocessing.Process(target=_writer, args=(db_path, baseline, stop))
+        writer.start()
+        procs = [
+            multiprocessing.Process(target=_reader, args=(db_path, baseline, seconds, results))
+            for _ in range(readers)
+        ]
+        for proc in procs:
+            proc.start()
+        totals = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+        stop.set()
+        writer.join()
+    
+    calls = sum(c for c, _ in totals)
+    return {
+        "mode": "baseline" if baseline else "wal",
+        "readers": readers,
+        "seconds": seconds,
+        "reads_per_second": calls / seconds,
+        "read_errors": sum(e for _, e in totals),
+    }
+
+
+def main() -> None:
+    """Parse arguments and print benchmark results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--baseline", action="store_true")
+    args = parser.parse_args()
+    
+    result = run(args.readers, args.seconds, args.baseline)
+    for key, value in result.items():
+        print(f"{key:>18}: {value}")
+
+
+if __name__ == "__main__":
+    main()
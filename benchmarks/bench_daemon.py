@@ -0,0 +1,84 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Compare flowzo command latency in-process and through the daemon.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_daemon --runs 5
+
+Starts ``flowzo daemon`` on a private socket with a throwaway home
+directory, then times each command in a fresh interpreter with
+``FLOWZO_NO_DAEMON`` set (in-process) and without it (thin client).
+Reports the median wall time of each in milliseconds.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+COMMANDS: List[List[str]] = [
+    ["next"],
+    ["next", "--source", "linear"],
+    ["auth", "test"],
+]
+
+
+def _time(command: List[str], env: Dict[str, str], runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "flowzo_cli.main", *command],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            check=False,
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(runs: int) -> Dict[str, Dict[str, float]]:
+    """Median milliseconds per command with and without a daemon."""
+    with tempfile.TemporaryDirectory() as home:
+        env = {**os.environ, "HOME": home, "FLOWZO_DAEMON_SOCKET": str(Path(home) / "daemon.sock")}
+        daemon = subprocess.Popen(
+            [sys.executable, "-m", "flowzo_cli.main", "daemon"],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            daemon.stdout.readline()  # Listening
+            results = {}
+            for command in COMMANDS:
+                results[" ".join(command)] = {
+                    "in_process_ms": _time(command, {**env, "FLOWZO_NO_DAEMON": "1"}, runs),
+                    "daemon_ms": _time(command, env, runs),
+                }
+        finally:
+            daemon.terminate()
+            daemon.wait()
+    return results
+
+
+def main() -> None:
+    """Parse arguments and print latency per command."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for command, result in run(args.runs).items():
+        print(f"flowzo {command:<24} in-process {result['in_process_ms']:6.0f} ms   daemon {result['daemon_ms']:6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Measure event-loop lag during a session with a sync vs async ledger.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_event_loop_lag --duration 2 --event-interval 0.002
+
+A probe task repeatedly sleeps for 1 ms and records how late it wakes up
+while a SessionEngine runs and a ticker emits extra events at a high rate.
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from flowzo_cli.session import SessionEngine
+from flowzo_ledger.async_ledger import AsyncFlowLedger
+from flowzo_ledger.database import FlowLedger
+
+PROBE_INTERVAL = 0.001
+
+
+async def _probe(lags: List[float], stop: asyncio.Event) -> None:
+    """Record how late each short sleep wakes up."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def _ticker(engine: SessionEngine, interval: float, stop: asyncio.Event) -> None:
+    """Emit extra events, as a high-frequency context logger would."""
+    while not stop.is_set():
+        engine._emit_event("tick", {"at": time.time()})
+        await asyncio.sleep(interval)
+
+
+async def _run(mode: str, db_path: str, duration: float, interval: float) -> Dict[str, float]:
+    ledger = FlowLedger(db_path) if mode == "sync" else AsyncFlowLedger(db_path)
+    engine = SessionEngine(f"lag_{mode}", ledger=ledger)
+    lags: List[float] = []
+    stop = asyncio.Event()
+    
+    probe = asyncio.create_task(_probe(lags, stop))
+    ticker = asyncio.create_task(_ticker(engine, interval, stop))
+    await engine.start_session(duration, priming_duration=0)
+    stop.set()
+    await asyncio.gather(probe, ticker)
+    if mode == "async":
+        await ledger.aclose()
+    
+    lags.sort()
+    return {
+        "events": len(engine.events),
+        "mean_lag_ms": statistics.mean(lags) * 1000,
+        "p99_lag_ms": lags[int(len(lags) * 0.99)] * 1000,
+        "max_lag_ms": lags[-1] * 1000,
+    }
+
+
+def main() -> None:
+    """Parse arguments and print lag statistics for both ledger modes."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--event-interval", type=float, default=0.002)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("sync", "async"):
+            db_path = str(Path(tmp) / f"{mode}.db")
+            result = asyncio.run(_run(mode, db_path, args.duration, args.event_interval))
+            print(mode, " ".join(f"{key}={value:.2f}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Measure per-event memory of SessionEngine's in-memory event history.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_event_memory --events 100000
+
+Compares a plain list of pydantic ``SessionEvent`` models, which is how
+events used to be kept, with ``EventBuffer`` unbounded and bounded to
+``--max-events``. Events alternate between state transitions and
+data-less events, roughly like a real session.
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+from flowzo_cli.session import SessionEngine, SessionEvent, SessionState
+
+STATES = list(SessionState)
+
+
+def _event_args(i: int) -> Dict[str, object]:
+    state = STATES[i % len(STATES)]
+    # Build the same strings afresh per event, as callers do
+    event_type = "".join(("state_", "transition")) if i % 2 else "".join(("focus_", "tick"))
+    data = {"from_state": state, "to_state": STATES[(i + 1) % len(STATES)]} if i % 2 else None
+    return {"state": state, "event_type": event_type, "data": data}
+
+
+def _legacy(count: int) -> list:
+    events = []
+    for i in range(count):
+        args = _event_args(i)
+        events.append(SessionEvent(
+            timestamp=time.time(),
+            session_id="".join(("bench_", "session")),
+            state=args["state"],
+            event_type=args["event_type"],
+            data=args["data"] or {},
+        ))
+    return events
+
+
+def _buffered(count: int, max_events) -> SessionEngine:
+    engine = SessionEngine("bench_session", max_events=max_events)
+    for i in range(count):
+        args = _event_args(i)
+        engine.state = args["state"]
+        engine._emit_event(args["event_type"], args["data"])
+    return engine
+
+
+def _bytes_per_event(build: Callable[[], object], count: int) -> float:
+    tracemalloc.start()
+    kept = build()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return current / count
+
+
+def run(count: int, max_events: int) -> Dict[str, float]:
+    """Return retained bytes per emitted event for each layout."""
+    return {
+        "pydantic_list": _bytes_per_event(lambda: _legacy(count), count),
+        "event_buffer": _bytes_per_event(lambda: _buffered(count, None), count),
+        f"event_buffer_max_{max_events}": _bytes_per_event(lambda: _buffered(count, max_events), count),
+    }
+
+
+def main() -> None:
+    """Parse arguments and print bytes per event."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--max-events", type=int, default=10_000)
+    args = parser.parse_args()
+
+    for name, value in run(args.events, args.max_events).items():
+        print(f"{name:>24}: {value:8.1f} bytes/event")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Ledger benchmark suite over a synthetic ledger, with JSON results.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_ledger --sessions 2000 --output results.json
+    python -m benchmarks.bench_ledger --compare results.json --threshold 0.2
+
+Measures per-call and write-behind event insert throughput, flow context
+insert throughput, bulk-load throughput, ``get_session_events``
+and ``get_recent_sessions`` latency, file size and peak Python memory.
+Read latencies bypass the session cache; ``get_recent_sessions_cached``
+reports the same call through it.
+``--compare`` prints the change against an earlier results file and exits
+non-zero if any metric regressed by more than ``--threshold``.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from flowzo_ledger.database import FlowLedger
+
+from .synthetic import SyntheticConfig, generate_sessions, populate
+
+# Metric name suffix -> whether a larger value is better
+HIGHER_IS_BETTER = {"_per_second": True, "_ms": False, "_bytes": False}
+
+
+def _latency(call: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Time ``call`` ``repeat`` times, returning percentiles in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def _insert_throughput(db_path: str, config: SyntheticConfig, write_behind: bool) -> Dict[str, float]:
+    """Log a synthetic workload through the public FlowLedger API."""
+    ledger = FlowLedger(db_path, write_behind=write_behind)
+    events = contexts = 0
+    event_seconds = context_seconds = 0.0
+    for session in generate_sessions(config):
+        ledger.create_session_record(**{
+            key: session.record[key] for key in ("session_id", "start_time", "duration_seconds", "state")
+        })
+        start = time.perf_counter()
+        for event in session.events:
+            ledger.log_session_event(
+                event["session_id"], event["timestamp"], event["event_type"], event["state"], event["data"],
+            )
+        event_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        for context in session.contexts:
+            ledger.log_flow_context(
+                context["session_id"], context["context_type"], context["timestamp"], context["data"],
+            )
+        context_seconds += time.perf_counter() - start
+        events += len(session.events)
+        contexts += len(session.contexts)
+    start = time.perf_counter()
+    ledger.close()
+    event_seconds += time.perf_counter() - start
+    return {
+        "events_per_second": events / event_seconds,
+        "contexts_per_second": contexts / context_seconds if contexts else 0.0,
+    }
+
+
+def _file_size(db_path: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return Path(db_path).stat().st_size
+
+
+def run(config: SyntheticConfig, insert_sessions: int, repeat: int) -> Dict[str, Any]:
+    """Run every benchmark and return a flat metrics dict plus metadata."""
+    metrics: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        insert_config = SyntheticConfig(**{**config.__dict__, "sessions": insert_sessions})
+        for mode, write_behind in (("direct", False), ("write_behind", True)):
+            result = _insert_throughput(str(Path(tmp) / f"insert_{mode}.db"), insert_config, write_behind)
+            metrics[f"insert_{mode}_events_per_second"] = result["events_per_second"]
+        # Flow contexts are never queued, so one mode covers them
+        metrics["insert_contexts_per_second"] = result["contexts_per_second"]
+
+        db_path = str(Path(tmp) / "ledger.db")
+        # Uncached, so read latencies stay comparable with earlier results
+        ledger = FlowLedger(db_path, cache_size=0)
+        tracemalloc.start()
+        start = time.perf_counter()
+        counts = populate(ledger, config)
+        metrics["bulk_load_rows_per_second"] = (
+            (counts["events"] + counts["contexts"]) / (time.perf_counter() - start)
+        )
+        metrics["bulk_load_peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+
+        rng = random.Random(config.seed)
+        session_ids = [f"session_{i:07d}" for i in range(config.sessions)]
+        tracemalloc.reset_peak()
+        for key, value in _latency(lambda: ledger.get_session_events(rng.choice(session_ids)), repeat).items():
+            metrics[f"get_session_events_{key}"] = value
+        metrics["get_session_events_peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        for key, value in _latency(lambda: ledger.get_recent_sessions(limit=10), repeat).items():
+            metrics[f"get_recent_sessions_{key}"] = value
+        tracemalloc.stop()
+        ledger.close()
+
+        with FlowLedger(db_path) as cached:
+            latency = _latency(lambda: cached.get_recent_sessions(limit=10), repeat)
+            for key, value in latency.items():
+                metrics[f"get_recent_sessions_cached_{key}"] = value
+
+        metrics["db_size_bytes"] = _file_size(db_path)
+        metrics["db_bytes_per_row"] = metrics["db_size_bytes"] / max(1, counts["events"] + counts["contexts"])
+
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "config": {**config.__dict__, "start": config.start.isoformat(), "insert_sessions": insert_sessions},
+        "rows": counts,
+        "metrics": metrics,
+    }
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any], threshold: float) -> List[str]:
+    """Print metric changes and return the names of regressed metrics."""
+    regressed = []
+    for name, value in current["metrics"].items():
+        before = previous["metrics"].get(name)
+        higher_is_better = next(
+            (better for suffix, better in HIGHER_IS_BETTER.items() if name.endswith(suffix)), None,
+        )
+        if not before or higher_is_better is None:
+            continue
+        change = (value - before) / before
+        worse = -change if higher_is_better else change
+        flag = "  REGRESSED" if worse > threshold else ""
+        print(f"{name:>42}: {before:>14.2f} -> {value:>14.2f} ({change:+.1%}){flag}", file=sys.stderr)
+        if flag:
+            regressed.append(name)
+    return regressed
+
+
+def main() -> None:
+    """Parse arguments, run the suite and emit JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--events-per-session", type=int, default=20)
+    parser.add_argument("--contexts-per-minute", type=float, default=6.0)
+    parser.add_argument("--insert-sessions", type=int, default=50, help="Sessions logged via the per-row API")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per latency measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    config = SyntheticConfig(
+        sessions=args.sessions,
+        events_per_session=args.events_per_session,
+        contexts_per_minute=args.contexts_per_minute,
+        seed=args.seed,
+    )
+    results = run(config, args.insert_sessions, args.repeat)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text())
+        if compare(results, previous, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Load test many concurrent sessions on SessionScheduler vs per-session tasks.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_scheduler --sessions 5000 --spread 1.0
+
+Sessions start at random offsets within ``--spread`` seconds with random
+focus durations, so transitions are spread out rather than simultaneous.
+Reports how late each phase transition fired compared to when it was due
+(p50/p99/max), plus wall time, for the timer-wheel scheduler and for one
+``start_session`` task per session.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from flowzo_cli.scheduler import SessionScheduler
+from flowzo_cli.session import SessionEngine
+
+
+def _lateness(engine: SessionEngine, priming: float) -> List[float]:
+    """Seconds each phase transition fired after it was due."""
+    started = next(event for event in engine.events if event.event_type == "session_started")
+    phases = {event.event_type: event.timestamp for event in engine.events}
+    due_active = started.timestamp + priming
+    due_cooldown = phases["focus_phase_started"] + engine.duration
+    due_idle = phases["cooldown_started"] + engine.cooldown_duration
+    return [
+        phases["focus_phase_started"] - due_active,
+        phases["cooldown_started"] - due_cooldown,
+        phases["session_completed"] - due_idle,
+    ]
+
+
+def _engines(count: int, cooldown: float) -> List[SessionEngine]:
+    engines = [SessionEngine(f"load_{i:06d}", max_events=16) for i in range(count)]
+    for engine in engines:
+        engine.cooldown_duration = cooldown
+    return engines
+
+
+async def _run_scheduler(plan: List[tuple], priming: float, cooldown: float, tick: float) -> List[SessionEngine]:
+    engines = _engines(len(plan), cooldown)
+    async with SessionScheduler(tick=tick) as scheduler:
+        async def launch(engine: SessionEngine, offset: float, duration: float) -> None:
+            await asyncio.sleep(offset)
+            await (await scheduler.start(engine, duration, priming))
+
+        await asyncio.gather(*(launch(engine, *args) for engine, args in zip(engines, plan)))
+    return engines
+
+
+async def _run_tasks(plan: List[tuple], priming: float, cooldown: float) -> List[SessionEngine]:
+    engines = _engines(len(plan), cooldown)
+
+    async def launch(engine: SessionEngine, offset: float, duration: float) -> None:
+        await asyncio.sleep(offset)
+        await engine.start_session(duration, priming)
+
+    await asyncio.gather(*(launch(engine, *args) for engine, args in zip(engines, plan)))
+    return engines
+
+
+def _summary(engines: List[SessionEngine], priming: float, wall: float) -> Dict[str, float]:
+    late = sorted(value * 1000 for engine in engines for value in _lateness(engine, priming))
+    return {
+        "transitions": len(late),
+        "lateness_p50_ms": statistics.median(late),
+        "lateness_p99_ms": late[min(len(late) - 1, int(len(late) * 0.99))],
+        "lateness_max_ms": late[-1],
+        "wall_seconds": wall,
+    }
+
+
+def run(sessions: int, spread: float, priming: float, cooldown: float, tick: float, seed: int) -> Dict[str, Dict[str, float]]:
+    """Run both modes over the same randomized plan and summarize lateness."""
+    rng = random.Random(seed)
+    plan = [(rng.uniform(0, spread), rng.uniform(0.2, 1.0)) for _ in range(sessions)]
+    results = {}
+    for name, runner in (
+        ("scheduler", lambda: _run_scheduler(plan, priming, cooldown, tick)),
+        ("per_session_tasks", lambda: _run_tasks(plan, priming, cooldown)),
+    ):
+        start = time.perf_counter()
+        engines = asyncio.run(runner())
+        results[name] = _summary(engines, priming, time.perf_counter() - start)
+    return results
+
+
+def main() -> None:
+    """Parse arguments and print lateness per mode."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--spread", type=float, default=1.0, help="Seconds over which sessions start")
+    parser.add_argument("--priming", type=float, default=0.2)
+    parser.add_argument("--cooldown", type=float, default=0.2)
+    parser.add_argument("--tick", type=float, default=0.01, help="Timer wheel resolution in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = run(args.sessions, args.spread, args.priming, args.cooldown, args.tick, args.seed)
+    for name, summary in results.items():
+        print(
+            f"{name:>18}: {summary['transitions']} transitions, late p50 {summary['lateness_p50_ms']:.1f} ms, "
+            f"p99 {summary['lateness_p99_ms']:.1f} ms, max {summary['lateness_max_ms']:.1f} ms, "
+            f"wall {summary['wall_seconds']:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Load-test the ``flowzo serve`` HTTP API.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_server --sessions 1000 --seconds 10 --concurrency 32
+
+Fills a throwaway ledger with synthetic sessions, starts ``flowzo serve``
+on it (or targets ``--url``), then runs ``--concurrency`` clients against
+a mix of status, history, stats and session-control requests for
+``--seconds``. Reports requests/sec and p50/p99 latency per endpoint.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from flowzo_ledger.database import FlowLedger
+
+from .synthetic import SyntheticConfig, populate
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{url}/health").raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"flowzo serve did not come up at {url}")
+
+
+def _requests(sessions: int) -> Dict[str, Callable[[httpx.AsyncClient], Awaitable[Any]]]:
+    """Request kinds by endpoint name."""
+
+    def session_id() -> str:
+        return f"session_{random.randrange(sessions):07d}"
+
+    async def events(client: httpx.AsyncClient) -> None:
+        async with client.stream("GET", f"/sessions/{session_id()}/events") as response:
+            async for _ in response.aiter_lines():
+                pass
+
+    async def start_abort(client: httpx.AsyncClient) -> None:
+        response = await client.post("/sessions", json={"duration": 60})
+        await client.post(f"/sessions/{response.json()['session_id']}/abort")
+
+    return {
+        "GET /health": lambda client: client.get("/health"),
+        "GET /sessions/{id}": lambda client: client.get(f"/sessions/{session_id()}"),
+        "GET /sessions/{id}/events": events,
+        "GET /ledger/stats": lambda client: client.get(
+            "/ledger/stats", params={"start": "2024-01-01", "end": "2024-03-31", "by": "week"}
+        ),
+        "POST /sessions + abort": start_abort,
+    }
+
+
+async def _load(url: str, sessions: int, seconds: float, concurrency: int) -> Dict[str, List[float]]:
+    """Run clients until ``seconds`` pass; latencies in ms by endpoint."""
+    kinds = _requests(sessions)
+    names = list(kinds)
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    deadline = time.perf_counter() + seconds
+
+    async def worker(client: httpx.AsyncClient, n: int) -> None:
+        i = n
+        while time.perf_counter() < deadline:
+            name = names[i % len(names)]
+            i += 1
+            start = time.perf_counter()
+            await kinds[name](client)
+            samples[name].append((time.perf_counter() - start) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client, n) for n in range(concurrency)))
+    return samples
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1] if len(samples) > 1 else samples[0]
+
+
+def run(sessions: int, seconds: float, concurrency: int, url: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """Requests/sec and latency percentiles per endpoint, plus ``total``."""
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        if url is None:
+            db = str(Path(tmp) / "ledger.db")
+            with FlowLedger(db) as ledger:
+                populate(ledger, SyntheticConfig(sessions=sessions))
+            port = _free_port()
+            url = f"http://127.0.0.1:{port}"
+            server = subprocess.Popen(
+                [sys.executable, "-m", "flowzo_cli.main", "serve", "--db", db, "--port", str(port)],
+                cwd=ROOT,
+                env={**os.environ, "HOME": tmp},
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        try:
+            _wait_until_up(url)
+            samples = asyncio.run(_load(url, sessions, seconds, concurrency))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    results = {}
+    for name, latencies in [*samples.items(), ("total", [ms for s in samples.values() for ms in s])]:
+        if latencies:
+            results[name] = {
+                "requests_per_sec": len(latencies) / seconds,
+                "p50_ms": _percentile(latencies, 50),
+                "p99_ms": _percentile(latencies, 99),
+            }
+    return results
+
+
+def main() -> None:
+    """Parse arguments and print throughput and latency per endpoint."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1000, help="Synthetic sessions in the ledger")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--url", help="Test a running server instead of starting one")
+    args = parser.parse_args()
+
+    for name, result in run(args.sessions, args.seconds, args.concurrency, args.url).items():
+        print(
+            f"{name:<26} {result['requests_per_sec']:8.1f} req/s"
+            f"   p50 {result['p50_ms']:7.1f} ms   p99 {result['p99_ms']:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Synthetic ledger data shaped like what SessionEngine records.
+
+Each session runs priming -> active -> cooldown -> completed; extra
+``state_transition`` events pad it to ``events_per_session`` and flow
+contexts arrive at ``contexts_per_minute`` while it is active.
+"""
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy import insert
+
+from flowzo_ledger.database import FlowLedger
+from flowzo_ledger.models import FlowContext, SessionEvent, SessionRecord
+
+CONTEXT_TYPES = ["keystroke", "ide_state", "window_focus"]
+FILES = ["main.py", "session.py", "database.py", "models.py", "README.md"]
+
+
+@dataclass
+class SyntheticConfig:
+    """Shape of a generated ledger."""
+
+    sessions: int = 1000
+    events_per_session: int = 20
+    contexts_per_minute: float = 6.0
+    focus_minutes: int = 25
+    seed: int = 0
+    start: datetime = datetime(2024, 1, 1, 9)
+
+
+@dataclass
+class SyntheticSession:
+    """One generated session with its events and flow contexts."""
+
+    record: Dict[str, Any]
+    events: List[Dict[str, Any]]
+    contexts: List[Dict[str, Any]]
+
+
+def generate_sessions(config: SyntheticConfig) -> Iterator[SyntheticSession]:
+    """Yield sessions one at a time so callers never hold the whole ledger."""
+    rng = random.Random(config.seed)
+    focus_seconds = config.focus_minutes * 60
+    for i in range(config.sessions):
+        start_time = config.start + timedelta(hours=4 * i, seconds=rng.randint(0, 3600))
+        # Ledger datetimes are naive UTC
+        t0 = start_time.replace(tzinfo=timezone.utc).timestamp()
+        active_at, cooldown_at, end_at = t0 + 60, t0 + 60 + focus_seconds, t0 + 60 + focus_seconds + 300
+        session_id = f"session_{i:07d}"
+
+        phases = [
+            (t0, "session_started", "priming", {"duration": focus_seconds, "priming_duration": 60}),
+            (t0, "state_transition", "priming", {"from_state": "idle", "to_state": "priming"}),
+            (active_at, "state_transition", "active", {"from_state": "priming", "to_state": "active"}),
+            (active_at, "focus_phase_started", "active", {"duration": focus_seconds}),
+            (cooldown_at, "state_transition", "cooldown", {"from_state": "active", "to_state": "cooldown"}),
+            (cooldown_at, "cooldown_started", "cooldown", {}),
+            (end_at, "state_transition", "completed", {"from_state": "cooldown", "to_state": "completed"}),
+            (end_at, "session_completed", "completed", {"total_events": config.events_per_session}),
+        ]
+        padding = [
+            (rng.uniform(active_at, cooldown_at), "state_transition", "active", {"seq": n})
+            for n in range(max(0, config.events_per_session - len(phases)))
+        ]
+        created_at = start_time + timedelta(seconds=end_at - t0)
+        events = [
+            {
+                "session_id": session_id,
+                "timestamp": ts,
+                "event_type": event_type,
+                "state": state,
+                "data": data,
+                "created_at": created_at,
+            }
+            for ts, event_type, state, data in sorted(phases + padding, key=lambda event: event[0])
+        ]
+
+        context_count = int(config.contexts_per_minute * config.focus_minutes)
+        contexts = [
+            {
+                "session_id": session_id,
+                "context_type": rng.choice(CONTEXT_TYPES),
+                "timestamp": ts,
+                "data": {"file": rng.choice(FILES), "line": rng.randint(1, 500)},
+                "created_at": created_at,
+            }
+            for ts in sorted(rng.uniform(active_at, cooldown_at) for _ in range(context_count))
+        ]
+
+        record = {
+            "session_id": session_id,
+            "start_time": start_time,
+            "end_time": created_at,
+            "duration_seconds": focus_seconds,
+            "state": "completed",
+            "created_at": start_time,
+            "updated_at": created_at,
+        }
+        yield SyntheticSession(record, events, contexts)
+
+
+def populate(ledger: FlowLedger, config: SyntheticConfig, chunk_sessions: int = 100) -> Dict[str, int]:
+    """Bulk-load a synthetic ledger through SQLAlchemy Core.
+
+    This is the fast path for building large fixtures; it bypasses the
+    per-row FlowLedger API (and so rollups) on purpose. Returns row counts.
+    """
+    counts = {"sessions": 0, "events": 0, "contexts": 0}
+    sessions: List[SyntheticSession] = []
+
+    def write() -> None:
+        with ledger.engine.begin() as conn:
+            conn.execute(insert(SessionRecord), [s.record for s in sessions])
+            conn.execute(insert(SessionEvent), [e for s in sessions for e in s.events])
+            contexts = [c for s in sessions for c in s.contexts]
+            if contexts:
+                conn.execute(insert(FlowContext), contexts)
+        counts["sessions"] += len(sessions)
+        counts["events"] += sum(len(s.events) for s in sessions)
+        counts["contexts"] += sum(len(s.contexts) for s in sessions)
+        sessions.clear()
+
+    for session in generate_sessions(config):
+        sessions.append(session)
+        if len(sessions) >= chunk_sessions:
+            write()
+    if sessions:
+        write()
+    return counts
@@ -0,0 +1,62 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Thin client for the flowzo daemon (see ``daemon``).
+
+Kept free of asyncio and the rest of the stack so that commands the
+daemon runs cost little more than argument parsing.
+"""
+
+import os
+import socket
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from .framing import encode_frame, recv_frame
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+
+def default_socket_path() -> Path:
+    """``$FLOWZO_DAEMON_SOCKET``, or ``~/.flowzo/daemon.sock``."""
+    return Path(os.environ.get("FLOWZO_DAEMON_SOCKET") or Path.home() / ".flowzo" / "daemon.sock")
+
+
+def run_in_daemon(request: Dict[str, Any], console: "Console", path: Optional[os.PathLike] = None) -> Optional[int]:
+    """Run ``request`` in the daemon, writing its output to ``console``.
+
+    Returns the command's exit code, or ``None`` if no daemon is listening
+    or ``FLOWZO_NO_DAEMON`` is set, in which case the caller should run the
+    command itself.
+    """
+    if os.environ.get("FLOWZO_NO_DAEMON") or not hasattr(socket, "AF_UNIX"):
+        return None
+    path = Path(path) if path is not None else default_socket_path()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+
+    terminal = {
+        "width": console.width,
+        "color_system": console.color_system,
+        "is_terminal": console.is_terminal,
+        "is_interactive": console.is_interactive,
+    }
+    out = console.file
+    with sock:
+        try:
+            sock.sendall(encode_frame({**request, "terminal": terminal}))
+            while (message := recv_frame(sock)) is not None:
+                if message["type"] == "output":
+                    out.write(message["text"])
+                    out.flush()
+                elif message["type"] == "exit":
+                    return message["code"]
+        except KeyboardInterrupt:
+            return 130
+        except OSError:
+            pass
+    console.print("[red]Lost connection to the flowzo daemon[/red]")
+    return 1
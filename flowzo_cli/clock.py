@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Clocks that ``SessionEngine`` reads the time from and sleeps on.
+
+``SystemClock`` is the wall clock. ``VirtualClock`` only moves forward
+when every task sleeping on it is waiting, jumping straight to the next
+deadline, so sessions run in as long as their own work takes while
+timestamps stay consistent between them.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+
+class Clock(ABC):
+    """Source of epoch timestamps and of sleeps measured against them."""
+
+    @abstractmethod
+    def time(self) -> float:
+        """Current time in epoch seconds."""
+
+    @abstractmethod
+    async def sleep(self, seconds: float) -> None:
+        """Return once ``seconds`` have passed on this clock."""
+
+
+class SystemClock(Clock):
+    """The wall clock, with ``asyncio.sleep``."""
+
+    def time(self) -> float:
+        return time.time()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """Simulated time that skips ahead instead of waiting.
+
+    Sleepers are woken in deadline order. With ``auto`` set, a runner task
+    jumps to the next deadline once the event loop has run ``settle``
+    iterations with no new sleeper, so tasks that were just woken get to
+    react first; it exits as soon as nothing is sleeping. Work that waits on
+    anything other than this clock (threads, sockets) may see time move on
+    meanwhile. With ``auto`` unset, time only moves through ``advance``,
+    e.g. between steps of a test.
+    """
+
+    def __init__(
+        self, start: Optional[float] = None, settle: int = 3, auto: bool = True
+    ) -> None:
+        """Initialize the clock at ``start``, or at the current wall time."""
+        self._now = time.time() if start is None else start
+        self.settle = settle
+        self.auto = auto
+        self._sleepers: List[Tuple[float, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._runner: Optional[asyncio.Task] = None
+
+    def time(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float) -> None:
+        """Move time forward, waking sleepers whose deadline has passed."""
+        if seconds < 0:
+            raise ValueError("Time cannot move backwards")
+        self._now += seconds
+        self._wake_due()
+
+    async def sleep(self, seconds: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        deadline = self._now + max(0.0, seconds)
+        heapq.heappush(self._sleepers, (deadline, next(self._order), future))
+        if self.auto and (self._runner is None or self._runner.done()):
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+        await future
+
+    def _drop_cancelled(self) -> None:
+        while self._sleepers and self._sleepers[0][2].done():
+            heapq.heappop(self._sleepers)
+
+    def _wake_due(self) -> None:
+        while self._sleepers and self._sleepers[0][0] <= self._now:
+            _, _, future = heapq.heappop(self._sleepers)
+            if not future.done():
+                future.set_result(None)
+
+    async def _run(self) -> None:
+        """Jump to the next deadline whenever the sleepers have settled."""
+        self._drop_cancelled()
+        while self.auto and self._sleepers:
+            quiet = 0
+            while quiet < self.settle:
+                pending = len(self._sleepers)
+                await asyncio.sleep(0)
+                quiet = quiet + 1 if len(self._sleepers) == pending else 0
+            self._drop_cancelled()
+            if self.auto and self._sleepers:
+                self._now = max(self._now, self._sleepers[0][0])
+                self._wake_due()
+                self._drop_cancelled()
@@ -0,0 +1,288 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Long-lived flowzo daemon and the thin client that talks to it.
+
+``flowzo daemon`` keeps an ``AsyncFlowLedger``, integration clients that
+share one HTTP connection pool, and the sessions it runs in memory.
+``flowzo start``, ``next`` and ``auth test`` hand their options to it with
+``client.run_in_daemon`` and print what comes back, or run in-process
+when no daemon is listening.
+
+A client sends one frame (see ``framing``) with the command, its options
+and its terminal's settings. The daemon renders the command's console
+output for that terminal and replies with ``{"type": "output", "text":
+...}`` frames, then ``{"type": "exit", "code": n}``. Closing the
+connection cancels the command and aborts any session it was running.
+"""
+
+import asyncio
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Set
+
+from .client import default_socket_path
+from .framing import encode_frame, read_frame, start_unix_server
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    from .feed import StateFeedServer
+    from .session import SessionEngine
+
+# Request keys passed through to main._start_session
+START_OPTIONS = ("duration", "cooldown", "output", "resume", "compact", "priming")
+
+
+class _ClientOutput:
+    """Text stream that forwards what a command writes to its client.
+
+    Writes from other threads, such as rich's live refresh thread, are
+    handed to the event loop, as the transport is not thread-safe.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.buffer = _ClientBinaryOutput(self)
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.get_ident()
+
+    def write(self, text: str) -> int:
+        if text:
+            frame = encode_frame({"type": "output", "text": text})
+            if threading.get_ident() == self._thread:
+                self._send(frame)
+            else:
+                self._loop.call_soon_threadsafe(self._send, frame)
+        return len(text)
+
+    def _send(self, frame: bytes) -> None:
+        if not self.writer.is_closing():
+            self.writer.write(frame)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+class _ClientBinaryOutput:
+    """``buffer`` of a ``_ClientOutput``, for commands that write bytes."""
+
+    def __init__(self, text: _ClientOutput) -> None:
+        self.text = text
+
+    def write(self, data: bytes) -> int:
+        self.text.write(data.decode())
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+class FlowDaemon:
+    """Serve flowzo commands from one long-lived process.
+
+    Use as an async context manager, then ``await serve_forever()``. Uses
+    ``ledger`` if given, otherwise opens (and later closes) the default
+    one. With ``feed`` set, the overlay state feed is served the whole
+    time; otherwise it starts with the first ``start --feed`` request.
+    """
+
+    def __init__(self, path: Optional[os.PathLike] = None, ledger: Any = None, feed: bool = False) -> None:
+        """Initialize a daemon that will listen on ``path``."""
+        self.path = Path(path) if path is not None else default_socket_path()
+        self.ledger = ledger
+        self.serve_feed = feed
+        self.feed: Optional["StateFeedServer"] = None
+        # Sessions being run for clients, by session id
+        self.sessions: Dict[str, "SessionEngine"] = {}
+        # Integrations by source, shared across requests
+        self.clients: Dict[str, Any] = {}
+        self._owns_ledger = ledger is None
+        self._http: Any = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._handlers: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+        self._commands: Dict[str, Callable[[Dict[str, Any], "Console"], Awaitable[None]]] = {
+            "start": self._start,
+            "next": self._next,
+            "auth_test": self._auth_test,
+            "status": self._status,
+            "reload": self._reload,
+            "shutdown": self._shutdown,
+        }
+
+    async def __aenter__(self) -> "FlowDaemon":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Open the ledger and HTTP client, then start listening."""
+        import httpx
+
+        if self.ledger is None:
+            from flowzo_ledger.async_ledger import AsyncFlowLedger
+
+            self.ledger = AsyncFlowLedger(write_behind=True)
+        self._http = httpx.AsyncClient()
+        self._load_clients()
+        if self.serve_feed:
+            await self._feed()
+        self._server = await start_unix_server(self._serve, self.path)
+
+    async def serve_forever(self) -> None:
+        """Serve until a client sends ``shutdown``."""
+        await self._stopping.wait()
+
+    async def close(self) -> None:
+        """Stop listening, abort running sessions and release resources."""
+        if self._server is not None:
+            self._server.close()
+        # A closed connection cancels its command, aborting its session
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+            self.path.unlink(missing_ok=True)
+        if self.feed is not None:
+            await self.feed.close()
+            self.feed = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._owns_ledger and self.ledger is not None:
+            await self.ledger.aclose()
+            self.ledger = None
+
+    def _load_clients(self) -> None:
+        """Create the integrations; credentials are read on first use."""
+        from flowzo_integrations.github import GitHubIntegration
+        from flowzo_integrations.linear import LinearIntegration
+
+        self.clients = {
+            "github": GitHubIntegration(client=self._http),
+            "linear": LinearIntegration(client=self._http),
+        }
+
+    async def _feed(self) -> "StateFeedServer":
+        if self.feed is None:
+            from .feed import StateFeedServer
+
+            self.feed = StateFeedServer()
+            await self.feed.start()
+        return self.feed
+
+    def _console(self, request: Dict[str, Any], writer: asyncio.StreamWriter) -> "Console":
+        """A console that renders for the client's terminal."""
+        from rich.console import Console
+
+        terminal = request.get("terminal") or {}
+        return Console(
+            file=_ClientOutput(writer),
+            width=terminal.get("width", 80),
+            color_system=terminal.get("color_system"),
+            force_terminal=terminal.get("is_terminal", False),
+            force_interactive=terminal.get("is_interactive", False),
+        )
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._handlers.add(asyncio.current_task())
+        self._connections.add(writer)
+        try:
+            request = await read_frame(reader)
+            if request is not None:
+                code = await self._run(request, reader, writer)
+                if not writer.is_closing():
+                    writer.write(encode_frame({"type": "exit", "code": code}))
+                    await writer.drain()
+                if request.get("command") == "shutdown":
+                    # Only once the client has its answer
+                    self._stopping.set()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    async def _run(self, request: Dict[str, Any], reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> int:
+        """Run a request's command until it finishes or the client hangs up."""
+        out = self._console(request, writer)
+        command = self._commands.get(request.get("command"))
+        if command is None:
+            out.print(f"[red]Unknown daemon command: {request.get('command')}[/red]")
+            return 2
+
+        task = asyncio.create_task(command(request, out))
+        # Clients send nothing after the request, so any read returning means a hang-up
+        hangup = asyncio.create_task(reader.read())
+        try:
+            await asyncio.wait({task, hangup}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            hangup.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if task.cancelled():
+            return 130
+        if task.exception() is not None:
+            out.print(f"[red]Error: {task.exception()}[/red]")
+            return 1
+        return 0
+
+    async def _start(self, request: Dict[str, Any], out: "Console") -> None:
+        from .main import _start_session
+        from .session import SessionState
+
+        options = {key: request[key] for key in START_OPTIONS if key in request}
+        ledger = self.ledger if request.get("ledger", True) else None
+        feed = await self._feed() if request.get("feed") else self.feed
+        engines = []
+
+        def started(engine: "SessionEngine") -> None:
+            engines.append(engine)
+            self.sessions[engine.session_id] = engine
+
+        try:
+            await _start_session(ledger, feed=feed, out=out, started=started, **options)
+        except asyncio.CancelledError:
+            for engine in engines:
+                if engine.state != SessionState.IDLE:
+                    engine.abort_session()
+                    await engine.drain()
+            raise
+        finally:
+            for engine in engines:
+                self.sessions.pop(engine.session_id, None)
+
+    async def _next(self, request: Dict[str, Any], out: "Console") -> None:
+        from .main import _get_next_task
+
+        await _get_next_task(request.get("source", "github"), out, self.clients)
+
+    async def _auth_test(self, request: Dict[str, Any], out: "Console") -> None:
+        from .main import _test_auth
+
+        await _test_auth(request.get("source", "github"), out, self.clients)
+
+    async def _status(self, request: Dict[str, Any], out: "Console") -> None:
+        out.print(f"flowzo daemon (pid {os.getpid()}) on {self.path}")
+        if not self.sessions:
+            out.print("No sessions running")
+        for engine in self.sessions.values():
+            status = engine.get_status()
+            out.print(f"{engine.session_id}: {engine.state.value}, {status['remaining_seconds']:.0f}s of focus left")
+
+    async def _reload(self, request: Dict[str, Any], out: "Console") -> None:
+        """Forget cached credentials, e.g. after ``flowzo auth``."""
+        self._load_clients()
+
+    async def _shutdown(self, request: Dict[str, Any], out: "Console") -> None:
+        out.print("[yellow]Stopping the flowzo daemon[/yellow]")
@@ -0,0 +1,214 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Live session state feed for the desktop overlay over a Unix socket.
+
+Each frame is a 4-byte big-endian length followed by a compact JSON object:
+
+- ``{"type": "snapshot", "seq": n, "state": {...}}`` carries the full
+  overlay state and is sent when a client connects or needs to resync.
+- ``{"type": "delta", "seq": n, "state": {...}}`` carries only the fields
+  that changed since frame ``n - 1``.
+
+The state has the fields of the overlay's ``SessionState`` (the shape of
+``SessionEngine.get_status()`` plus ``task``). Changes are coalesced to at
+most ``refresh_hz`` frames a second, and nothing is sent while the state
+is unchanged. A client that falls behind skips deltas and gets a fresh
+snapshot once it catches up; a client may also ask for one by sending a
+``{"type": "resync"}`` frame. Windows named pipes are not supported yet.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from .framing import encode_frame, read_frame, start_unix_server
+from .session import SessionEngine, SessionState
+
+IDLE_STATE: Dict[str, Any] = {
+    "session_id": "idle",
+    "state": "idle",
+    "elapsed_seconds": 0.0,
+    "remaining_seconds": 0.0,
+    "total_duration": 0,
+    "task": None,
+}
+
+
+def default_socket_path() -> Path:
+    """``$FLOWZO_FEED_SOCKET``, or ``~/.flowzo/feed.sock``."""
+    return Path(os.environ.get("FLOWZO_FEED_SOCKET") or Path.home() / ".flowzo" / "feed.sock")
+
+
+def overlay_state(engine: Optional[SessionEngine], task: Optional[str] = None) -> Dict[str, Any]:
+    """The overlay's view of ``engine``, with times rounded for display."""
+    if engine is None:
+        return dict(IDLE_STATE)
+    status = engine.get_status()
+    return {
+        "session_id": status["session_id"],
+        "state": status["state"].value,
+        "elapsed_seconds": round(status["elapsed_seconds"], 2),
+        "remaining_seconds": round(status["remaining_seconds"], 2),
+        "total_duration": int(status["total_duration"]),
+        "task": task,
+    }
+
+
+class _Client:
+    __slots__ = ("writer", "task", "needs_snapshot")
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.task = asyncio.current_task()
+        self.needs_snapshot = False
+
+
+class StateFeedServer:
+    """Serve the state of the attached ``SessionEngine`` to overlay clients.
+
+    Use as an async context manager. ``attach`` switches the engine being
+    followed, e.g. when a new session starts. Clients whose unsent output
+    exceeds ``max_buffer`` bytes skip deltas until they can take a
+    snapshot.
+    """
+
+    def __init__(
+        self,
+        path: Optional[os.PathLike] = None,
+        refresh_hz: float = 60.0,
+        max_buffer: int = 64 * 1024,
+    ) -> None:
+        """Initialize a feed that will listen on ``path``."""
+        self.path = Path(path) if path is not None else default_socket_path()
+        self.refresh_hz = refresh_hz
+        self.max_buffer = max_buffer
+        self.task: Optional[str] = None  # Shown by the overlay under the ring
+        self._engine: Optional[SessionEngine] = None
+        self._state = overlay_state(None)
+        self._seq = 0
+        self._clients: Set[_Client] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._publisher: Optional[asyncio.Task] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    async def __aenter__(self) -> "StateFeedServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Listen on the socket, replacing a stale one left by a dead server."""
+        self._server = await start_unix_server(self._serve, self.path)
+        self._publisher = asyncio.create_task(self._publish())
+
+    async def close(self) -> None:
+        """Stop serving and disconnect every client."""
+        tasks = [task for task in (self._publisher, self._watcher) if task is not None]
+        self._publisher = self._watcher = None
+        for task in tasks:
+            task.cancel()
+        if self._server is not None:
+            self._server.close()
+        # Closing the transport ends a client's read loop at end of stream
+        for client in self._clients:
+            client.writer.close()
+            tasks.append(client.task)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+            self.path.unlink(missing_ok=True)
+
+    def attach(self, engine: Optional[SessionEngine]) -> None:
+        """Follow ``engine`` (``None`` for idle) from the next frame on."""
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+        self._engine = engine
+        if engine is not None:
+            self._watcher = asyncio.create_task(self._watch(engine))
+        self._wake.set()
+
+    async def _watch(self, engine: SessionEngine) -> None:
+        """Wake the publisher on every event; only the latest one matters."""
+        with engine.subscribe(maxsize=1) as events:
+            async for _ in events:
+                self._wake.set()
+
+    async def _publish(self) -> None:
+        interval = 1 / self.refresh_hz
+        while True:
+            engine = self._engine
+            if engine is None or engine.state == SessionState.IDLE:
+                # Nothing moves while idle, so sleep until the next event
+                await self._wake.wait()
+            else:
+                await asyncio.sleep(interval)
+            self._wake.clear()
+            self._broadcast()
+
+    def _broadcast(self) -> None:
+        state = overlay_state(self._engine, self.task)
+        delta = {key: value for key, value in state.items() if self._state.get(key) != value}
+        if not delta:
+            return
+        self._seq += 1
+        self._state = state
+        frame = encode_frame({"type": "delta", "seq": self._seq, "state": delta})
+        for client in list(self._clients):
+            if client.writer.transport.get_write_buffer_size() > self.max_buffer:
+                client.needs_snapshot = True
+            elif client.needs_snapshot:
+                self._send_snapshot(client)
+            else:
+                client.writer.write(frame)
+
+    def _send_snapshot(self, client: _Client) -> None:
+        client.needs_snapshot = False
+        client.writer.write(encode_frame({"type": "snapshot", "seq": self._seq, "state": self._state}))
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = _Client(writer)
+        self._clients.add(client)
+        try:
+            self._send_snapshot(client)
+            while (message := await read_frame(reader)) is not None:
+                if message.get("type") == "resync":
+                    self._send_snapshot(client)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self._clients.discard(client)
+            writer.close()
+
+
+async def follow_state_feed(path: Optional[os.PathLike] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Yield the full overlay state after every frame from a feed server."""
+    path = Path(path) if path is not None else default_socket_path()
+    reader, writer = await asyncio.open_unix_connection(str(path))
+    state: Dict[str, Any] = {}
+    seq = None
+    try:
+        while (message := await read_frame(reader)) is not None:
+            if message["type"] == "snapshot":
+                state = dict(message["state"])
+            elif seq is not None and message["seq"] != seq + 1:
+                # Missed a delta: ask for a snapshot and wait for it
+                writer.write(encode_frame({"type": "resync"}))
+                seq = None
+                continue
+            elif seq is not None:
+                state.update(message["state"])
+            else:
+                continue
+            seq = message["seq"]
+            yield dict(state)
+    finally:
+        writer.close()
@@ -0,0 +1,106 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Length-prefixed JSON frames for flowzo's local sockets.
+
+Each frame is a 4-byte big-endian length followed by a compact JSON
+object. Used by the overlay state feed and the daemon. The blocking
+helpers serve thin clients, which avoid importing asyncio at all.
+"""
+
+import json
+import os
+import socket
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    import asyncio
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 1 << 20
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    payload = orjson.dumps(message) if orjson is not None else json.dumps(message, separators=(",", ":")).encode()
+    return HEADER.pack(len(payload)) + payload
+
+
+def _check_size(size: int) -> None:
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {size} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+
+
+async def read_frame(reader: "asyncio.StreamReader") -> Optional[Dict[str, Any]]:
+    """Read one frame; ``None`` at end of stream."""
+    import asyncio
+
+    try:
+        header = await reader.readexactly(HEADER.size)
+        (size,) = HEADER.unpack(header)
+        _check_size(size)
+        payload = await reader.readexactly(size)
+    except asyncio.IncompleteReadError:
+        return None
+    return json.loads(payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """Blocking ``read_frame`` for a connected socket."""
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    (size,) = HEADER.unpack(header)
+    _check_size(size)
+    payload = _recv_exactly(sock, size)
+    return None if payload is None else json.loads(payload)
+
+
+async def start_unix_server(
+    handler: Callable[["asyncio.StreamReader", "asyncio.StreamWriter"], Awaitable[None]],
+    path: Path,
+) -> "asyncio.AbstractServer":
+    """Listen on ``path``, readable by this user only.
+
+    A socket left behind by a dead server is replaced; raises
+    ``RuntimeError`` if a live server is already listening there.
+    """
+    import asyncio
+
+    if not hasattr(asyncio, "start_unix_server"):
+        raise RuntimeError("Unix domain sockets are not supported on this platform")
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if path.exists():
+        try:
+            _, writer = await asyncio.open_unix_connection(str(path))
+        except OSError:
+            path.unlink()
+        else:
+            writer.close()
+            raise RuntimeError(f"A server is already listening on {path}")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Bind under a private umask so the socket is never reachable by others
+    umask = os.umask(0o177)
+    try:
+        sock.bind(str(path))
+    except OSError:
+        sock.close()
+        raise
+    finally:
+        os.umask(umask)
+    return await asyncio.start_unix_server(handler, sock=sock)
@@ -1,19 +1,20 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 """FlowZo CLI main entry point."""
 
-import asyncio
-import json
-import sys
-from typing import Annotated
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Annotated, Any, Awaitable, Callable, Dict, Optional
 
 import typer
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 
-from .session import SessionEngine
-from flowzo_ledger.database import FlowLedger
-from flowzo_integrations.github import GitHubIntegration
-from flowzo_integrations.linear import LinearIntegration
+# Commands import what they use when they run (asyncio included): flowzo is
+# invoked from shell hooks and status bars, and commands handed to the daemon
+# never need more, so startup only pays for typer and rich.
+if TYPE_CHECKING:
+    from flowzo_ledger.async_ledger import AsyncFlowLedger
+    from .feed import StateFeedServer
+    from .session import SessionEngine
 
 app = typer.Typer(
     name="flowzo",
@@ -26,61 +27,261 @@ console = Console()
 auth_app = typer.Typer(name="auth", help="Manage integration authentication")
 app.add_typer(auth_app)
 
+# Ledger maintenance subcommand
+ledger_app = typer.Typer(name="ledger", help="Maintain the flow ledger")
+app.add_typer(ledger_app)
+
 
 @app.command()
 def start(
     duration: Annotated[int, typer.Option("--duration", "-d", help="Session duration in seconds")] = 5,
+    cooldown: Annotated[float, typer.Option("--cooldown", help="Cooldown duration in seconds")] = 3,
     json_output: Annotated[bool, typer.Option("--json", help="Output events as JSON")] = False,
+    json_stream: Annotated[bool, typer.Option(
+        "--json-stream", help="Stream events as NDJSON while the session runs",
+    )] = False,
     no_ledger: Annotated[bool, typer.Option("--no-ledger", help="Skip ledger storage")] = False,
+    compact: Annotated[bool, typer.Option("--compact", help="Apply flow context retention after the session")] = False,
+    no_resume: Annotated[bool, typer.Option(
+        "--no-resume", help="Close interrupted sessions instead of resuming one",
+    )] = False,
+    feed: Annotated[bool, typer.Option("--feed", help="Serve live state to the desktop overlay")] = False,
 ) -> None:
     """Start a focus session using SessionEngine FSM."""
+    options = {
+        "duration": duration,
+        "cooldown": cooldown,
+        "output": "json_stream" if json_stream else "json" if json_output else "ui",
+        "resume": not no_resume,
+        "compact": compact,
+    }
+    if _run_in_daemon({"command": "start", "ledger": not no_ledger, "feed": feed, **options}):
+        return
+    
+    import asyncio
+    
+    from flowzo_ledger.async_ledger import AsyncFlowLedger
+    
     # Initialize ledger unless disabled
-    ledger = None if no_ledger else FlowLedger()
-    engine = SessionEngine(ledger=ledger)
+    ledger = None if no_ledger else AsyncFlowLedger(write_behind=True)
+    try:
+        asyncio.run(_start_in_process(ledger, feed, **options))
+    finally:
+        if ledger:
+            ledger.close()
+
+
+def _run_in_daemon(request: Dict[str, Any]) -> bool:
+    """Run a command in the flowzo daemon, if one is running.
+    
+    Returns False when there is no daemon, so the caller runs it in-process.
+    """
+    from .client import run_in_daemon
+    
+    code = run_in_daemon(request, console)
+    if code is None:
+        return False
+    if code:
+        raise typer.Exit(code)
+    return True
+
+
+async def _start_in_process(ledger: Optional["AsyncFlowLedger"], feed: bool, **options: Any) -> None:
+    if not feed:
+        await _start_session(ledger, **options)
+        return
+    from .feed import StateFeedServer
     
-    if json_output:
+    async with StateFeedServer() as server:
+        await _start_session(ledger, feed=server, **options)
+
+
+async def _start_session(
+    ledger: Optional["AsyncFlowLedger"],
+    duration: int,
+    cooldown: Optional[float] = None,
+    output: str = "ui",
+    resume: bool = True,
+    compact: bool = False,
+    priming: float = 1,
+    feed: Optional["StateFeedServer"] = None,
+    out: Console = console,
+    started: Optional[Callable[["SessionEngine"], None]] = None,
+) -> "SessionEngine":
+    """Run a session for ``flowzo start``, resuming an interrupted one if any.
+    
+    ``output`` is ``ui``, ``json`` or ``json_stream``. ``started`` is called
+    with the engine before it runs.
+    """
+    from functools import partial
+    
+    from .session import SessionEngine
+    
+    engine = SessionEngine(ledger=ledger, cooldown_duration=cooldown)
+    run_session = partial(engine.start_session, duration, priming_duration=priming)
+    if ledger:
+        resumed = await _recover_sessions(ledger, resume=resume, quiet=output != "ui", out=out)
+        if resumed:
+            engine = resumed
+            run_session = engine.resume_session
+    if started:
+        started(engine)
+    if feed:
+        feed.attach(engine)
+    if output == "json_stream":
+        # Write each event to stdout as it is emitted
+        await _run_session_json_stream(engine, run_session, out)
+    elif output == "json":
         # Run session and output JSON events
-        asyncio.run(_run_session_json(engine, duration))
+        await _run_session_json(engine, run_session, out)
     else:
         # Run session with rich UI
-        asyncio.run(_run_session_ui(engine, duration))
+        await _run_session_ui(engine, run_session, duration, out)
+    if ledger and compact:
+        # Runs on the ledger's writer thread in short batches
+        await ledger.compact_flow_contexts()
+    return engine
+
+
+@app.command()
+def daemon(
+    feed: Annotated[bool, typer.Option("--feed", help="Serve live state to the desktop overlay")] = False,
+    status: Annotated[bool, typer.Option("--status", help="Show the running daemon's sessions")] = False,
+    stop: Annotated[bool, typer.Option("--stop", help="Stop the running daemon")] = False,
+) -> None:
+    """Keep flowzo running so start, next and auth test answer instantly."""
+    if status or stop:
+        if not _run_in_daemon({"command": "shutdown" if stop else "status"}):
+            console.print("[yellow]The flowzo daemon is not running[/yellow]")
+        return
+    
+    import asyncio
+    
+    from .daemon import FlowDaemon
+    
+    async def serve() -> None:
+        async with FlowDaemon(feed=feed) as server:
+            console.print(f"[green]flowzo daemon listening on {server.path}[/green]")
+            await server.serve_forever()
+    
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+
+@app.command()
+def serve(
+    host: Annotated[str, typer.Option("--host", help="Interface to listen on")] = "127.0.0.1",
+    port: Annotated[int, typer.Option("--port", "-p", help="Port to listen on")] = 8000,
+    db: Annotated[Optional[str], typer.Option("--db", help="Ledger database path")] = None,
+) -> None:
+    """Serve session control and ledger queries over HTTP and WebSocket."""
+    import uvicorn
+    
+    from .server import create_app
+    
+    console.print(f"[green]Serving FlowZo API on http://{host}:{port}[/green]")
+    uvicorn.run(create_app(db_path=db), host=host, port=port, log_level="warning")
+
+
+async def _recover_sessions(
+    ledger: "AsyncFlowLedger",
+    resume: bool,
+    quiet: bool,
+    out: Console = console,
+) -> Optional["SessionEngine"]:
+    """Close sessions interrupted by a crash and return one to resume, if any."""
+    from .session import recover_sessions
+    
+    recovered = await recover_sessions(ledger, resume=resume)
+    # Resume the newest; older ones are closed
+    resumed = recovered.resumed[-1] if recovered.resumed else None
+    for engine in recovered.resumed[:-1]:
+        engine.abort_session()
+        await engine.drain()
+        recovered.closed.append(engine.session_id)
+    if not quiet:
+        if recovered.closed:
+            out.print(f"[yellow]Closed {len(recovered.closed)} interrupted session(s)[/yellow]")
+        if resumed:
+            out.print(f"[yellow]Resuming interrupted session {resumed.session_id} ({resumed.state.value})[/yellow]")
+    return resumed
 
 
-async def _run_session_json(engine: SessionEngine, duration: int) -> None:
+async def _run_session_json(
+    engine: "SessionEngine",
+    run_session: Callable[[], Awaitable[None]],
+    out: Console,
+) -> None:
     """Run session and output JSON events to stdout."""
-    await engine.start_session(duration, priming_duration=1)
+    await run_session()
     
     # Output all events as JSON
-    print(engine.export_events_json())
+    out.file.write(engine.export_events_json() + "\n")
 
 
-async def _run_session_ui(engine: SessionEngine, duration: int) -> None:
+async def _run_session_json_stream(
+    engine: "SessionEngine",
+    run_session: Callable[[], Awaitable[None]],
+    out: Console,
+) -> None:
+    """Run session, writing one JSON line per event to stdout as it happens."""
+    import asyncio
+    
+    from .session import stream_events_ndjson
+    
+    # Never drop events; a reader that falls this far behind is an error
+    with engine.subscribe(maxsize=10_000, overflow="error") as events:
+        writer = asyncio.create_task(stream_events_ndjson(events, out.file.buffer))
+        try:
+            await run_session()
+        finally:
+            events.close()
+            await writer
+
+
+async def _run_session_ui(
+    engine: "SessionEngine",
+    run_session: Callable[[], Awaitable[None]],
+    duration: int,
+    out: Console,
+) -> None:
     """Run session with rich UI progress display."""
-    console.print("[bold green]Entering flow...[/bold green]")
+    import asyncio
+    
+    from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+    
+    out.print("[bold green]Entering flow...[/bold green]")
     
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         TimeElapsedColumn(),
-        console=console,
+        console=out,
+        # sys.stdout is shared by every session a daemon runs
+        redirect_stdout=False,
+        redirect_stderr=False,
     ) as progress:
         task = progress.add_task("Focus session", total=duration + 4)  # +4 for priming+cooldown
         
-        # Start session in background
-        session_task = asyncio.create_task(engine.start_session(duration, priming_duration=1))
-        
-        # Update progress while session runs
-        while not session_task.done():
-            status = engine.get_status()
-            progress.update(task, description=f"State: {status['state']}")
-            progress.advance(task, 0.1)
-            await asyncio.sleep(0.1)
+        with engine.subscribe(["state_transition"]) as transitions:
+            # Start session in background; the subscription ends with it
+            session_task = asyncio.create_task(run_session())
+            session_task.add_done_callback(lambda _: transitions.close())
+            
+            # Update progress as the session changes state
+            async for event in transitions:
+                progress.update(task, description=f"State: {event.data['to_state']}")
         
         await session_task
     
-    console.print("[bold blue]Session complete! 🎯[/bold blue]")
-    console.print(f"Session ID: {engine.session_id}")
-    console.print(f"Total events: {len(engine.events)}")
+    out.print("[bold blue]Session complete! 🎯[/bold blue]")
+    out.print(f"Session ID: {engine.session_id}")
+    out.print(f"Total events: {engine.events.total}")
 
 
 @app.command()
@@ -88,45 +289,206 @@ def next(
     source: Annotated[str, typer.Option("--source", "-s", help="Integration source (github/linear)")] = "github",
 ) -> None:
     """Show next task from integrations."""
-    asyncio.run(_get_next_task(source))
+    if not _run_in_daemon({"command": "next", "source": source}):
+        import asyncio
+        
+        asyncio.run(_get_next_task(source))
 
 
-async def _get_next_task(source: str) -> None:
-    """Get next task from specified integration."""
+async def _get_next_task(source: str, out: Console = console, clients: Optional[Dict[str, Any]] = None) -> None:
+    """Get next task from specified integration.
+    
+    ``clients`` maps sources to integrations to reuse, as the daemon does.
+    """
+    from flowzo_integrations.github import GitHubIntegration
+    from flowzo_integrations.linear import LinearIntegration
+    
     try:
         if source == "github":
-            github = GitHubIntegration()
+            github = clients["github"] if clients else GitHubIntegration()
             issue = await github.get_next_issue()
             if issue:
-                console.print(f"[bold green]Next GitHub Issue:[/bold green]")
-                console.print(f"[bold]{issue.repository}#{issue.number}[/bold]: {issue.title}")
-                console.print(f"URL: {issue.html_url}")
+                out.print(f"[bold green]Next GitHub Issue:[/bold green]")
+                out.print(f"[bold]{issue.repository}#{issue.number}[/bold]: {issue.title}")
+                out.print(f"URL: {issue.html_url}")
                 if issue.labels:
-                    console.print(f"Labels: {', '.join(issue.labels)}")
+                    out.print(f"Labels: {', '.join(issue.labels)}")
             else:
-                console.print("[yellow]No assigned GitHub issues found[/yellow]")
+                out.print("[yellow]No assigned GitHub issues found[/yellow]")
         
         elif source == "linear":
-            linear = LinearIntegration()
+            linear = clients["linear"] if clients else LinearIntegration()
             issue = await linear.get_next_issue()
             if issue:
-                console.print(f"[bold green]Next Linear Issue:[/bold green]")
-                console.print(f"[bold]{issue.identifier}[/bold]: {issue.title}")
-                console.print(f"Team: {issue.team} | State: {issue.state}")
-                console.print(f"URL: {issue.url}")
+                out.print(f"[bold green]Next Linear Issue:[/bold green]")
+                out.print(f"[bold]{issue.identifier}[/bold]: {issue.title}")
+                out.print(f"Team: {issue.team} | State: {issue.state}")
+                out.print(f"URL: {issue.url}")
                 if issue.labels:
-                    console.print(f"Labels: {', '.join(issue.labels)}")
+                    out.print(f"Labels: {', '.join(issue.labels)}")
             else:
-                console.print("[yellow]No assigned Linear issues found[/yellow]")
+                out.print("[yellow]No assigned Linear issues found[/yellow]")
         
         else:
-            console.print(f"[red]Unknown source: {source}[/red]")
-            console.print("Available sources: github, linear")
+            out.print(f"[red]Unknown source: {source}[/red]")
+            out.print("Available sources: github, linear")
     
     except ValueError as e:
-        console.print(f"[red]Error: {e}[/red]")
+        out.print(f"[red]Error: {e}[/red]")
     except Exception as e:
-        console.print(f"[red]Integration error: {e}[/red]")
+        out.print(f"[red]Integration error: {e}[/red]")
+
+
+@app.command()
+def stats(
+    days: Annotated[int, typer.Option("--days", "-n", help="Number of days to include")] = 7,
+    by: Annotated[str, typer.Option("--by", "-b", help="Group by day or week")] = "day",
+) -> None:
+    """Show focus time per day or week from the ledger rollups."""
+    from rich.table import Table
+    
+    from flowzo_ledger.database import FlowLedger
+    from flowzo_ledger.rollups import GRANULARITIES, week_start
+    
+    if by not in GRANULARITIES:
+        console.print(f"[red]Unknown grouping: {by}[/red]")
+        console.print(f"Available groupings: {', '.join(GRANULARITIES)}")
+        raise typer.Exit(1)
+    
+    end = datetime.utcnow().date()
+    start = end - timedelta(days=days - 1)
+    if by == "week":
+        start = week_start(start)
+    
+    totals: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for rollup in FlowLedger().get_focus_stats(start, end, granularity=by):
+        totals[rollup.period_start][rollup.state] += rollup.seconds
+        totals[rollup.period_start]["sessions"] += rollup.sessions
+    
+    if not totals:
+        console.print("[yellow]No focus sessions recorded in this range[/yellow]")
+        return
+    
+    table = Table(title=f"Focus time by {by} (UTC)")
+    table.add_column("Period")
+    table.add_column("Focus", justify="right")
+    table.add_column("Priming", justify="right")
+    table.add_column("Cooldown", justify="right")
+    table.add_column("Sessions", justify="right")
+    for period, states in sorted(totals.items()):
+        table.add_row(
+            period,
+            _format_duration(states["active"]),
+            _format_duration(states["priming"]),
+            _format_duration(states["cooldown"]),
+            str(int(states["sessions"])),
+        )
+    console.print(table)
+
+
+def _format_duration(seconds: float) -> str:
+    """Format seconds as H:MM:SS."""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+@app.command()
+def export(
+    table: Annotated[str, typer.Argument(help="Table to export (sessions/events/contexts)")],
+    output: Annotated[str, typer.Option("--output", "-o", help="Output file, - for stdout")] = "-",
+    fmt: Annotated[str, typer.Option("--format", "-f", help="Output format (ndjson/csv)")] = "ndjson",
+    since: Annotated[datetime | None, typer.Option("--since", help="Start of range, UTC (inclusive)")] = None,
+    until: Annotated[datetime | None, typer.Option("--until", help="End of range, UTC (exclusive)")] = None,
+    gzip_output: Annotated[bool, typer.Option("--gzip", help="Gzip-compress the output (implied by .gz)")] = False,
+    batch_size: Annotated[int, typer.Option("--batch-size", help="Rows fetched per query")] = 1000,
+) -> None:
+    """Stream a ledger table to NDJSON or CSV."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+    
+    from flowzo_ledger.database import STREAM_TABLES, FlowLedger
+    from flowzo_ledger.export import EXPORT_FORMATS, export_table, open_export
+    
+    if table not in STREAM_TABLES:
+        console.print(f"[red]Unknown table: {table}[/red]")
+        console.print(f"Available tables: {', '.join(STREAM_TABLES)}")
+        raise typer.Exit(1)
+    if fmt not in EXPORT_FORMATS:
+        console.print(f"[red]Unknown format: {fmt}[/red]")
+        console.print(f"Available formats: {', '.join(EXPORT_FORMATS)}")
+        raise typer.Exit(1)
+    
+    # Progress goes to stderr so stdout stays a clean data stream
+    status = Console(stderr=True)
+    with FlowLedger() as ledger, open_export(output, gzip_output) as out, Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        TimeElapsedColumn(),
+        console=status,
+    ) as progress:
+        task = progress.add_task(f"Exporting {table}")
+        count = export_table(
+            ledger,
+            table,
+            out,
+            fmt,
+            start=since,
+            end=until,
+            batch_size=batch_size,
+            progress=lambda rows: progress.update(task, description=f"Exporting {table}: {rows} rows"),
+        )
+    status.print(f"[green]Exported {count} {table} rows[/green]")
+
+
+@ledger_app.command("rebuild-rollups")
+def ledger_rebuild_rollups() -> None:
+    """Recompute focus-time rollups from raw session events."""
+    from flowzo_ledger.database import FlowLedger
+    
+    with FlowLedger() as ledger:
+        count = ledger.rebuild_rollups()
+    console.print(f"[green]Rebuilt {count} rollup rows[/green]")
+
+
+@ledger_app.command("compact")
+def ledger_compact(
+    raw_days: Annotated[int, typer.Option("--raw-days", help="Days to keep raw flow contexts")] = 7,
+    aggregate_days: Annotated[int, typer.Option("--aggregate-days", help="Days to keep per-minute aggregates")] = 90,
+    vacuum: Annotated[bool, typer.Option("--vacuum", help="Rewrite the file first (locks the ledger)")] = False,
+) -> None:
+    """Downsample and expire old flow contexts, then shrink the ledger file."""
+    from flowzo_ledger.database import FlowLedger
+    from flowzo_ledger.retention import RetentionPolicy
+    
+    policy = RetentionPolicy(raw_days=raw_days, aggregate_days=aggregate_days)
+    with FlowLedger() as ledger:
+        if vacuum:
+            ledger.vacuum()
+        result = ledger.compact_flow_contexts(policy)
+    
+    console.print(f"[green]Downsampled {result['downsampled']} flow contexts[/green]")
+    console.print(f"Expired aggregates: {result['expired_aggregates']}")
+    console.print(f"Freed pages: {result['freed_pages']}")
+
+
+@ledger_app.command("merge")
+def ledger_merge(
+    paths: Annotated[list[str], typer.Argument(help="Ledger files to merge into the local ledger")],
+) -> None:
+    """Merge sessions from other ledger files, skipping rows already present."""
+    from flowzo_ledger.database import FlowLedger
+    
+    with FlowLedger() as ledger:
+        for path in paths:
+            try:
+                merged = ledger.merge(path)
+            except ValueError as e:
+                console.print(f"[red]Error: {e}[/red]")
+                raise typer.Exit(1)
+            console.print(
+                f"[green]Merged {path}:[/green] {merged['sessions']} sessions, "
+                f"{merged['session_events']} events, {merged['flow_contexts']} flow contexts"
+            )
 
 
 @auth_app.command("github")
@@ -135,8 +497,11 @@ def auth_github(
     username: Annotated[str, typer.Option("--username", "-u", help="GitHub username")],
 ) -> None:
     """Store GitHub authentication token."""
+    from flowzo_integrations.github import GitHubIntegration
+    
     github = GitHubIntegration()
     github.store_token(token, username)
+    _run_in_daemon({"command": "reload"})  # Drop the daemon's cached credentials
     console.print(f"[green]GitHub token stored for user: {username}[/green]")
 
 
@@ -145,8 +510,11 @@ def auth_linear(
     api_key: Annotated[str, typer.Option("--api-key", "-k", help="Linear API key")],
 ) -> None:
     """Store Linear authentication API key."""
+    from flowzo_integrations.linear import LinearIntegration
+    
     linear = LinearIntegration()
     linear.store_api_key(api_key)
+    _run_in_daemon({"command": "reload"})  # Drop the daemon's cached credentials
     console.print("[green]Linear API key stored[/green]")
 
 
@@ -155,29 +523,35 @@ def auth_test(
     source: Annotated[str, typer.Option("--source", "-s", help="Integration to test (github/linear)")] = "github",
 ) -> None:
     """Test integration authentication."""
-    asyncio.run(_test_auth(source))
+    if not _run_in_daemon({"command": "auth_test", "source": source}):
+        import asyncio
+        
+        asyncio.run(_test_auth(source))
 
 
-async def _test_auth(source: str) -> None:
+async def _test_auth(source: str, out: Console = console, clients: Optional[Dict[str, Any]] = None) -> None:
     """Test authentication for specified integration."""
+    from flowzo_integrations.github import GitHubIntegration
+    from flowzo_integrations.linear import LinearIntegration
+    
     try:
         if source == "github":
-            github = GitHubIntegration()
+            github = clients["github"] if clients else GitHubIntegration()
             user_info = await github.test_connection()
-            console.print(f"[green]GitHub connection successful![/green]")
-            console.print(f"User: {user_info['login']} ({user_info['name']})")
+            out.print(f"[green]GitHub connection successful![/green]")
+            out.print(f"User: {user_info['login']} ({user_info['name']})")
         
         elif source == "linear":
-            linear = LinearIntegration()
+            linear = clients["linear"] if clients else LinearIntegration()
             user_info = await linear.test_connection()
-            console.print(f"[green]Linear connection successful![/green]")
-            console.print(f"User: {user_info['viewer']['name']} ({user_info['viewer']['email']})")
+            out.print(f"[green]Linear connection successful![/green]")
+            out.print(f"User: {user_info['viewer']['name']} ({user_info['viewer']['email']})")
         
         else:
-            console.print(f"[red]Unknown source: {source}[/red]")
+            out.print(f"[red]Unknown source: {source}[/red]")
     
     except Exception as e:
-        console.print(f"[red]Authentication test failed: {e}[/red]")
+        out.print(f"[red]Authentication test failed: {e}[/red]")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,298 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Shared timer-wheel scheduler for running many sessions on one event loop.
+
+``SessionEngine.start_session`` sleeps through each phase itself, which
+costs an asyncio task and loop timer per session. ``SessionScheduler``
+instead keeps every pending phase transition in one ``TimerWheel`` that a
+single driver task advances, so thousands of hosted sessions cost one
+wheel entry each.
+"""
+
+import asyncio
+import math
+from typing import Any, Callable, Dict, Optional
+
+from .clock import Clock, SystemClock
+from .session import EventRecord, SessionEngine, SessionState
+
+
+class Timer:
+    """Handle for a callback scheduled on a ``TimerWheel``."""
+
+    __slots__ = ("deadline", "callback", "args", "_tick", "_bucket", "_wheel")
+
+    def __init__(
+        self,
+        wheel: "TimerWheel",
+        deadline: float,
+        tick: int,
+        callback: Callable[..., Any],
+        args: tuple,
+    ) -> None:
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self._tick = tick
+        self._wheel = wheel
+        self._bucket: Optional[Dict["Timer", None]] = None
+
+    @property
+    def active(self) -> bool:
+        return self._bucket is not None
+
+    def cancel(self) -> bool:
+        """Unschedule the callback; returns False if it already ran or was cancelled."""
+        if self._bucket is None:
+            return False
+        del self._bucket[self]
+        self._bucket = None
+        self._wheel._pending -= 1
+        return True
+
+
+class TimerWheel:
+    """Hashed timer wheel with ``slots`` buckets of ``tick`` seconds each.
+
+    Scheduling and cancelling are O(1). Timers further out than one turn of
+    the wheel share a bucket with nearer ones and are skipped until their
+    own turn comes round. Callbacks run on the first tick at or after their
+    deadline, so they fire at most ``tick`` seconds late plus driver lag.
+
+    An exception from a callback goes to ``on_error(timer, exc)`` and the
+    batch carries on. Without ``on_error`` it propagates from ``advance``;
+    timers still due then run on the next call.
+    """
+
+    def __init__(
+        self,
+        tick: float = 0.01,
+        slots: int = 512,
+        start: float = 0.0,
+        on_error: Optional[Callable[[Timer, Exception], None]] = None,
+    ) -> None:
+        """Initialize an empty wheel whose first tick is at ``start``."""
+        if tick <= 0 or slots < 1:
+            raise ValueError("tick must be positive and slots at least 1")
+        self.tick = tick
+        self.start = start
+        self.on_error = on_error
+        self._buckets: list = [{} for _ in range(slots)]
+        self._current = 0  # Last tick processed
+        self._pending = 0
+
+    def __len__(self) -> int:
+        return self._pending
+
+    @property
+    def next_tick_time(self) -> float:
+        return self.start + (self._current + 1) * self.tick
+
+    def schedule_at(
+        self, deadline: float, callback: Callable[..., Any], *args: Any
+    ) -> Timer:
+        """Run ``callback(*args)`` once the wheel has advanced past ``deadline``."""
+        tick = max(self._current + 1, math.ceil((deadline - self.start) / self.tick))
+        timer = Timer(self, deadline, tick, callback, args)
+        timer._bucket = self._buckets[tick % len(self._buckets)]
+        timer._bucket[timer] = None
+        self._pending += 1
+        return timer
+
+    def advance(self, now: float) -> int:
+        """Run every timer due by ``now``; returns the number that ran."""
+        fired = 0
+        slots = len(self._buckets)
+        target = int((now - self.start) // self.tick)
+        while self._current < target:
+            if not self._pending:
+                # Nothing left to fire, so skip the empty ticks
+                self._current = target
+                break
+            self._current += 1
+            bucket = self._buckets[self._current % slots]
+            due = [timer for timer in bucket if timer._tick <= self._current]
+            for timer in due:
+                # A callback may have cancelled a later timer in this batch
+                if timer._bucket is not bucket:
+                    continue
+                del bucket[timer]
+                timer._bucket = None
+                self._pending -= 1
+                fired += 1
+                try:
+                    timer.callback(*timer.args)
+                except Exception as exc:
+                    if self.on_error is None:
+                        # Revisit this tick so the rest of its batch still runs
+                        self._current -= 1
+                        raise
+                    self.on_error(timer, exc)
+        return fired
+
+
+class SessionScheduler:
+    """Drive the phase transitions of many ``SessionEngine`` instances.
+
+    Use as an async context manager, then ``await scheduler.start(engine,
+    duration)`` to begin each session. Phase changes run as wheel callbacks
+    on the event loop; only the ledger writes at the start and end of a
+    session are awaited. A transition that raises fails that session's
+    future with the exception; other sessions keep running.
+
+    The wheel runs on ``clock``, the wall clock by default; every engine
+    must share it. With a ``VirtualClock`` the driver jumps from tick to
+    tick without waiting, so a coarser ``tick`` costs fewer jumps.
+    """
+
+    def __init__(
+        self, tick: float = 0.01, slots: int = 512, clock: Optional[Clock] = None
+    ) -> None:
+        """Initialize a scheduler whose transitions fire within ``tick`` seconds."""
+        self.tick = tick
+        self.slots = slots
+        self.clock = clock or SystemClock()
+        self.wheel: Optional[TimerWheel] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._driver: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # session_id -> (engine, pending phase timer, completion future)
+        self._sessions: Dict[str, tuple] = {}
+
+    async def __aenter__(self) -> "SessionScheduler":
+        self._loop = asyncio.get_running_loop()
+        self.wheel = TimerWheel(
+            self.tick, self.slots, start=self.clock.time(), on_error=self._on_error
+        )
+        self._wakeup = asyncio.Event()
+        self._driver = self._loop.create_task(self._drive())
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Stop the driver; sessions still running are left where they are."""
+        if self._driver is not None:
+            self._driver.cancel()
+            try:
+                await self._driver
+            except asyncio.CancelledError:
+                pass
+            self._driver = None
+        for _, timer, done in self._sessions.values():
+            timer.cancel()
+            done.cancel()
+        self._sessions.clear()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def _drive(self) -> None:
+        """Advance the wheel once per tick while any timer is pending."""
+        while True:
+            if not len(self.wheel):
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            delay = self.wheel.next_tick_time - self.clock.time()
+            if delay > 0:
+                await self.clock.sleep(delay)
+            self.wheel.advance(self.clock.time())
+
+    def _on_error(self, timer: Timer, exc: Exception) -> None:
+        """Fail the session whose transition raised."""
+        engine = timer.args[0]
+        _, _, done = self._sessions.pop(engine.session_id, (None, None, None))
+        if done is not None and not done.done():
+            done.set_exception(exc)
+
+    def _schedule(
+        self, engine: SessionEngine, step: Callable[[SessionEngine], None]
+    ) -> None:
+        """Run ``step`` when the engine's current phase ends."""
+        _, _, done = self._sessions[engine.session_id]
+        if not len(self.wheel):
+            # Catch up on ticks that passed while the wheel was idle
+            self.wheel.advance(self.clock.time())
+        timer = self.wheel.schedule_at(engine.phase_deadline, step, engine)
+        self._sessions[engine.session_id] = (engine, timer, done)
+        self._wakeup.set()
+
+    async def start(
+        self,
+        engine: SessionEngine,
+        duration: float,
+        priming_duration: float = 5,
+    ) -> "asyncio.Future[EventRecord]":
+        """Begin a session and return a future for its final event.
+
+        The future resolves to the ``session_completed`` event, or to the
+        ``session_aborted`` event if ``abort`` is called first.
+        """
+        self._check_schedulable(engine)
+        await engine._begin_session(duration, priming_duration)
+        return self.resume(engine)
+
+    def resume(self, engine: SessionEngine) -> "asyncio.Future[EventRecord]":
+        """Drive a session already under way, e.g. one from ``recover_sessions``."""
+        self._check_schedulable(engine)
+        steps = {
+            SessionState.PRIMING: self._on_primed,
+            SessionState.ACTIVE: self._on_focused,
+            SessionState.COOLDOWN: self._on_cooled,
+        }
+        if engine.state not in steps:
+            raise ValueError(f"Cannot resume session from state {engine.state}")
+        self._sessions[engine.session_id] = (engine, None, self._loop.create_future())
+        self._schedule(engine, steps[engine.state])
+        return self._sessions[engine.session_id][2]
+
+    def _check_schedulable(self, engine: SessionEngine) -> None:
+        if self._driver is None:
+            raise RuntimeError("SessionScheduler is not running")
+        if engine.session_id in self._sessions:
+            raise ValueError(f"Session {engine.session_id} is already scheduled")
+        # Every SystemClock reads the same wall clock
+        wall_clocks = type(engine.clock) is type(self.clock) is SystemClock
+        if engine.clock is not self.clock and not wall_clocks:
+            raise ValueError(
+                f"Session {engine.session_id} runs on a different clock "
+                "than the scheduler"
+            )
+
+    def abort(self, engine: SessionEngine) -> EventRecord:
+        """Cancel a scheduled session's next transition and abort it."""
+        if engine.session_id not in self._sessions:
+            raise ValueError(f"Session {engine.session_id} is not scheduled")
+        _, timer, done = self._sessions.pop(engine.session_id)
+        timer.cancel()
+        event = engine.abort_session()
+        if not done.done():
+            done.set_result(event)
+        return event
+
+    def _on_primed(self, engine: SessionEngine) -> None:
+        engine._enter_active()
+        self._schedule(engine, self._on_focused)
+
+    def _on_focused(self, engine: SessionEngine) -> None:
+        engine._enter_cooldown()
+        self._schedule(engine, self._on_cooled)
+
+    def _on_cooled(self, engine: SessionEngine) -> None:
+        _, _, done = self._sessions[engine.session_id]
+        event = engine._enter_idle()
+        del self._sessions[engine.session_id]
+        if not engine.ledger:
+            done.set_result(event)
+            return
+        task = self._loop.create_task(engine._close_session_record())
+
+        def closed(task: asyncio.Task) -> None:
+            if task.cancelled():
+                done.cancel()
+            elif task.exception() is not None:
+                done.set_exception(task.exception())
+            else:
+                done.set_result(event)
+
+        task.add_done_callback(closed)
@@ -0,0 +1,223 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""HTTP and WebSocket API over sessions and the ledger, for ``flowzo serve``.
+
+Sessions run on one ``SessionScheduler`` inside the server's event loop,
+and every ledger query goes through an ``AsyncFlowLedger``, so neither
+phase timers nor SQLite block request handling.
+
+- ``POST /sessions`` starts a session; ``GET /sessions`` lists running ones.
+- ``GET /sessions/{id}`` is a running session's status, or its ledger record.
+- ``POST /sessions/{id}/abort`` aborts a running session.
+- ``GET /sessions/{id}/stream`` (Server-Sent Events) and
+  ``/sessions/{id}/ws`` (WebSocket) push a running session's events.
+- ``GET /sessions/{id}/events`` and ``GET /ledger/sessions`` stream history
+  as NDJSON, reading the ledger a batch at a time.
+- ``GET /ledger/stats`` returns focus-time rollups.
+"""
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Query, WebSocket
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from flowzo_ledger.async_ledger import AsyncFlowLedger
+from flowzo_ledger.export import export_fields, ndjson_line
+from flowzo_ledger.rollups import GRANULARITIES
+
+from .scheduler import SessionScheduler
+from .session import EventRecord, SessionEngine, SessionState, event_json_line
+
+# Events after which a session emits nothing more
+END_EVENTS = frozenset({"session_completed", "session_aborted"})
+
+
+class StartRequest(BaseModel):
+    """Body of ``POST /sessions``."""
+
+    duration: float = Field(gt=0, description="Focus phase length in seconds")
+    priming_duration: float = Field(5, ge=0)
+    cooldown_duration: Optional[float] = Field(None, ge=0)
+    session_id: Optional[str] = None
+
+
+def _status(engine: SessionEngine) -> Dict[str, Any]:
+    return {**engine.get_status(), "running": engine.state != SessionState.IDLE}
+
+
+async def _ndjson(rows: AsyncIterator[Any], fields: List[str], chunk: int = 500) -> AsyncIterator[str]:
+    """Encode rows as NDJSON, sending ``chunk`` lines per write."""
+    lines = []
+    async for row in rows:
+        lines.append(ndjson_line(row, fields))
+        if len(lines) >= chunk:
+            yield "".join(lines)
+            lines.clear()
+    if lines:
+        yield "".join(lines)
+
+
+async def _live_events(engine: SessionEngine, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[EventRecord]]:
+    """Yield a session's events until it ends, and ``None`` after ``heartbeat`` quiet seconds."""
+    with engine.subscribe(maxsize=1000) as events:
+        while True:
+            try:
+                event = await asyncio.wait_for(events.__anext__(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            except StopAsyncIteration:
+                return
+            yield event
+            if event.event_type in END_EVENTS:
+                return
+
+
+def create_app(
+    ledger: Optional[AsyncFlowLedger] = None,
+    db_path: Optional[str] = None,
+    tick: float = 0.01,
+    heartbeat: float = 15.0,
+) -> FastAPI:
+    """Build the API.
+
+    Uses ``ledger`` if given; otherwise opens the ledger at ``db_path`` (or
+    the default one) on startup and closes it on shutdown. Sessions still
+    running at shutdown are aborted. SSE streams send a comment line after
+    ``heartbeat`` seconds without events so proxies keep them open.
+    """
+    sessions: Dict[str, SessionEngine] = {}
+    scheduler = SessionScheduler(tick=tick)
+    state: Dict[str, Any] = {"ledger": ledger}
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        if state["ledger"] is None:
+            state["ledger"] = AsyncFlowLedger(db_path, write_behind=True)
+        async with scheduler:
+            try:
+                yield
+            finally:
+                for engine in list(sessions.values()):
+                    if engine.state != SessionState.IDLE:
+                        scheduler.abort(engine)
+                    await engine.drain()
+        if ledger is None:
+            await state["ledger"].aclose()
+
+    app = FastAPI(title="FlowZo", lifespan=lifespan)
+
+    def running(session_id: str) -> SessionEngine:
+        engine = sessions.get(session_id)
+        if engine is None or engine.state == SessionState.IDLE:
+            raise HTTPException(404, f"No running session {session_id}")
+        return engine
+
+    @app.get("/health")
+    async def health() -> Dict[str, Any]:
+        return {"status": "ok", "sessions": len(sessions)}
+
+    @app.post("/sessions", status_code=201)
+    async def start_session(request: StartRequest) -> Dict[str, Any]:
+        session_id = request.session_id or f"session_{uuid.uuid4().hex[:12]}"
+        if session_id in sessions or await state["ledger"].get_session_record(session_id):
+            raise HTTPException(409, f"Session {session_id} already exists")
+        engine = SessionEngine(session_id, ledger=state["ledger"], cooldown_duration=request.cooldown_duration)
+        sessions[engine.session_id] = engine
+        try:
+            done = await scheduler.start(engine, request.duration, request.priming_duration)
+        except BaseException:
+            sessions.pop(engine.session_id, None)
+            raise
+        done.add_done_callback(lambda _: sessions.pop(engine.session_id, None))
+        return _status(engine)
+
+    @app.get("/sessions")
+    async def list_sessions() -> List[Dict[str, Any]]:
+        return [_status(engine) for engine in sessions.values()]
+
+    @app.get("/sessions/{session_id}")
+    async def get_session(session_id: str) -> Dict[str, Any]:
+        if session_id in sessions:
+            return _status(sessions[session_id])
+        record = await state["ledger"].get_session_record(session_id)
+        if record is None:
+            raise HTTPException(404, f"Unknown session {session_id}")
+        return {**{field: getattr(record, field) for field in export_fields("sessions")}, "running": False}
+
+    @app.post("/sessions/{session_id}/abort")
+    async def abort_session(session_id: str) -> Dict[str, Any]:
+        engine = running(session_id)
+        event = scheduler.abort(engine)
+        await engine.drain()
+        return event.model_dump()
+
+    @app.get("/sessions/{session_id}/events")
+    async def session_events(
+        session_id: str,
+        since: Optional[float] = Query(None, description="Only events at or after this epoch time"),
+    ) -> StreamingResponse:
+        rows = state["ledger"].iter_session_events(session_id, since, batch_size=1000, lightweight=True)
+        return StreamingResponse(_ndjson(rows, export_fields("events")), media_type="application/x-ndjson")
+
+    @app.get("/sessions/{session_id}/stream")
+    async def stream_session(session_id: str) -> StreamingResponse:
+        engine = running(session_id)
+
+        async def sse() -> AsyncIterator[bytes]:
+            async for event in _live_events(engine, heartbeat):
+                if event is None:
+                    yield b": keepalive\n\n"
+                else:
+                    yield b"event: " + event.event_type.encode() + b"\ndata: " + event_json_line(event) + b"\n"
+
+        return StreamingResponse(sse(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    @app.websocket("/sessions/{session_id}/ws")
+    async def session_socket(websocket: WebSocket, session_id: str) -> None:
+        await websocket.accept()
+        engine = sessions.get(session_id)
+        if engine is None or engine.state == SessionState.IDLE:
+            await websocket.close(code=4404, reason=f"No running session {session_id}")
+            return
+
+        async def send() -> None:
+            async for event in _live_events(engine):
+                await websocket.send_text(event_json_line(event).decode())
+
+        async def receive() -> None:
+            # Messages from the client are ignored; this notices it leaving
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+
+        sender = asyncio.create_task(send())
+        receiver = asyncio.create_task(receive())
+        try:
+            await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            sender.cancel()
+            receiver.cancel()
+        if sender.done() and not sender.cancelled() and sender.exception() is None:
+            await websocket.close()
+
+    @app.get("/ledger/sessions")
+    async def ledger_sessions(
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> StreamingResponse:
+        # Includes sessions already rolled into month segments
+        rows = state["ledger"].iter_table("sessions", since, until, batch_size=1000)
+        return StreamingResponse(_ndjson(rows, export_fields("sessions")), media_type="application/x-ndjson")
+
+    @app.get("/ledger/stats")
+    async def ledger_stats(start: date, end: date, by: str = "day") -> List[Dict[str, Any]]:
+        if by not in GRANULARITIES:
+            raise HTTPException(400, f"Unknown grouping: {by}; use one of {', '.join(GRANULARITIES)}")
+        rollups = await state["ledger"].get_focus_stats(start, end, by)
+        return [rollup.model_dump() for rollup in rollups]
+
+    return app
@@ -2,14 +2,28 @@
 """FlowZo Session Engine - Finite State Machine for focus sessions."""
 
 import asyncio
+import inspect
 import json
+import os
+import sys
 import time
+from collections import deque
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, Optional
+from itertools import islice
+from types import MappingProxyType
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Union
 
 from pydantic import BaseModel
 
+from .clock import Clock, SystemClock
+from .sinks import EventSink, LedgerSink, SinkPipeline
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 
 class SessionState(str, Enum):
     """Session states in the FSM."""
@@ -28,42 +42,340 @@ class SessionEvent(BaseModel):
     data: Dict[str, Any]
 
 
+# Shared by every event emitted without data
+_NO_DATA: Mapping[str, Any] = MappingProxyType({})
+
+# Recent events kept in memory by default when a ledger holds the full history
+LEDGER_MAX_EVENTS = 10_000
+
+
+class EventRecord:
+    """Compact in-memory session event with the same fields as ``SessionEvent``.
+
+    ``session_id`` and ``event_type`` are interned and ``state`` is an enum
+    member, so repeated values share one object across events. ``data`` is
+    copied, so later changes to the caller's dict do not rewrite history.
+    """
+
+    __slots__ = ("timestamp", "session_id", "state", "event_type", "data")
+
+    def __init__(
+        self,
+        timestamp: float,
+        session_id: str,
+        state: SessionState,
+        event_type: str,
+        data: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        self.timestamp = timestamp
+        self.session_id = session_id
+        self.state = state
+        self.event_type = sys.intern(event_type)
+        self.data = dict(data) if data else _NO_DATA
+
+    def model_dump(self) -> Dict[str, Any]:
+        """Return the event as a dict, like ``SessionEvent.model_dump``."""
+        return {
+            "timestamp": self.timestamp,
+            "session_id": self.session_id,
+            "state": self.state,
+            "event_type": self.event_type,
+            "data": dict(self.data),
+        }
+
+    def __repr__(self) -> str:
+        return f"EventRecord({self.event_type!r}, state={self.state.value!r}, timestamp={self.timestamp})"
+
+
+class EventBuffer:
+    """Ring buffer of the most recent events emitted by a session.
+
+    Holds at most ``max_events`` events (``None`` for no limit); older ones
+    are evicted as new ones arrive. Every event is written to the ledger
+    when it is emitted, so evicted events remain available there.
+    """
+
+    def __init__(self, max_events: Optional[int] = LEDGER_MAX_EVENTS) -> None:
+        """Initialize an empty buffer."""
+        if max_events is not None and max_events < 1:
+            raise ValueError("max_events must be at least 1")
+        self._events: "deque[EventRecord]" = deque(maxlen=max_events)
+        self.total = 0
+
+    @property
+    def max_events(self) -> Optional[int]:
+        return self._events.maxlen
+
+    @property
+    def spilled(self) -> int:
+        """Number of events evicted from memory."""
+        return self.total - len(self._events)
+
+    def append(self, event: EventRecord) -> None:
+        self._events.append(event)
+        self.total += 1
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self) -> Iterator[EventRecord]:
+        return iter(self._events)
+
+    def __getitem__(self, index: int) -> EventRecord:
+        return self._events[index]
+
+
+def event_json_line(event: EventRecord) -> bytes:
+    """Serialize an event as one compact JSON line, using orjson if installed."""
+    record = {
+        "timestamp": event.timestamp,
+        "session_id": event.session_id,
+        "state": event.state,
+        "event_type": event.event_type,
+        "data": event.data if event.data is not _NO_DATA else {},
+    }
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode() + b"\n"
+
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "error")
+
+
+class SubscriptionOverflow(RuntimeError):
+    """A subscriber with the ``error`` overflow policy fell behind."""
+
+
+class Subscription:
+    """Bounded queue of events delivered to one subscriber.
+
+    Iterate with ``async for``; iteration ends once the subscription is
+    closed and the queued events are drained. When ``maxsize`` events are
+    waiting, ``overflow`` decides what happens to the next one:
+    ``drop_oldest`` discards the oldest queued event, ``drop_newest``
+    discards the new event and ``error`` closes the subscription, so the
+    iterator raises ``SubscriptionOverflow`` after the queued events.
+    Dropped events are counted in ``dropped``. Emitting never waits for a
+    subscriber.
+    """
+
+    def __init__(
+        self,
+        engine: "SessionEngine",
+        event_types: Optional[Iterable[str]] = None,
+        maxsize: int = 100,
+        overflow: str = "drop_oldest",
+    ) -> None:
+        """Initialize a subscription; use ``SessionEngine.subscribe`` instead."""
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.event_types = frozenset(event_types) if event_types is not None else None
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self.closed = False
+        self._engine = engine
+        self._queue: "deque[EventRecord]" = deque()
+        self._overflowed = False
+        self._waiter: Optional[asyncio.Future] = None
+
+    def _publish(self, event: EventRecord) -> None:
+        if self.closed or (self.event_types is not None and event.event_type not in self.event_types):
+            return
+        if len(self._queue) >= self.maxsize:
+            self.dropped += 1
+            if self.overflow == "drop_newest":
+                return
+            if self.overflow == "error":
+                self._overflowed = True
+                self.close()
+                return
+            self._queue.popleft()
+        self._queue.append(event)
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def close(self) -> None:
+        """Stop receiving events; queued ones can still be read."""
+        if not self.closed:
+            self.closed = True
+            self._engine._subscribers.remove(self)
+            self._wake()
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> EventRecord:
+        while not self._queue:
+            if self._overflowed:
+                raise SubscriptionOverflow(f"Subscriber fell more than {self.maxsize} events behind")
+            if self.closed:
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._queue.popleft()
+
+
+async def stream_events_ndjson(events: Subscription, out: BinaryIO) -> int:
+    """Write each event from ``events`` to ``out`` as NDJSON until it closes.
+    
+    Lines are flushed as they are written so readers see events live.
+    Returns the number of events written.
+    """
+    written = 0
+    async for event in events:
+        out.write(event_json_line(event))
+        out.flush()
+        written += 1
+    return written
+
+
 class SessionEngine:
     """Finite State Machine for managing focus sessions."""
     
-    def __init__(self, session_id: Optional[str] = None, ledger=None) -> None:
-        """Initialize session engine."""
-        self.session_id = session_id or f"session_{int(time.time())}"
+    # Seconds spent in the cooldown phase
+    cooldown_duration: float = 3
+    
+    def __init__(
+        self,
+        session_id: Optional[str] = None,
+        ledger=None,
+        max_events: Union[int, None, str] = "auto",
+        clock: Optional[Clock] = None,
+        cooldown_duration: Optional[float] = None,
+    ) -> None:
+        """Initialize session engine.
+        
+        At most ``max_events`` recent events are kept in ``events``; see
+        ``EventBuffer``. By default that is ``LEDGER_MAX_EVENTS`` when a
+        ledger keeps every event, and no limit without one. Events reach
+        the ledger, and any other sink added with ``add_sink``, through
+        ``sinks``. Timestamps and phase sleeps use ``clock``, which defaults
+        to the wall clock; pass a ``VirtualClock`` to run sessions without
+        waiting.
+        """
+        self.clock = clock or SystemClock()
+        if cooldown_duration is not None:
+            self.cooldown_duration = cooldown_duration
+        self.session_id = sys.intern(session_id or f"session_{int(self.clock.time())}")
         self.state = SessionState.IDLE
         self.start_time: Optional[float] = None
         self.duration: int = 0
-        self.events: list[SessionEvent] = []
-        self.ledger = ledger  # Optional FlowLedger instance
+        # When the current phase ends, in epoch seconds
+        self.phase_deadline: Optional[float] = None
+        if max_events == "auto":
+            max_events = LEDGER_MAX_EVENTS if ledger else None
+        self.events = EventBuffer(max_events)
+        self.ledger = ledger  # Optional FlowLedger or AsyncFlowLedger instance
+        self.sinks = SinkPipeline()
+        if ledger:
+            self.sinks.add(LedgerSink(ledger))
+        # Checkpoint and record writes running on an AsyncFlowLedger
+        self._pending_writes: List[asyncio.Task] = []
+        self._subscribers: list[Subscription] = []
     
-    def _emit_event(self, event_type: str, data: Optional[Dict[str, Any]] = None) -> SessionEvent:
-        """Emit a session event."""
-        event = SessionEvent(
-            timestamp=time.time(),
-            session_id=self.session_id,
-            state=self.state,
-            event_type=event_type,
-            data=data or {},
-        )
-        self.events.append(event)
+    @property
+    def _ledger_is_async(self) -> bool:
+        return inspect.iscoroutinefunction(getattr(self.ledger, "log_session_event", None))
+    
+    async def _ledger_call(self, method: str, **kwargs: Any) -> Any:
+        """Call a ledger method, awaiting it when the ledger is asynchronous."""
+        result = getattr(self.ledger, method)(**kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+    
+    def _ledger_write(self, method: str, **kwargs: Any) -> None:
+        """Write to the ledger from synchronous code, as a task on an async ledger.
         
-        # Log to ledger if available
-        if self.ledger:
-            self.ledger.log_session_event(
-                session_id=self.session_id,
-                timestamp=event.timestamp,
-                event_type=event_type,
-                state=self.state,
-                data=data or {},
-            )
+        A failed write is raised by the ``drain`` waiting for it, or else
+        reported to the event loop's exception handler, e.g. after an
+        ``abort_session`` that nobody drains. Without a running loop the
+        write blocks, as it does on a synchronous ledger.
+        """
+        if not self._ledger_is_async:
+            getattr(self.ledger, method)(**kwargs)
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.ledger.submit(getattr(self.ledger.ledger, method), **kwargs).result()
+            return
+        task = loop.create_task(getattr(self.ledger, method)(**kwargs))
+        task.add_done_callback(self._ledger_write_done)
+        self._pending_writes.append(task)
+    
+    def _ledger_write_done(self, task: asyncio.Task) -> None:
+        if task not in self._pending_writes:
+            return  # A drain is waiting for it
+        self._pending_writes.remove(task)
+        if not task.cancelled() and task.exception() is not None:
+            task.get_loop().call_exception_handler({
+                "message": f"Ledger write for session {self.session_id} failed",
+                "exception": task.exception(),
+                "task": task,
+            })
+    
+    async def drain(self) -> None:
+        """Wait until emitted events reach every sink and queued ledger writes finish.
         
+        Surfaces any error a sink or ledger write hit.
+        """
+        await self.sinks.drain()
+        pending, self._pending_writes = self._pending_writes, []
+        # Cancelling the drain must not cancel the writes themselves
+        await asyncio.shield(asyncio.gather(*pending))
+    
+    def add_sink(self, sink: EventSink) -> EventSink:
+        """Feed events emitted from now on to ``sink``; see ``flowzo_cli.sinks``."""
+        return self.sinks.add(sink)
+    
+    def _emit_event(
+        self,
+        event_type: str,
+        data: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[float] = None,
+    ) -> EventRecord:
+        """Emit a session event."""
+        if timestamp is None:
+            timestamp = self.clock.time()
+        event = EventRecord(timestamp, self.session_id, self.state, event_type, data)
+        self.events.append(event)
+        for subscriber in tuple(self._subscribers):
+            subscriber._publish(event)
+        self.sinks.publish(event)
         return event
     
-    def transition_to(self, new_state: SessionState) -> SessionEvent:
+    def subscribe(
+        self,
+        event_types: Optional[Iterable[str]] = None,
+        maxsize: int = 100,
+        overflow: str = "drop_oldest",
+    ) -> Subscription:
+        """Receive events emitted from now on, optionally only of ``event_types``.
+        
+        See ``Subscription`` for the overflow policies. Close the
+        subscription, or use it as a context manager, when done.
+        """
+        subscription = Subscription(self, event_types, maxsize, overflow)
+        self._subscribers.append(subscription)
+        return subscription
+    
+    def transition_to(self, new_state: SessionState) -> EventRecord:
         """Transition to a new state."""
         old_state = self.state
         self.state = new_state
@@ -74,63 +386,159 @@ class SessionEngine:
     
     async def start_session(self, duration: int, priming_duration: int = 5) -> None:
         """Start a complete focus session."""
+        await self._begin_session(duration, priming_duration)
+        await self._run_phases()
+    
+    async def resume_session(self) -> None:
+        """Run a session restored by ``from_checkpoint`` to completion.
+        
+        Phases keep their original deadlines, so a phase that should already
+        have ended is left straight away.
+        """
+        if self.state == SessionState.IDLE:
+            raise ValueError("No session to resume")
+        await self._run_phases()
+    
+    async def _run_phases(self) -> None:
+        """Sleep through each remaining phase until the session completes."""
+        while self.state != SessionState.IDLE:
+            state = self.state
+            await self.clock.sleep(max(0.0, self.phase_deadline - self.clock.time()))
+            if self.state != state:
+                return  # Aborted meanwhile
+            if state == SessionState.PRIMING:
+                self._enter_active()
+            elif state == SessionState.ACTIVE:
+                self._enter_cooldown()
+            else:
+                await self._complete_session()
+    
+    # Phase steps, shared by start_session and SessionScheduler
+    
+    async def _begin_session(self, duration: int, priming_duration: float) -> None:
+        """Record the session and enter the priming phase."""
         if self.state != SessionState.IDLE:
             raise ValueError(f"Cannot start session from state {self.state}")
         
         self.duration = duration
-        self.start_time = time.time()
+        self.start_time = self.clock.time()
+        self.phase_deadline = self.start_time + priming_duration
         
         # Create session record in ledger
         if self.ledger:
-            self.ledger.create_session_record(
+            await self._ledger_call(
+                "create_session_record",
                 session_id=self.session_id,
                 start_time=datetime.fromtimestamp(self.start_time),
                 duration_seconds=duration,
                 state="priming",
             )
         
-        # Priming phase
         self.transition_to(SessionState.PRIMING)
         self._emit_event("session_started", {"duration": duration, "priming_duration": priming_duration})
-        
-        await asyncio.sleep(priming_duration)
-        
-        # Active phase
+        self._checkpoint()
+    
+    # Each phase's deadline follows on from the last, so late wakeups don't drift
+    
+    def _enter_active(self) -> None:
+        self.phase_deadline += self.duration
         self.transition_to(SessionState.ACTIVE)
-        self._emit_event("focus_phase_started", {"remaining_seconds": duration})
-        
-        await asyncio.sleep(duration)
-        
-        # Cooldown phase
+        self._emit_event("focus_phase_started", {"remaining_seconds": self.duration})
+        self._checkpoint()
+    
+    def _enter_cooldown(self) -> None:
+        self.phase_deadline += self.cooldown_duration
         self.transition_to(SessionState.COOLDOWN)
-        self._emit_event("cooldown_started", {"cooldown_duration": 3})
-        
-        await asyncio.sleep(3)
-        
-        # Back to idle
+        self._emit_event("cooldown_started", {"cooldown_duration": self.cooldown_duration})
+        self._checkpoint()
+    
+    def _enter_idle(self) -> EventRecord:
         self.transition_to(SessionState.IDLE)
-        self._emit_event("session_completed", {"total_duration": time.time() - self.start_time})
-        
-        # Update session record in ledger
+        return self._emit_event("session_completed", {"total_duration": self.clock.time() - self.start_time})
+    
+    async def _complete_session(self) -> EventRecord:
+        """Return to idle and close the session record."""
+        event = self._enter_idle()
+        await self._close_session_record()
+        return event
+    
+    async def _close_session_record(self) -> None:
+        """Mark the session completed in the ledger once its events are written."""
         if self.ledger:
-            self.ledger.update_session_record(
+            await self.drain()
+            await self._ledger_call(
+                "update_session_record",
                 session_id=self.session_id,
-                end_time=datetime.fromtimestamp(time.time()),
+                end_time=datetime.fromtimestamp(self.clock.time()),
                 state="completed",
             )
+            await self._ledger_call("delete_session_checkpoint", session_id=self.session_id)
     
-    def abort_session(self) -> SessionEvent:
+    def abort_session(self) -> EventRecord:
         """Abort the current session."""
         if self.state == SessionState.IDLE:
             raise ValueError("No active session to abort")
-        
-        event = self._emit_event("session_aborted", {"aborted_from_state": self.state})
+        return self._abort()
+    
+    def _abort(self, timestamp: Optional[float] = None, **data: Any) -> EventRecord:
+        event = self._emit_event("session_aborted", {"aborted_from_state": self.state, **data}, timestamp)
         self.state = SessionState.IDLE
+        if self.ledger:
+            self._ledger_write(
+                "update_session_record",
+                session_id=self.session_id,
+                end_time=datetime.fromtimestamp(event.timestamp),
+                state="aborted",
+            )
+            self._ledger_write("delete_session_checkpoint", session_id=self.session_id)
         return event
     
+    # Crash recovery
+    
+    def _checkpoint(self) -> None:
+        """Save the current phase so another process can recover the session."""
+        if self.ledger:
+            self._ledger_write(
+                "save_session_checkpoint",
+                session_id=self.session_id,
+                state=self.state,
+                start_time=self.start_time,
+                phase_deadline=self.phase_deadline,
+                duration_seconds=self.duration,
+                cooldown_seconds=self.cooldown_duration,
+                pid=os.getpid(),
+            )
+    
+    @classmethod
+    def from_checkpoint(cls, checkpoint: Any, ledger=None, **options: Any) -> "SessionEngine":
+        """Restore an engine mid-session from a ledger ``SessionCheckpoint``.
+        
+        The restored engine starts with an empty ``events`` buffer; earlier
+        events stay in the ledger.
+        """
+        engine = cls(checkpoint.session_id, ledger=ledger, **options)
+        engine.state = SessionState(checkpoint.state)
+        engine.start_time = checkpoint.start_time
+        engine.duration = checkpoint.duration_seconds
+        engine.cooldown_duration = checkpoint.cooldown_seconds
+        engine.phase_deadline = checkpoint.phase_deadline
+        return engine
+    
+    @property
+    def session_end(self) -> Optional[float]:
+        """When the running session will complete, in epoch seconds."""
+        if self.state == SessionState.IDLE:
+            return None
+        remaining = {
+            SessionState.PRIMING: self.duration + self.cooldown_duration,
+            SessionState.ACTIVE: self.cooldown_duration,
+            SessionState.COOLDOWN: 0,
+        }
+        return self.phase_deadline + remaining[self.state]
+    
     def get_status(self) -> Dict[str, Any]:
         """Get current session status."""
-        elapsed = time.time() - self.start_time if self.start_time else 0
+        elapsed = self.clock.time() - self.start_time if self.start_time else 0
         remaining = max(0, self.duration - elapsed) if self.duration else 0
         
         return {
@@ -141,6 +549,94 @@ class SessionEngine:
             "total_duration": self.duration,
         }
     
+    def _spilled_events(self) -> List[Dict[str, Any]]:
+        """Read the events evicted from ``events`` back from the ledger."""
+        spilled = self.events.spilled
+        if not spilled or not self.ledger:
+            return []
+        ledger = self.ledger.ledger if self._ledger_is_async else self.ledger
+        
+        def read() -> List[Any]:
+            # The ledger may also hold events from before a recovery
+            rows = deque(
+                ledger.iter_session_events(self.session_id, lightweight=True),
+                maxlen=self.events.total,
+            )
+            return list(islice(rows, spilled))
+        
+        rows = self.ledger.submit(read).result() if self._ledger_is_async else read()
+        return [
+            {
+                "timestamp": row.timestamp,
+                "session_id": row.session_id,
+                "state": row.state,
+                "event_type": row.event_type,
+                "data": row.data,
+            }
+            for row in rows
+        ]
+    
     def export_events_json(self) -> str:
-        """Export all events as JSON."""
-        return json.dumps([event.model_dump() for event in self.events], indent=2) 
\ No newline at end of file
+        """Export every event of the session as JSON.
+        
+        Events evicted from ``events`` are read back from the ledger, so
+        ``drain`` first to be sure they have reached it.
+        """
+        events = self._spilled_events() + [event.model_dump() for event in self.events]
+        return json.dumps(events, indent=2) 
+
+
+class RecoveredSessions(NamedTuple):
+    """Outcome of ``recover_sessions``."""
+    resumed: List[SessionEngine]  # restored engines, ready for resume_session()
+    closed: List[str]  # ids of sessions recorded as aborted
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    if pid is None:
+        return False
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows
+        import ctypes
+        
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists but belongs to another user
+    return True
+
+
+async def recover_sessions(ledger, resume: bool = True, now: Optional[float] = None) -> RecoveredSessions:
+    """Find sessions whose process died mid-session and resume or close them.
+    
+    Only checkpoints are read, so the cost does not depend on how many
+    events the sessions logged. Sessions that would still be running at
+    ``now`` are restored and claimed for this process when ``resume`` is
+    set. The rest are closed as aborted at the earlier of ``now`` and the
+    end of the phase they were in, since the process died before then.
+    """
+    now = time.time() if now is None else now
+    checkpoints = ledger.get_session_checkpoints()
+    if inspect.isawaitable(checkpoints):
+        checkpoints = await checkpoints
+    
+    recovered = RecoveredSessions([], [])
+    for checkpoint in checkpoints:
+        if checkpoint.pid == os.getpid() or _process_alive(checkpoint.pid):
+            continue
+        engine = SessionEngine.from_checkpoint(checkpoint, ledger=ledger)
+        if resume and engine.session_end > now:
+            engine._checkpoint()
+            recovered.resumed.append(engine)
+        else:
+            engine._abort(min(now, checkpoint.phase_deadline), recovered=True)
+            recovered.closed.append(engine.session_id)
+        await engine.drain()
+    return recovered
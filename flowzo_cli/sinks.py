@@ -0,0 +1,289 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Pluggable event sinks fed by a bounded, asynchronous pipeline.
+
+``SessionEngine._emit_event`` only appends to a ``SinkPipeline``; a
+dispatcher task copies events into one bounded queue per sink and each
+sink writes its queue in batches from its own task, so a slow sink never
+holds up state transitions. The ledger is one such sink.
+"""
+
+import asyncio
+import inspect
+from abc import ABC, abstractmethod
+from collections import deque
+from itertools import islice
+from typing import TYPE_CHECKING, Any, List, Optional
+
+if TYPE_CHECKING:
+    from .session import EventRecord
+
+SINK_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+def _stopped(task: Optional[asyncio.Task], loop: asyncio.AbstractEventLoop) -> bool:
+    """Whether ``task`` needs replacing to run on ``loop``.
+
+    Tasks exit once idle, but one can be left behind when its loop stops.
+    """
+    return task is None or task.done() or task.get_loop() is not loop
+
+
+class EventsDropped(RuntimeError):
+    """Events were dropped before reaching any sink, including the ledger."""
+
+    def __init__(self, count: int) -> None:
+        super().__init__(f"{count} events were dropped because the sink pipeline was full")
+        self.count = count
+
+
+class EventSink(ABC):
+    """Consumer of session events; subclasses implement ``write``.
+
+    Up to ``max_queue`` events wait for the sink and are handed to
+    ``write`` at most ``batch_size`` at a time. When the queue is full,
+    ``policy`` decides what happens to the next event: ``drop_oldest``
+    and ``drop_newest`` discard one, while ``block`` makes the pipeline
+    wait for room, holding later events for every sink in the pipeline's
+    own bounded queue.
+    """
+
+    def __init__(self, batch_size: int = 100, max_queue: int = 1000, policy: str = "drop_oldest") -> None:
+        """Initialize queueing options."""
+        if policy not in SINK_POLICIES:
+            raise ValueError(f"Unknown sink policy: {policy}")
+        if batch_size < 1 or max_queue < 1:
+            raise ValueError("batch_size and max_queue must be at least 1")
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.policy = policy
+
+    @abstractmethod
+    async def write(self, events: List["EventRecord"]) -> None:
+        """Write one batch of events, oldest first."""
+
+    def write_sync(self, events: List["EventRecord"]) -> bool:
+        """Write a batch when no event loop is running; False if unsupported."""
+        return False
+
+    async def close(self) -> None:
+        """Release resources once the pipeline is closed."""
+
+
+class LedgerSink(EventSink):
+    """Write events to a ``FlowLedger`` or ``AsyncFlowLedger`` in batches.
+
+    Uses the ``block`` policy, so a full queue holds events back rather
+    than dropping them. If the pipeline's own queue then fills up too,
+    events are lost for every sink and ``SinkPipeline.drain`` raises
+    ``EventsDropped``. A synchronous ``FlowLedger`` writes on the event
+    loop thread; use ``AsyncFlowLedger`` to keep that I/O off it. Without
+    a running loop, either ledger is written before ``publish`` returns.
+    """
+
+    def __init__(self, ledger: Any, batch_size: int = 100, max_queue: int = 10_000, policy: str = "block") -> None:
+        """Initialize a sink writing to ``ledger``."""
+        super().__init__(batch_size, max_queue, policy)
+        self.ledger = ledger
+
+    @staticmethod
+    def _rows(events: List["EventRecord"]) -> List[dict]:
+        return [
+            {
+                "session_id": event.session_id,
+                "timestamp": event.timestamp,
+                "event_type": event.event_type,
+                "state": event.state,
+                "data": dict(event.data),
+            }
+            for event in events
+        ]
+
+    async def write(self, events: List["EventRecord"]) -> None:
+        result = self.ledger.log_session_events(self._rows(events))
+        if inspect.isawaitable(result):
+            await result
+
+    def write_sync(self, events: List["EventRecord"]) -> bool:
+        if inspect.iscoroutinefunction(self.ledger.log_session_events):
+            # An AsyncFlowLedger, so write on its thread after queued calls
+            rows = self._rows(events)
+            self.ledger.submit(self.ledger.ledger.log_session_events, rows).result()
+        else:
+            self.ledger.log_session_events(self._rows(events))
+        return True
+
+
+class _SinkQueue:
+    """A sink's pending events and the task writing them."""
+
+    __slots__ = (
+        "sink", "events", "task", "writing", "dropped", "error", "space", "taken",
+    )
+
+    def __init__(self, sink: EventSink) -> None:
+        self.sink = sink
+        self.events: "deque[EventRecord]" = deque()
+        self.task: Optional[asyncio.Task] = None
+        self.writing = False
+        self.dropped = 0
+        self.error: Optional[BaseException] = None
+        # Resolved when a blocked dispatcher may retry
+        self.space: Optional[asyncio.Future] = None
+        # Leading pipeline events already written synchronously
+        self.taken = 0
+
+
+class SinkPipeline:
+    """Fan a session's events out to its sinks without ever waiting on them.
+
+    ``publish`` is synchronous and only appends to a queue of at most
+    ``max_pending`` events; when that is full because a ``block`` sink has
+    fallen behind, new events are counted in ``dropped`` instead and the
+    next ``drain`` raises ``EventsDropped``. Outside a running event loop,
+    sinks with ``write_sync`` are written before ``publish`` returns, and
+    a failed write raises; other sinks wait for the next ``publish`` or
+    ``drain`` inside a loop.
+    """
+
+    def __init__(self, max_pending: int = 10_000) -> None:
+        """Initialize a pipeline with no sinks."""
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._pending: "deque[EventRecord]" = deque()
+        self._queues: List[_SinkQueue] = []
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._changed: Optional[asyncio.Future] = None
+
+    def __len__(self) -> int:
+        return len(self._queues)
+
+    def add(self, sink: EventSink) -> EventSink:
+        """Send events published from now on to ``sink``."""
+        self._queues.append(_SinkQueue(sink))
+        return sink
+
+    def remove(self, sink: EventSink) -> None:
+        """Stop feeding ``sink``; events already queued for it are discarded."""
+        self._queues = [queue for queue in self._queues if queue.sink is not sink]
+
+    def stats(self) -> List[dict]:
+        """Queue depth and dropped-event counts per sink."""
+        return [
+            {"sink": type(queue.sink).__name__, "queued": len(queue.events), "dropped": queue.dropped}
+            for queue in self._queues
+        ]
+
+    def publish(self, event: "EventRecord") -> None:
+        if not self._queues:
+            return
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append(event)
+        self._start()
+
+    def _start(self) -> None:
+        """Start the dispatcher and sink writers that have work, if a loop is running."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_sync()
+            return
+        if self._pending and _stopped(self._dispatcher, loop):
+            self._dispatcher = loop.create_task(self._dispatch())
+        for queue in self._queues:
+            if queue.events and _stopped(queue.task, loop):
+                queue.writing = False
+                queue.task = loop.create_task(self._write(queue))
+
+    def _write_sync(self) -> None:
+        """Write pending events to the sinks that can without a loop."""
+        try:
+            for queue in self._queues:
+                if queue.taken == len(self._pending) and not queue.events:
+                    continue
+                # Events already offered to the sink go first
+                batch = [*queue.events, *islice(self._pending, queue.taken, None)]
+                if queue.sink.write_sync(batch):
+                    queue.events.clear()
+                    queue.taken = len(self._pending)
+        finally:
+            # Events every sink has taken no longer need dispatching
+            taken = min(queue.taken for queue in self._queues)
+            for _ in range(taken):
+                self._pending.popleft()
+            for queue in self._queues:
+                queue.taken -= taken
+
+    async def _dispatch(self) -> None:
+        while self._pending:
+            event = self._pending[0]
+            for queue in self._queues:
+                if queue.taken:
+                    queue.taken -= 1
+                    continue
+                sink = queue.sink
+                while sink.policy == "block" and len(queue.events) >= sink.max_queue:
+                    queue.space = asyncio.get_running_loop().create_future()
+                    await queue.space
+                self._offer(queue, event)
+            self._pending.popleft()
+        self._notify()
+
+    def _offer(self, queue: _SinkQueue, event: "EventRecord") -> None:
+        if len(queue.events) >= queue.sink.max_queue:
+            queue.dropped += 1
+            if queue.sink.policy == "drop_newest":
+                return
+            queue.events.popleft()
+        queue.events.append(event)
+        loop = asyncio.get_running_loop()
+        if _stopped(queue.task, loop):
+            queue.task = loop.create_task(self._write(queue))
+
+    async def _write(self, queue: _SinkQueue) -> None:
+        while queue.events:
+            size = min(queue.sink.batch_size, len(queue.events))
+            batch = [queue.events.popleft() for _ in range(size)]
+            if queue.space is not None and not queue.space.done():
+                queue.space.set_result(None)
+            queue.writing = True
+            try:
+                await queue.sink.write(batch)
+            except Exception as exc:  # noqa: BLE001 - surfaced by drain()
+                queue.error = queue.error or exc
+            finally:
+                queue.writing = False
+            self._notify()
+
+    def _notify(self) -> None:
+        if self._changed is not None and not self._changed.done():
+            self._changed.set_result(None)
+
+    def _busy(self) -> bool:
+        return bool(self._pending) or any(queue.events or queue.writing for queue in self._queues)
+
+    async def drain(self) -> None:
+        """Wait until every published event was written or dropped.
+
+        Re-raises the first error a sink hit since the last drain, or else
+        raises ``EventsDropped`` if the pipeline dropped events since then.
+        """
+        while self._busy():
+            self._start()
+            self._changed = asyncio.get_running_loop().create_future()
+            await self._changed
+        for queue in self._queues:
+            if queue.error is not None:
+                error, queue.error = queue.error, None
+                raise error
+        if self.dropped > self._reported_dropped:
+            count, self._reported_dropped = self.dropped - self._reported_dropped, self.dropped
+            raise EventsDropped(count)
+
+    async def close(self) -> None:
+        """Drain, then close every sink."""
+        await self.drain()
+        for queue in self._queues:
+            await queue.sink.close()
@@ -0,0 +1,87 @@
+// SPDX-License-Identifier: AGPL-3.0-only
+//! Client for the CLI's live state feed (`flowzo_cli/feed.py`).
+//!
+//! Frames are a 4-byte big-endian length followed by a JSON object: a
+//! `snapshot` with the full state or a `delta` with the changed fields.
+//! A gap in `seq` means frames were missed, so we ask for a new snapshot.
+
+use crate::SessionState;
+use serde_json::{json, Map, Value};
+use std::path::PathBuf;
+use std::time::Duration;
+use tokio::io::{AsyncReadExt, AsyncWriteExt};
+use tokio::net::UnixStream;
+
+const MAX_FRAME_BYTES: u32 = 1 << 20;
+
+pub fn socket_path() -> PathBuf {
+    if let Some(path) = std::env::var_os("FLOWZO_FEED_SOCKET").filter(|path| !path.is_empty()) {
+        return PathBuf::from(path);
+    }
+    let home = std::env::var_os("HOME").map(PathBuf::from).unwrap_or_default();
+    home.join(".flowzo").join("feed.sock")
+}
+
+async fn read_frame(stream: &mut UnixStream) -> std::io::Result<Value> {
+    let size = stream.read_u32().await?;
+    if size > MAX_FRAME_BYTES {
+        return Err(std::io::Error::new(std::io::ErrorKind::InvalidData, "frame too large"));
+    }
+    let mut payload = vec![0; size as usize];
+    stream.read_exact(&mut payload).await?;
+    Ok(serde_json::from_slice(&payload)?)
+}
+
+async fn write_frame(stream: &mut UnixStream, message: &Value) -> std::io::Result<()> {
+    let payload = serde_json::to_vec(message)?;
+    stream.write_u32(payload.len() as u32).await?;
+    stream.write_all(&payload).await
+}
+
+/// Read frames until the connection drops, calling `on_update` with each new state.
+async fn follow_once<F>(path: &PathBuf, on_update: &mut F) -> std::io::Result<()>
+where
+    F: FnMut(SessionState),
+{
+    let mut stream = UnixStream::connect(path).await?;
+    let mut state = Map::new();
+    let mut seq: Option<u64> = None;
+    loop {
+        let frame = read_frame(&mut stream).await?;
+        let frame_seq = frame["seq"].as_u64();
+        let fields = frame["state"].as_object().cloned().unwrap_or_default();
+        match frame["type"].as_str() {
+            Some("snapshot") => state = fields,
+            Some("delta") if seq.is_some() && frame_seq == seq.map(|seq| seq + 1) => state.extend(fields),
+            Some("delta") if seq.is_some() => {
+                // Missed a delta: ask for a snapshot and wait for it
+                write_frame(&mut stream, &json!({ "type": "resync" })).await?;
+                seq = None;
+                continue;
+            }
+            _ => continue,
+        }
+        seq = frame_seq;
+        if let Ok(session_state) = serde_json::from_value(Value::Object(state.clone())) {
+            on_update(session_state);
+        }
+    }
+}
+
+/// Follow the feed at `path` forever, reconnecting with backoff whenever
+/// the CLI is not serving it.
+pub async fn follow<F>(path: PathBuf, mut on_update: F)
+where
+    F: FnMut(SessionState) + Send + 'static,
+{
+    let mut backoff = Duration::from_millis(100);
+    loop {
+        let connected = std::time::Instant::now();
+        let _ = follow_once(&path, &mut on_update).await;
+        if connected.elapsed() > Duration::from_secs(5) {
+            backoff = Duration::from_millis(100);
+        }
+        tokio::time::sleep(backoff).await;
+        backoff = (backoff * 2).min(Duration::from_secs(5));
+    }
+}
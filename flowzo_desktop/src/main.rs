@@ -1,6 +1,9 @@
 // SPDX-License-Identifier: AGPL-3.0-only
 #![cfg_attr(not(debug_assertions), windows_subsystem = "windows")]
 
+#[cfg(unix)]
+mod feed;
+
 use serde::{Deserialize, Serialize};
 use std::sync::{Arc, Mutex};
 use tauri::{Manager, State};
@@ -112,6 +115,19 @@ fn main() {
                 })
                 .expect("Failed to register global shortcut");
             
+            // Mirror the live session state served by `flowzo start --feed`
+            #[cfg(unix)]
+            {
+                let app_handle = app.handle();
+                tauri::async_runtime::spawn(feed::follow(feed::socket_path(), move |new_state| {
+                    let shared = app_handle.state::<SharedSessionState>();
+                    if let Ok(mut session_state) = shared.lock() {
+                        *session_state = new_state.clone();
+                    }
+                    let _ = app_handle.emit_all("session_updated", new_state);
+                }));
+            }
+            
             Ok(())
         })
         .run(tauri::generate_context!())
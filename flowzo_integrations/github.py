@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 """GitHub integration for FlowZo."""
 
+import contextlib
 import json
 from typing import Any, Dict, List, Optional
 
@@ -27,9 +28,14 @@ class GitHubIntegration:
     SERVICE_NAME = "flowzo-github"
     BASE_URL = "https://api.github.com"
     
-    def __init__(self, username: Optional[str] = None) -> None:
-        """Initialize GitHub integration."""
+    def __init__(self, username: Optional[str] = None, client: Optional[httpx.AsyncClient] = None) -> None:
+        """Initialize GitHub integration.
+        
+        Requests reuse ``client`` when given, keeping its connections warm;
+        otherwise each request opens and closes its own.
+        """
         self.username = username
+        self.client = client
         self._token: Optional[str] = None
     
     def store_token(self, token: str, username: str) -> None:
@@ -73,7 +79,7 @@ class GitHubIntegration:
             "User-Agent": "FlowZo/0.1.0",
         }
         
-        async with httpx.AsyncClient() as client:
+        async with self._http_client() as client:
             response = await client.get(
                 f"{self.BASE_URL}/{endpoint}",
                 headers=headers,
@@ -82,6 +88,11 @@ class GitHubIntegration:
             response.raise_for_status()
             return response.json()
     
+    def _http_client(self) -> Any:
+        if self.client is not None:
+            return contextlib.nullcontext(self.client)
+        return httpx.AsyncClient()
+    
     async def get_assigned_issues(self, state: str = "open", limit: int = 10) -> List[GitHubIssue]:
         """Get issues assigned to the authenticated user."""
         if not self.username:
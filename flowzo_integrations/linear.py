@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 """Linear integration for FlowZo."""
 
+import contextlib
 from typing import Any, Dict, List, Optional
 
 import httpx
@@ -27,9 +28,14 @@ class LinearIntegration:
     SERVICE_NAME = "flowzo-linear"
     BASE_URL = "https://api.linear.app/graphql"
     
-    def __init__(self, api_key: Optional[str] = None) -> None:
-        """Initialize Linear integration."""
+    def __init__(self, api_key: Optional[str] = None, client: Optional[httpx.AsyncClient] = None) -> None:
+        """Initialize Linear integration.
+        
+        Requests reuse ``client`` when given, keeping its connections warm;
+        otherwise each request opens and closes its own.
+        """
         self._api_key = api_key
+        self.client = client
     
     def store_api_key(self, api_key: str, user_id: str = "default") -> None:
         """Store Linear API key securely."""
@@ -69,7 +75,7 @@ class LinearIntegration:
             "variables": variables or {},
         }
         
-        async with httpx.AsyncClient() as client:
+        async with self._http_client() as client:
             response = await client.post(
                 self.BASE_URL,
                 headers=headers,
@@ -83,6 +89,11 @@ class LinearIntegration:
             
             return data["data"]
     
+    def _http_client(self) -> Any:
+        if self.client is not None:
+            return contextlib.nullcontext(self.client)
+        return httpx.AsyncClient()
+    
     async def get_assigned_issues(self, limit: int = 10) -> List[LinearIssue]:
         """Get issues assigned to the authenticated user."""
         query = """
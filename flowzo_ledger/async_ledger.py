@@ -0,0 +1,250 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Asyncio front-end for FlowLedger backed by a dedicated writer thread."""
+
+import asyncio
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from .database import FlowLedger
+from .models import (
+    FlowContext,
+    FocusRollup,
+    ReplayKeyframe,
+    SessionCheckpoint,
+    SessionEvent,
+    SessionRecord,
+)
+from .retention import RetentionPolicy
+
+T = TypeVar("T")
+
+
+class AsyncFlowLedger:
+    """Awaitable equivalents of FlowLedger's methods.
+
+    ``replay`` is left out, as its ``SessionReplay`` queries ``ledger``
+    synchronously while it is read.
+    All calls run in submission order on a single worker thread that owns the
+    underlying ``FlowLedger``, so SQLite I/O never blocks the event loop and
+    write-behind state is only ever touched from one thread.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ledger: Optional[FlowLedger] = None, **options: Any) -> None:
+        """Wrap an existing ledger, or open one with FlowLedger ``options``."""
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="flowzo-ledger")
+        self.ledger = ledger or self._executor.submit(FlowLedger, db_path, **options).result()
+
+    async def __aenter__(self) -> "AsyncFlowLedger":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    def submit(self, method: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        """Queue a call on the writer thread without waiting for it."""
+        return self._executor.submit(method, *args, **kwargs)
+
+    async def _call(self, method: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+
+    async def _iterate(self, factory: Callable[[], Iterator[T]], batch_size: int) -> AsyncIterator[T]:
+        """Drive a FlowLedger generator on the writer thread, a batch at a time."""
+        iterator = await self._call(factory)
+        try:
+            while True:
+                batch = await self._call(lambda: list(islice(iterator, batch_size)))
+                for item in batch:
+                    yield item
+                if len(batch) < batch_size:
+                    return
+        finally:
+            await self._call(iterator.close)
+
+    async def flush(self) -> int:
+        return await self._call(self.ledger.flush)
+
+    async def aclose(self) -> None:
+        """Flush, close the ledger and stop the writer thread."""
+        await self._call(self.ledger.close)
+        self._executor.shutdown(wait=True)
+
+    def close(self) -> None:
+        """Synchronous close for callers outside an event loop."""
+        self.submit(self.ledger.close).result()
+        self._executor.shutdown(wait=True)
+
+    async def create_session_record(
+        self,
+        session_id: str,
+        start_time: datetime,
+        duration_seconds: int,
+        state: str = "idle",
+    ) -> SessionRecord:
+        return await self._call(
+            self.ledger.create_session_record, session_id, start_time, duration_seconds, state,
+        )
+
+    async def update_session_record(
+        self,
+        session_id: str,
+        end_time: Optional[datetime] = None,
+        state: Optional[str] = None,
+    ) -> Optional[SessionRecord]:
+        return await self._call(self.ledger.update_session_record, session_id, end_time, state)
+
+    async def save_session_checkpoint(
+        self,
+        session_id: str,
+        state: str,
+        start_time: float,
+        phase_deadline: float,
+        duration_seconds: float,
+        cooldown_seconds: float,
+        pid: Optional[int] = None,
+    ) -> SessionCheckpoint:
+        return await self._call(
+            self.ledger.save_session_checkpoint,
+            session_id, state, start_time, phase_deadline, duration_seconds, cooldown_seconds, pid,
+        )
+
+    async def delete_session_checkpoint(self, session_id: str) -> None:
+        await self._call(self.ledger.delete_session_checkpoint, session_id)
+
+    async def get_session_checkpoints(self) -> List[SessionCheckpoint]:
+        return await self._call(self.ledger.get_session_checkpoints)
+
+    async def log_session_event(
+        self,
+        session_id: str,
+        timestamp: float,
+        event_type: str,
+        state: str,
+        data: dict,
+    ) -> SessionEvent:
+        return await self._call(
+            self.ledger.log_session_event, session_id, timestamp, event_type, state, data,
+        )
+
+    async def log_session_events(self, events: List[Dict[str, Any]]) -> int:
+        return await self._call(self.ledger.log_session_events, events)
+
+    async def log_flow_context(
+        self,
+        session_id: str,
+        context_type: str,
+        timestamp: float,
+        data: dict,
+    ) -> FlowContext:
+        return await self._call(self.ledger.log_flow_context, session_id, context_type, timestamp, data)
+
+    async def get_session_events(self, session_id: str) -> List[SessionEvent]:
+        return await self._call(self.ledger.get_session_events, session_id)
+
+    async def iter_session_events(
+        self,
+        session_id: str,
+        since_ts: Optional[float] = None,
+        batch_size: int = 500,
+        lightweight: bool = False,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> AsyncIterator[Any]:
+        factory = functools.partial(
+            self.ledger.iter_session_events, session_id, since_ts, batch_size, lightweight, after,
+        )
+        async for row in self._iterate(factory, batch_size):
+            yield row
+
+    async def iter_flow_contexts(
+        self,
+        session_id: str,
+        since_ts: Optional[float] = None,
+        batch_size: int = 500,
+        lightweight: bool = False,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> AsyncIterator[Any]:
+        factory = functools.partial(
+            self.ledger.iter_flow_contexts, session_id, since_ts, batch_size, lightweight, after,
+        )
+        async for row in self._iterate(factory, batch_size):
+            yield row
+
+    async def iter_sessions(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        batch_size: int = 500,
+        lightweight: bool = False,
+    ) -> AsyncIterator[Any]:
+        factory = functools.partial(self.ledger.iter_sessions, since, until, batch_size, lightweight)
+        async for row in self._iterate(factory, batch_size):
+            yield row
+
+    async def iter_table(
+        self,
+        table: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Any]:
+        factory = functools.partial(
+            self.ledger.iter_table, table, start, end, batch_size,
+        )
+        async for row in self._iterate(factory, batch_size):
+            yield row
+
+    async def get_recent_sessions(self, limit: int = 10) -> List[SessionRecord]:
+        return await self._call(self.ledger.get_recent_sessions, limit)
+
+    async def get_session_record(self, session_id: str) -> Optional[SessionRecord]:
+        return await self._call(self.ledger.get_session_record, session_id)
+
+    async def cache_stats(self) -> Dict[str, int]:
+        return await self._call(self.ledger.cache_stats)
+
+    async def get_sessions_between(self, start: datetime, end: datetime) -> List[SessionRecord]:
+        return await self._call(self.ledger.get_sessions_between, start, end)
+
+    async def roll_segments(self, archive: bool = True, now: Optional[datetime] = None) -> Dict[str, int]:
+        return await self._call(self.ledger.roll_segments, archive, now)
+
+    async def merge(self, db_path: str) -> Dict[str, int]:
+        return await self._call(self.ledger.merge, db_path)
+
+    async def get_focus_stats(self, start: date, end: date, granularity: str = "day") -> List[FocusRollup]:
+        return await self._call(self.ledger.get_focus_stats, start, end, granularity)
+
+    async def rebuild_rollups(self) -> int:
+        return await self._call(self.ledger.rebuild_rollups)
+
+    async def compact_flow_contexts(
+        self,
+        policy: Optional[RetentionPolicy] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, int]:
+        return await self._call(self.ledger.compact_flow_contexts, policy, now)
+
+    async def vacuum(self) -> None:
+        await self._call(self.ledger.vacuum)
+
+    async def get_replay_keyframes(self, session_id: str) -> List[ReplayKeyframe]:
+        return await self._call(self.ledger.get_replay_keyframes, session_id)
+
+    async def save_replay_keyframes(
+        self, session_id: str, keyframes: Sequence[ReplayKeyframe],
+    ) -> None:
+        await self._call(self.ledger.save_replay_keyframes, session_id, keyframes)
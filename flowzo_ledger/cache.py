@@ -0,0 +1,91 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""In-process read cache for session records."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Returned by ``get_record`` on a miss; ``None`` is a cached "no such session"
+MISSING = object()
+
+
+class LedgerCache:
+    """Bounded LRU of session records plus the newest-sessions window.
+
+    Writes made through the owning ``FlowLedger`` update the cache
+    precisely. Entries also expire after ``ttl`` seconds so writes from
+    other processes show up; ``ttl=None`` trusts the cache indefinitely.
+    Cached records are shared between callers and must not be modified.
+    """
+
+    def __init__(self, max_records: int = 256, ttl: Optional[float] = 1.0) -> None:
+        """Initialize an empty cache."""
+        self.max_records = max_records
+        self.ttl = ttl
+        # session_id -> (record or None, expires_at)
+        self._records: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # (newest records, limit they were fetched with, expires_at)
+        self._recent: Optional[Tuple[List[Any], int, float]] = None
+        self._stats = {"record_hits": 0, "record_misses": 0, "recent_hits": 0, "recent_misses": 0}
+
+    def _expires_at(self) -> float:
+        return float("inf") if self.ttl is None else time.monotonic() + self.ttl
+
+    def _fresh(self, expires_at: float) -> bool:
+        return self.ttl is None or time.monotonic() < expires_at
+
+    def get_record(self, session_id: str) -> Any:
+        """Return the cached record (possibly ``None``) or ``MISSING``."""
+        entry = self._records.get(session_id)
+        if entry is not None and self._fresh(entry[1]):
+            self._records.move_to_end(session_id)
+            self._stats["record_hits"] += 1
+            return entry[0]
+        self._stats["record_misses"] += 1
+        return MISSING
+
+    def put_record(self, session_id: str, record: Any) -> None:
+        """Cache a record, or ``None`` for a session that does not exist."""
+        if self.max_records <= 0:
+            return
+        self._records[session_id] = (record, self._expires_at())
+        self._records.move_to_end(session_id)
+        while len(self._records) > self.max_records:
+            self._records.popitem(last=False)
+
+    def get_recent(self, limit: int) -> Optional[List[Any]]:
+        """Return the newest ``limit`` records if a large enough window is cached."""
+        if self._recent is not None:
+            records, window, expires_at = self._recent
+            if limit <= window and self._fresh(expires_at):
+                self._stats["recent_hits"] += 1
+                return records[:limit]
+        self._stats["recent_misses"] += 1
+        return None
+
+    def put_recent(self, limit: int, records: List[Any]) -> None:
+        if self.max_records <= 0:
+            return
+        self._recent = (records, limit, self._expires_at())
+
+    def record_created(self, record: Any) -> None:
+        """A new session shifts the recent window, so drop it."""
+        self.put_record(record.session_id, record)
+        self._recent = None
+
+    def record_updated(self, record: Any) -> None:
+        """Replace a changed record wherever it is cached."""
+        self.put_record(record.session_id, record)
+        if self._recent is not None:
+            records, window, expires_at = self._recent
+            patched = [record if cached.session_id == record.session_id else cached for cached in records]
+            self._recent = (patched, window, expires_at)
+
+    def clear(self) -> None:
+        """Drop everything, e.g. after sessions were moved or merged in bulk."""
+        self._records.clear()
+        self._recent = None
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and the number of cached records."""
+        return {**self._stats, "records": len(self._records)}
@@ -0,0 +1,114 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Binary payload codecs for FlowZo ledger storage."""
+
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Union
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional speedup
+    msgpack = None
+
+
+class PayloadCodec(ABC):
+    """Encode event/context payloads to bytes, identified by a one-byte tag."""
+
+    name = ""
+    tag = 0
+
+    @abstractmethod
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        """Encode a payload, without the tag byte."""
+
+    @abstractmethod
+    def decode(self, payload: bytes) -> Dict[str, Any]:
+        """Decode a payload written by ``encode``."""
+
+
+class JSONCodec(PayloadCodec):
+    """Compact JSON payloads; always available."""
+
+    name = "json"
+    tag = 1
+
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        return json.dumps(data, separators=(",", ":")).encode()
+
+    def decode(self, payload: bytes) -> Dict[str, Any]:
+        return json.loads(payload)
+
+
+class MsgpackCodec(PayloadCodec):
+    """MessagePack payloads; requires the optional ``msgpack`` package."""
+
+    name = "msgpack"
+    tag = 2
+
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def decode(self, payload: bytes) -> Dict[str, Any]:
+        return msgpack.unpackb(payload, raw=False)
+
+
+_codecs_by_tag: Dict[int, PayloadCodec] = {}
+_codecs_by_name: Dict[str, PayloadCodec] = {}
+_default_codec: Optional[PayloadCodec] = None
+
+
+def register_codec(codec: PayloadCodec) -> None:
+    """Register a codec so payloads carrying its tag can be decoded."""
+    if not 0 < codec.tag < 256:
+        raise ValueError(f"Codec tag must fit in one byte: {codec.tag}")
+    existing = _codecs_by_tag.get(codec.tag)
+    if existing is not None and existing.name != codec.name:
+        raise ValueError(f"Codec tag {codec.tag} already used by {existing.name}")
+    _codecs_by_tag[codec.tag] = codec
+    _codecs_by_name[codec.name] = codec
+
+
+def get_codec(name: str) -> PayloadCodec:
+    """Look up a registered codec by name."""
+    try:
+        return _codecs_by_name[name]
+    except KeyError:
+        raise ValueError(f"Unknown payload codec: {name}") from None
+
+
+def set_default_codec(name: str) -> None:
+    """Choose the codec used for newly written payloads."""
+    global _default_codec
+    _default_codec = get_codec(name)
+
+
+def get_default_codec() -> PayloadCodec:
+    """Return the codec used for newly written payloads."""
+    assert _default_codec is not None
+    return _default_codec
+
+
+def encode_payload(data: Dict[str, Any]) -> bytes:
+    """Encode a payload with the default codec, prefixed by its tag."""
+    codec = get_default_codec()
+    return bytes((codec.tag,)) + codec.encode(data)
+
+
+def decode_payload(value: Union[bytes, str]) -> Dict[str, Any]:
+    """Decode a tagged payload, or a legacy JSON string column value."""
+    if isinstance(value, str):
+        return json.loads(value)
+
+    try:
+        codec = _codecs_by_tag[value[0]]
+    except KeyError:
+        raise ValueError(f"Unknown payload codec tag: {value[0]}") from None
+    return codec.decode(value[1:])
+
+
+register_codec(JSONCodec())
+if msgpack is not None:
+    register_codec(MsgpackCodec())
+    set_default_codec("msgpack")
+else:
+    set_default_codec("json")
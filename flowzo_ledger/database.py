@@ -1,22 +1,141 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 """Database connection and ledger storage for FlowZo."""
 
-import json
 import os
-from datetime import datetime
+import time
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
-from sqlmodel import Session, SQLModel, create_engine, select
+from sqlalchemy import event, tuple_
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import make_transient
+from sqlalchemy.pool import QueuePool
+from sqlmodel import Session, create_engine, select
 
-from .models import FlowContext, SessionEvent, SessionRecord
+from .models import (
+    FlowContext,
+    FocusRollup,
+    ReplayKeyframe,
+    SessionCheckpoint,
+    SessionEvent,
+    SessionRecord,
+    SessionSegment,
+)
+from .cache import MISSING, LedgerCache
+from .merge import merge_ledger
+from .migrations import migrate
+from .replay import SessionReplay
+from .retention import RetentionPolicy, compact_flow_contexts, full_vacuum
+from .rollups import TERMINAL_EVENT_STATES, RollupAccumulator, event_days, last_event, rebuild_rollups
+from .segments import SegmentStore, month_key
+
+# Events that end a session always flush the write-behind queue
+FORCE_FLUSH_EVENT_TYPES = frozenset({"session_completed", "session_aborted"})
+
+# Columns yielded by the lightweight streaming APIs
+EVENT_COLUMNS = (
+    SessionEvent.id,
+    SessionEvent.session_id,
+    SessionEvent.timestamp,
+    SessionEvent.event_type,
+    SessionEvent.state,
+    SessionEvent.data,
+)
+CONTEXT_COLUMNS = (
+    FlowContext.id,
+    FlowContext.session_id,
+    FlowContext.timestamp,
+    FlowContext.context_type,
+    FlowContext.data,
+)
+SESSION_COLUMNS = (
+    SessionRecord.id,
+    SessionRecord.session_id,
+    SessionRecord.start_time,
+    SessionRecord.end_time,
+    SessionRecord.duration_seconds,
+    SessionRecord.state,
+)
+
+# Tables streamable with ``iter_table``: name -> (model, time column, columns)
+STREAM_TABLES: Dict[str, Tuple[Any, Any, Tuple[Any, ...]]] = {
+    "sessions": (SessionRecord, SessionRecord.start_time, SESSION_COLUMNS),
+    "events": (SessionEvent, SessionEvent.timestamp, EVENT_COLUMNS),
+    "contexts": (FlowContext, FlowContext.timestamp, CONTEXT_COLUMNS),
+}
+
+# Per-connection SQLite settings. WAL lets readers in other processes (CLI,
+# desktop overlay, background jobs) proceed while a single writer commits.
+SQLITE_PRAGMAS: Dict[str, Any] = {
+    # Only takes effect on a new file, so it must precede journal_mode
+    "auto_vacuum": "INCREMENTAL",
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,  # milliseconds
+    "mmap_size": 256 * 1024 * 1024,  # bytes
+    "cache_size": -16384,  # negative means KiB
+    "temp_store": "MEMORY",
+}
+
+
+def create_ledger_engine(
+    db_path: str,
+    pool_size: int = 5,
+    pragmas: Optional[Dict[str, Any]] = None,
+) -> Engine:
+    """Create a pooled SQLite engine tuned for concurrent ledger access."""
+    settings = {**SQLITE_PRAGMAS, **(pragmas or {})}
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=pool_size * 2,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": settings["busy_timeout"] / 1000,
+            # Lets read-only segments be attached with file: URIs
+            "uri": True,
+        },
+    )
+    
+    @event.listens_for(engine, "connect")
+    def _configure_connection(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in settings.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    
+    return engine
 
 
 class FlowLedger:
     """FlowZo ledger for storing session data."""
     
-    def __init__(self, db_path: Optional[str] = None) -> None:
-        """Initialize ledger with SQLite database."""
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        write_behind: bool = False,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        pool_size: int = 5,
+        pragmas: Optional[Dict[str, Any]] = None,
+        cache_size: int = 256,
+        cache_ttl: Optional[float] = 1.0,
+    ) -> None:
+        """Initialize ledger with SQLite database.
+        
+        With ``write_behind`` enabled, session events are queued in memory and
+        written in one transaction once ``batch_size`` events are pending or
+        ``flush_interval`` seconds have passed since the last flush.
+        Connections come from a pool of ``pool_size`` WAL-mode connections
+        configured by ``create_ledger_engine``; ``pragmas`` overrides
+        individual ``SQLITE_PRAGMAS`` entries.
+        
+        Session record reads go through a ``LedgerCache`` of ``cache_size``
+        records (0 disables it) whose entries expire after ``cache_ttl``
+        seconds so that writes from other processes become visible.
+        """
         if db_path is None:
             # Default to ~/.flowzo/ledger.db
             flowzo_dir = Path.home() / ".flowzo"
@@ -24,10 +143,57 @@ class FlowLedger:
             db_path = str(flowzo_dir / "ledger.db")
         
         self.db_path = db_path
-        self.engine = create_engine(f"sqlite:///{db_path}")
+        self.engine = create_ledger_engine(db_path, pool_size=pool_size, pragmas=pragmas)
+        
+        # One header read when the schema is current; DDL only when behind
+        migrate(self.engine)
+        
+        self.write_behind = write_behind
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending_events: List[SessionEvent] = []
+        self._last_flush = time.monotonic()
+        self.segments = SegmentStore(db_path)
+        self._rollups = RollupAccumulator()
+        self.cache = LedgerCache(max_records=cache_size, ttl=cache_ttl)
+    
+    def __enter__(self) -> "FlowLedger":
+        return self
+    
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+    
+    def flush(self) -> int:
+        """Write all queued session events in a single transaction.
         
-        # Create tables
-        SQLModel.metadata.create_all(self.engine)
+        The queue is only cleared once the commit succeeds, so a failed
+        flush (e.g. SQLITE_BUSY) is retried by the next one.
+        """
+        if not self._pending_events:
+            return 0
+        
+        events = list(self._pending_events)
+        try:
+            with Session(self.engine, expire_on_commit=False) as session:
+                session.add_all(events)
+                self._rollups.write(session)
+                session.commit()
+        except Exception:
+            # Rows keep the ids of the rolled-back insert; make them new again
+            for row in events:
+                make_transient(row)
+                row.id = None
+            raise
+        del self._pending_events[:len(events)]
+        self._rollups.clear()
+        
+        self._last_flush = time.monotonic()
+        return len(events)
+    
+    def close(self) -> None:
+        """Flush queued events and release database connections."""
+        self.flush()
+        self.engine.dispose()
     
     def create_session_record(
         self,
@@ -49,6 +215,7 @@ class FlowLedger:
             session.commit()
             session.refresh(record)
         
+        self.cache.record_created(record)
         return record
     
     def update_session_record(
@@ -72,9 +239,54 @@ class FlowLedger:
                 session.add(record)
                 session.commit()
                 session.refresh(record)
+                self.cache.record_updated(record)
             
             return record
     
+    def save_session_checkpoint(
+        self,
+        session_id: str,
+        state: str,
+        start_time: float,
+        phase_deadline: float,
+        duration_seconds: float,
+        cooldown_seconds: float,
+        pid: Optional[int] = None,
+    ) -> SessionCheckpoint:
+        """Replace a session's checkpoint with its current FSM state.
+        
+        Written immediately, even in write-behind mode, so a crash loses at
+        most the events queued since the last flush.
+        """
+        checkpoint = SessionCheckpoint(
+            session_id=session_id,
+            state=state,
+            start_time=start_time,
+            phase_deadline=phase_deadline,
+            duration_seconds=duration_seconds,
+            cooldown_seconds=cooldown_seconds,
+            pid=pid,
+            updated_at=time.time(),
+        )
+        with Session(self.engine, expire_on_commit=False) as session:
+            checkpoint = session.merge(checkpoint)
+            session.commit()
+        return checkpoint
+    
+    def delete_session_checkpoint(self, session_id: str) -> None:
+        """Drop the checkpoint of a session that finished cleanly."""
+        with Session(self.engine) as session:
+            session.execute(
+                SessionCheckpoint.__table__.delete().where(SessionCheckpoint.session_id == session_id),
+            )
+            session.commit()
+    
+    def get_session_checkpoints(self) -> List[SessionCheckpoint]:
+        """Get the checkpoints of every unfinished session, oldest first."""
+        statement = select(SessionCheckpoint).order_by(SessionCheckpoint.start_time)
+        with Session(self.engine) as session:
+            return list(session.exec(statement).all())
+    
     def log_session_event(
         self,
         session_id: str,
@@ -89,16 +301,97 @@ class FlowLedger:
             timestamp=timestamp,
             event_type=event_type,
             state=state,
-            data=json.dumps(data),
+            data=data,
         )
         
+        self._track_rollup(session_id, timestamp, event_type, state)
+        
+        if self.write_behind:
+            self._pending_events.append(event)
+            if (
+                len(self._pending_events) >= self.batch_size
+                or event_type in FORCE_FLUSH_EVENT_TYPES
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self.flush()
+            return event
+        
         with Session(self.engine) as session:
             session.add(event)
-            session.commit()
+            try:
+                self._rollups.write(session)
+                session.commit()
+            finally:
+                # An event that failed to commit is lost, and so is its delta
+                self._rollups.clear()
             session.refresh(event)
         
         return event
     
+    def log_session_events(self, events: Sequence[Dict[str, Any]]) -> int:
+        """Log a batch of session events in one transaction.
+        
+        Each item holds ``log_session_event``'s arguments. In write-behind
+        mode the batch joins the queue under the same flush rules.
+        """
+        rows = []
+        for values in events:
+            rows.append(SessionEvent(**values))
+            self._track_rollup(values["session_id"], values["timestamp"], values["event_type"], values["state"])
+        
+        if self.write_behind:
+            self._pending_events.extend(rows)
+            if (
+                len(self._pending_events) >= self.batch_size
+                or any(row.event_type in FORCE_FLUSH_EVENT_TYPES for row in rows)
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self.flush()
+            return len(rows)
+        
+        with Session(self.engine) as session:
+            session.add_all(rows)
+            try:
+                self._rollups.write(session)
+                session.commit()
+            finally:
+                self._rollups.clear()
+        return len(rows)
+    
+    def _track_rollup(self, session_id: str, timestamp: float, event_type: str, state: str) -> None:
+        """Feed an event to the rollup accumulator, resuming from stored events."""
+        if not self._rollups.has_cursor(session_id):
+            with Session(self.engine) as session:
+                previous = last_event(session, session_id)
+            if previous and previous[1] not in TERMINAL_EVENT_STATES:
+                self._rollups.seed(session_id, previous[0], previous[2])
+        self._rollups.add_event(session_id, timestamp, event_type, state)
+    
+    def get_focus_stats(self, start: date, end: date, granularity: str = "day") -> List[FocusRollup]:
+        """Get per-state rollups for periods starting in [start, end]."""
+        self.flush()
+        statement = (
+            select(FocusRollup)
+            .where(
+                FocusRollup.granularity == granularity,
+                FocusRollup.period_start >= start.isoformat(),
+                FocusRollup.period_start <= end.isoformat(),
+            )
+            .order_by(FocusRollup.period_start, FocusRollup.state)
+        )
+        with Session(self.engine) as session:
+            return list(session.exec(statement).all())
+    
+    def rebuild_rollups(self) -> int:
+        """Recompute focus rollups from raw session events, segments included."""
+        self.flush()
+        with self.engine.connect() as conn:
+            days = event_days(conn, self.segments)
+        with Session(self.engine) as session:
+            count = rebuild_rollups(session, days)
+            session.commit()
+        return count
+    
     def log_flow_context(
         self,
         session_id: str,
@@ -111,7 +404,7 @@ class FlowLedger:
             session_id=session_id,
             context_type=context_type,
             timestamp=timestamp,
-            data=json.dumps(data),
+            data=data,
         )
         
         with Session(self.engine) as session:
@@ -123,22 +416,314 @@ class FlowLedger:
     
     def get_session_events(self, session_id: str) -> List[SessionEvent]:
         """Get all events for a session."""
+        self.flush()
+        statement = (
+            select(SessionEvent)
+            .where(SessionEvent.session_id == session_id)
+            .order_by(SessionEvent.timestamp, SessionEvent.id)
+        )
         with Session(self.engine) as session:
-            statement = select(SessionEvent).where(SessionEvent.session_id == session_id)
-            return list(session.exec(statement).all())
+            events = list(session.exec(statement).all())
+        if events:
+            return events
+        return self._read_segment(session_id, statement) or []
+    
+    def iter_session_events(
+        self,
+        session_id: str,
+        since_ts: Optional[float] = None,
+        batch_size: int = 500,
+        lightweight: bool = False,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> Iterator[Any]:
+        """Stream a session's events in timestamp order.
+        
+        Rows are fetched ``batch_size`` at a time with keyset pagination, so
+        memory use does not grow with the number of events. ``lightweight``
+        yields plain rows (with attribute access) instead of SQLModel objects.
+        ``after`` resumes strictly after a ``(timestamp, id)`` position.
+        """
+        self.flush()
+        conditions = [SessionEvent.session_id == session_id]
+        if since_ts is not None:
+            conditions.append(SessionEvent.timestamp >= since_ts)
+        columns = EVENT_COLUMNS if lightweight else None
+        yield from self._iter_session_rows(SessionEvent, session_id, conditions, batch_size, columns, after)
+    
+    def iter_flow_contexts(
+        self,
+        session_id: str,
+        since_ts: Optional[float] = None,
+        batch_size: int = 500,
+        lightweight: bool = False,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> Iterator[Any]:
+        """Stream a session's flow contexts in timestamp order."""
+        conditions = [FlowContext.session_id == session_id]
+        if since_ts is not None:
+            conditions.append(FlowContext.timestamp >= since_ts)
+        columns = CONTEXT_COLUMNS if lightweight else None
+        yield from self._iter_session_rows(FlowContext, session_id, conditions, batch_size, columns, after)
+    
+    def _iter_session_rows(
+        self,
+        model: Any,
+        session_id: str,
+        conditions: Sequence[Any],
+        batch_size: int,
+        columns: Optional[Sequence[Any]],
+        after: Optional[Tuple[float, int]],
+    ) -> Iterator[Any]:
+        """Stream one session's rows from the hot database or its segment."""
+        with self.engine.connect() as conn:
+            with Session(bind=conn) as session:
+                segment = session.get(SessionSegment, session_id)
+            if segment is None:
+                yield from self._iter_keyset(
+                    model, model.timestamp, conditions, batch_size, columns, bind=conn, after=after,
+                )
+                return
+            
+            # Sessions rolled out of the hot database are streamed from their segment
+            with self.segments.attached(conn, [segment.month]) as schemas:
+                yield from self._iter_keyset(
+                    model,
+                    model.timestamp,
+                    conditions,
+                    batch_size,
+                    columns,
+                    bind=conn,
+                    schema=schemas[segment.month],
+                    after=after,
+                )
+    
+    def iter_sessions(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        batch_size: int = 500,
+        lightweight: bool = False,
+    ) -> Iterator[Any]:
+        """Stream session records in start-time order from the hot database."""
+        conditions = []
+        if since is not None:
+            conditions.append(SessionRecord.start_time >= since)
+        if until is not None:
+            conditions.append(SessionRecord.start_time < until)
+        columns = SESSION_COLUMNS if lightweight else None
+        yield from self._iter_keyset(SessionRecord, SessionRecord.start_time, conditions, batch_size, columns)
+    
+    def iter_table(
+        self,
+        table: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Any]:
+        """Stream lightweight rows of a ``STREAM_TABLES`` table from [start, end).
+        
+        Month segments are read first, oldest first and one attached file at
+        a time, followed by the hot database. Rows are in time order within
+        each file; memory use is bounded by ``batch_size``.
+        """
+        self.flush()
+        model, time_column, columns = STREAM_TABLES[table]
+        # Bounds are naive UTC. Events and contexts store epoch seconds, but
+        # sessions store naive local times, as SessionEngine writes them
+        epochs = [
+            bound.replace(tzinfo=timezone.utc).timestamp() if bound else None
+            for bound in (start, end)
+        ]
+        local = [
+            datetime.fromtimestamp(epoch) if epoch is not None else None
+            for epoch in epochs
+        ]
+        low, high = local if model is SessionRecord else epochs
+        conditions = []
+        if low is not None:
+            conditions.append(time_column >= low)
+        if high is not None:
+            conditions.append(time_column < high)
+        
+        # A segment only holds sessions that started in its (local) month
+        months = [
+            month for month in self.segments.months()
+            if local[1] is None or month <= month_key(local[1])
+        ]
+        with self.engine.connect() as conn:
+            for month in months:
+                with self.segments.attached(conn, [month]) as schemas:
+                    yield from self._iter_keyset(
+                        model, time_column, conditions, batch_size, columns,
+                        bind=conn, schema=schemas[month],
+                    )
+            yield from self._iter_keyset(model, time_column, conditions, batch_size, columns, bind=conn)
+    
+    def _iter_keyset(
+        self,
+        model: Any,
+        order_column: Any,
+        conditions: Sequence[Any],
+        batch_size: int,
+        columns: Optional[Sequence[Any]] = None,
+        bind: Optional[Union[Engine, Connection]] = None,
+        schema: Optional[str] = None,
+        after: Optional[tuple] = None,
+    ) -> Iterator[Any]:
+        """Yield rows ordered by ``(order_column, id)``, one page per query."""
+        last_key = after
+        while True:
+            statement = select(*columns) if columns else select(model)
+            statement = statement.where(*conditions)
+            if last_key is not None:
+                statement = statement.where(tuple_(order_column, model.id) > tuple_(*last_key))
+            statement = statement.order_by(order_column, model.id).limit(batch_size)
+            if schema:
+                statement = statement.execution_options(schema_translate_map={None: schema})
+            
+            with Session(bind=bind or self.engine) as session:
+                rows = session.exec(statement).all()
+            
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last_key = (getattr(rows[-1], order_column.key), rows[-1].id)
     
     def get_recent_sessions(self, limit: int = 10) -> List[SessionRecord]:
         """Get recent session records."""
+        records = self.cache.get_recent(limit)
+        if records is not None:
+            return records
+        
         with Session(self.engine) as session:
             statement = (
                 select(SessionRecord)
                 .order_by(SessionRecord.created_at.desc())
                 .limit(limit)
             )
-            return list(session.exec(statement).all())
+            records = list(session.exec(statement).all())
+        self.cache.put_recent(limit, records)
+        return records[:]
     
     def get_session_record(self, session_id: str) -> Optional[SessionRecord]:
         """Get a specific session record."""
+        record = self.cache.get_record(session_id)
+        if record is not MISSING:
+            return record
+        
+        statement = select(SessionRecord).where(SessionRecord.session_id == session_id)
         with Session(self.engine) as session:
-            statement = select(SessionRecord).where(SessionRecord.session_id == session_id)
-            return session.exec(statement).first() 
\ No newline at end of file
+            record = session.exec(statement).first()
+        if record is None:
+            records = self._read_segment(session_id, statement)
+            record = records[0] if records else None
+        self.cache.put_record(session_id, record)
+        return record
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Session cache hit/miss counters."""
+        return self.cache.stats()
+    
+    def get_sessions_between(self, start: datetime, end: datetime) -> List[SessionRecord]:
+        """Get sessions that started in [start, end), across segments."""
+        statement = select(SessionRecord).where(
+            SessionRecord.start_time >= start,
+            SessionRecord.start_time < end,
+        )
+        months = [
+            month for month in self.segments.months()
+            if month_key(start) <= month <= month_key(end)
+        ]
+        
+        with self.engine.connect() as conn:
+            with self.segments.attached(conn, months) as schemas:
+                with Session(bind=conn) as session:
+                    records = list(session.exec(statement).all())
+                # One session per segment: row ids are only unique within a file
+                for schema in schemas.values():
+                    segment_statement = statement.execution_options(
+                        schema_translate_map={None: schema},
+                    )
+                    with Session(bind=conn) as session:
+                        records.extend(session.exec(segment_statement).all())
+        
+        return sorted(records, key=lambda record: record.start_time)
+    
+    def roll_segments(self, archive: bool = True, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Move finished sessions from previous months into monthly segments.
+        
+        Returns the number of sessions moved per ``YYYY-MM`` month.
+        """
+        self.flush()
+        current_month = month_key(now or datetime.utcnow())
+        with self.engine.connect() as conn:
+            moved = self.segments.roll(conn, current_month, archive=archive)
+        # Rolled sessions now live in segments with different row ids
+        self.cache.clear()
+        return moved
+    
+    def merge(self, db_path: str) -> Dict[str, int]:
+        """Merge another ledger file (and its segments) into this one.
+        
+        Rows are de-duplicated on natural keys and repeat merges of the same
+        file only read rows added since the last one. Returns rows written
+        per table.
+        """
+        if Path(db_path).resolve() == Path(self.db_path).resolve():
+            raise ValueError("Cannot merge a ledger into itself")
+        self.flush()
+        with self.engine.connect() as conn:
+            merged = merge_ledger(conn, db_path)
+        self.cache.clear()
+        return merged
+    
+    def compact_flow_contexts(
+        self,
+        policy: Optional[RetentionPolicy] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, int]:
+        """Apply the flow context retention policy and shrink the file."""
+        return compact_flow_contexts(self.engine, policy or RetentionPolicy(), now)
+    
+    def vacuum(self) -> None:
+        """Rebuild the database file, enabling incremental vacuum on old files."""
+        self.flush()
+        full_vacuum(self.engine)
+    
+    def replay(self, session_id: str, keyframe_interval: int = 1000) -> SessionReplay:
+        """Open a time-indexed replay of a session's events and contexts."""
+        return SessionReplay(self, session_id, keyframe_interval=keyframe_interval)
+    
+    def get_replay_keyframes(self, session_id: str) -> List[ReplayKeyframe]:
+        """Get a session's stored replay keyframes in timeline order."""
+        statement = (
+            select(ReplayKeyframe)
+            .where(ReplayKeyframe.session_id == session_id)
+            .order_by(ReplayKeyframe.position)
+        )
+        with Session(self.engine) as session:
+            return list(session.exec(statement).all())
+    
+    def save_replay_keyframes(self, session_id: str, keyframes: Sequence[ReplayKeyframe]) -> None:
+        """Replace a session's replay keyframes."""
+        with Session(self.engine, expire_on_commit=False) as session:
+            session.execute(
+                ReplayKeyframe.__table__.delete().where(ReplayKeyframe.session_id == session_id),
+            )
+            session.add_all(keyframes)
+            session.commit()
+    
+    def _read_segment(self, session_id: str, statement: Any) -> Optional[List[Any]]:
+        """Run a query against the segment holding a rolled-out session."""
+        with self.engine.connect() as conn:
+            with Session(bind=conn) as session:
+                segment = session.get(SessionSegment, session_id)
+            if segment is None:
+                return None
+            
+            with self.segments.attached(conn, [segment.month]) as schemas:
+                with Session(bind=conn) as session:
+                    segment_statement = statement.execution_options(
+                        schema_translate_map={None: schemas[segment.month]},
+                    )
+                    return list(session.exec(segment_statement).all()) 
\ No newline at end of file
@@ -0,0 +1,110 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Streaming bulk export of ledger tables to NDJSON and CSV."""
+
+import csv
+import gzip
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, List, Optional, TextIO
+
+from .database import STREAM_TABLES, FlowLedger
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+
+def export_fields(table: str) -> List[str]:
+    """Exported column names of a table.
+
+    Row ids are local to each database file, so they are left out.
+    """
+    _, _, columns = STREAM_TABLES[table]
+    return [column.key for column in columns if column.key != "id"]
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def ndjson_line(row: Any, fields: List[str]) -> str:
+    """One row as a line of NDJSON, with datetimes in ISO format."""
+    values = {field: getattr(row, field) for field in fields}
+    return json.dumps(values, separators=(",", ":"), default=_json_default) + "\n"
+
+
+def write_rows(
+    rows: Iterable[Any],
+    fields: List[str],
+    out: TextIO,
+    fmt: str = "ndjson",
+    progress: Optional[Callable[[int], None]] = None,
+    progress_every: int = 1000,
+) -> int:
+    """Write rows one at a time, calling ``progress`` with the running count."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(fields)
+
+    count = 0
+    for row in rows:
+        if writer is None:
+            out.write(ndjson_line(row, fields))
+        else:
+            values = [getattr(row, field) for field in fields]
+            writer.writerow(
+                json.dumps(value, separators=(",", ":")) if isinstance(value, dict)
+                else value.isoformat() if isinstance(value, datetime)
+                else value
+                for value in values
+            )
+        count += 1
+        if progress and count % progress_every == 0:
+            progress(count)
+
+    if progress:
+        progress(count)
+    return count
+
+
+def export_table(
+    ledger: FlowLedger,
+    table: str,
+    out: TextIO,
+    fmt: str = "ndjson",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_size: int = 1000,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Stream one ledger table over [start, end) to ``out``.
+
+    Returns the number of rows written.
+    """
+    rows = ledger.iter_table(table, start, end, batch_size=batch_size)
+    return write_rows(rows, export_fields(table), out, fmt, progress, progress_every=batch_size)
+
+
+@contextmanager
+def open_export(path: Optional[str], compress: bool = False) -> Iterator[TextIO]:
+    """Open an export destination; ``None`` or ``-`` means stdout."""
+    if path in (None, "-"):
+        if compress:
+            with gzip.open(sys.stdout.buffer, "wt", newline="") as out:
+                yield out
+        else:
+            yield sys.stdout
+        return
+
+    if compress or path.endswith(".gz"):
+        with gzip.open(path, "wt", newline="", encoding="utf-8") as out:
+            yield out
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as out:
+            yield out
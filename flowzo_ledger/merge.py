@@ -0,0 +1,144 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Merge sessions, events and flow contexts from other ledger files."""
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from sqlalchemy.engine import Connection
+
+from .rollups import apply_rollup_delta, session_days
+from .segments import SEGMENT_TABLES, SegmentStore
+
+# Re-syncs re-read this much history before each watermark: write-behind
+# stamps created_at before a row commits, so rows can land slightly late.
+# Re-read rows are discarded by the natural-key check.
+RESYNC_OVERLAP_SECONDS = 300
+
+# Natural keys that identify the same event or context across ledgers
+NATURAL_KEYS = {
+    "session_events": ("session_id", "timestamp", "event_type"),
+    "flow_contexts": ("session_id", "timestamp", "context_type"),
+}
+
+# table -> (source column compared to the watermark, MergeWatermark field)
+WATERMARK_COLUMNS = {
+    "sessions": ("updated_at", "sessions_updated_at"),
+    "session_events": ("created_at", "events_created_at"),
+    "flow_contexts": ("created_at", "contexts_created_at"),
+}
+
+
+def source_files(db_path: str) -> List[Tuple[str, str]]:
+    """Return (watermark key, read-only URI) for a ledger and its segments."""
+    path = Path(db_path).resolve()
+    store = SegmentStore(str(path))
+    files = [(str(path), f"{path.as_uri()}?mode=ro")]
+    for month in store.months():
+        files.append((str(store.segment_path(month).resolve()), store.open_segment(month)))
+    return files
+
+
+def merge_file(conn: Connection, source: str, uri: str) -> Dict[str, int]:
+    """Merge one ledger or segment file in a single transaction.
+
+    Each table is copied with one ``INSERT ... SELECT`` that skips rows whose
+    natural key already exists, so de-duplication runs as an indexed
+    anti-join inside SQLite. Only rows changed since the file's watermark
+    are considered. Sessions already rolled into a segment here are left
+    alone. Rollups are adjusted by the change in each receiving session's
+    totals, so months already rolled into segments keep theirs. Returns
+    the number of rows written per table.
+    """
+    conn.exec_driver_sql("ATTACH DATABASE ? AS merge_source", (uri,))
+    try:
+        watermark = conn.exec_driver_sql(
+            "SELECT sessions_updated_at, events_created_at, contexts_created_at "
+            "FROM merge_watermarks WHERE source = ?",
+            (source,),
+        ).first()
+        marks = dict(zip(("sessions", "session_events", "flow_contexts"), watermark or (None,) * 3))
+
+        windows: Dict[str, Tuple[str, tuple]] = {}
+        for table, (column, _) in WATERMARK_COLUMNS.items():
+            # Bounded above so rows committed mid-merge wait for the next sync
+            high = conn.exec_driver_sql(f"SELECT MAX({column}) FROM merge_source.{table}").scalar()
+            low = marks[table]
+            clause, params = f"s.{column} <= ?", (high,)
+            if low is not None:
+                clause += f" AND s.{column} > datetime(?, '-{RESYNC_OVERLAP_SECONDS} seconds')"
+                params += (low,)
+            windows[table] = (clause, params)
+            marks[table] = high or low
+
+        # Replay keyframes of sessions receiving rows are rebuilt on next use
+        conn.exec_driver_sql(
+            "DELETE FROM main.replay_keyframes WHERE session_id IN ("
+            f"SELECT session_id FROM merge_source.session_events AS s WHERE {windows['session_events'][0]} "
+            f"UNION SELECT session_id FROM merge_source.flow_contexts AS s WHERE {windows['flow_contexts'][0]})",
+            windows["session_events"][1] + windows["flow_contexts"][1],
+        )
+
+        # Sessions receiving events; their rollup totals are recomputed
+        clause, params = windows["session_events"]
+        conn.exec_driver_sql(
+            "CREATE TEMP TABLE merge_sessions AS SELECT DISTINCT session_id "
+            f"FROM merge_source.session_events AS s WHERE {clause} "
+            "AND s.session_id NOT IN (SELECT session_id FROM main.session_segments)",
+            params,
+        )
+        merging = "SELECT session_id FROM temp.merge_sessions"
+        before = session_days(conn, merging)
+
+        merged: Dict[str, int] = {}
+        for table in SEGMENT_TABLES:
+            columns = ", ".join(column.name for column in table.columns if column.name != "id")
+            clause, params = windows[table.name]
+            statement = (
+                f"INSERT INTO main.{table.name} ({columns}) SELECT {columns} "
+                f"FROM merge_source.{table.name} AS s WHERE {clause} "
+                "AND s.session_id NOT IN (SELECT session_id FROM main.session_segments)"
+            )
+            if table.name == "sessions":
+                statement += (
+                    " ON CONFLICT (session_id) DO UPDATE SET "
+                    "end_time = excluded.end_time, state = excluded.state, "
+                    "updated_at = excluded.updated_at "
+                    "WHERE excluded.updated_at > sessions.updated_at"
+                )
+            else:
+                match = " AND ".join(f"m.{key} = s.{key}" for key in NATURAL_KEYS[table.name])
+                statement += f" AND NOT EXISTS (SELECT 1 FROM main.{table.name} AS m WHERE {match})"
+            merged[table.name] = conn.exec_driver_sql(statement, params).rowcount
+
+        if merged["session_events"]:
+            apply_rollup_delta(conn, before, session_days(conn, merging))
+
+        conn.exec_driver_sql(
+            "INSERT INTO merge_watermarks "
+            "(source, sessions_updated_at, events_created_at, contexts_created_at, merged_at) "
+            "VALUES (?, ?, ?, ?, datetime('now')) "
+            "ON CONFLICT (source) DO UPDATE SET "
+            "sessions_updated_at = excluded.sessions_updated_at, "
+            "events_created_at = excluded.events_created_at, "
+            "contexts_created_at = excluded.contexts_created_at, "
+            "merged_at = excluded.merged_at",
+            (source, marks["sessions"], marks["session_events"], marks["flow_contexts"]),
+        )
+        conn.commit()
+    finally:
+        conn.rollback()
+        conn.exec_driver_sql("DROP TABLE IF EXISTS temp.merge_sessions")
+        conn.exec_driver_sql("DETACH DATABASE merge_source")
+    return merged
+
+
+def merge_ledger(conn: Connection, db_path: str) -> Dict[str, int]:
+    """Merge another ledger, including its month segments, into ``conn``.
+
+    Returns total rows written per table.
+    """
+    totals = {table.name: 0 for table in SEGMENT_TABLES}
+    for source, uri in source_files(db_path):
+        for table, count in merge_file(conn, source, uri).items():
+            totals[table] += count
+    return totals
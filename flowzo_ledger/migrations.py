@@ -0,0 +1,161 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Versioned schema migrations for the hot ledger database.
+
+The schema version lives in SQLite's ``PRAGMA user_version`` header field,
+so opening an up-to-date ledger costs one pragma read and no DDL. Each
+migration brings the database from the previous version to its own and is
+written to be safe on databases that already have some of its objects,
+since earlier releases created tables with ``create_all`` on every open.
+"""
+
+from typing import Callable, Dict, Sequence
+
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session, SQLModel
+
+from .codec import JSONCodec
+from .models import (
+    CONTEXT_TYPE_NAMES,
+    EVENT_TYPE_NAMES,
+    SCHEMA_VERSION,
+    STATE_NAMES,
+    FlowContext,
+    FlowContextMinute,
+    FocusRollup,
+    MergeWatermark,
+    ReplayKeyframe,
+    SessionCheckpoint,
+    SessionEvent,
+    SessionRecord,
+    SessionSegment,
+)
+from .rollups import rebuild_rollups
+
+
+def _create_tables(conn: Connection, models: Sequence[type]) -> None:
+    """Create missing tables and their indexes."""
+    SQLModel.metadata.create_all(conn, tables=[model.__table__ for model in models])
+
+
+def _create_indexes(conn: Connection, models: Sequence[type]) -> None:
+    """Create indexes added to tables that may already exist."""
+    for model in models:
+        for index in model.__table__.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _coded(column: str, names: Sequence[str]) -> str:
+    """SQL mapping known text values of a coded column to their integer codes."""
+    cases = " ".join(f"WHEN '{name}' THEN {code}" for code, name in enumerate(names))
+    return f"CASE WHEN typeof({column}) = 'text' THEN CASE {column} {cases} ELSE {column} END ELSE {column} END"
+
+
+def _payload(column: str) -> str:
+    """SQL turning a JSON text payload into a tagged JSONCodec payload."""
+    # Tag byte + the JSON text is exactly what JSONCodec writes
+    return (
+        f"CASE WHEN typeof({column}) = 'text' "
+        f"THEN CAST(char({JSONCodec.tag}) || {column} AS BLOB) ELSE {column} END"
+    )
+
+
+def _compact_table(conn: Connection, model: type, coded: Dict[str, Sequence[str]]) -> None:
+    """Rewrite a table's legacy text enums and JSON payloads in compact form.
+
+    Tables created before the compact layout declare those columns as text,
+    whose affinity would turn integer codes back into strings, so they are
+    rebuilt with the current definition; otherwise rows are updated in place.
+    """
+    table = model.__table__.name
+    declared = {row[1]: row[2].upper() for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+    converted = {column: _coded(column, names) for column, names in coded.items()}
+    converted["data"] = _payload("data")
+
+    if all(declared.get(column) == "INTEGER" for column in coded):
+        assignments = ", ".join(f"{column} = {value}" for column, value in converted.items())
+        legacy = " OR ".join(f"typeof({column}) = 'text'" for column in converted)
+        conn.exec_driver_sql(f"UPDATE {table} SET {assignments} WHERE {legacy}")
+        return
+
+    indexes = conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,),
+    ).all()
+    for (index,) in indexes:
+        conn.exec_driver_sql(f"DROP INDEX {index}")
+    conn.exec_driver_sql(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+    _create_tables(conn, [model])
+    columns = [column.name for column in model.__table__.columns]
+    values = ", ".join(converted.get(column, column) for column in columns)
+    conn.exec_driver_sql(
+        f"INSERT INTO {table} ({', '.join(columns)}) SELECT {values} FROM {table}_legacy"
+    )
+    conn.exec_driver_sql(f"DROP TABLE {table}_legacy")
+
+
+def _v1_base_tables(conn: Connection) -> None:
+    _create_tables(conn, [SessionRecord, SessionEvent, FlowContext])
+
+
+def _v2_compact_rows(conn: Connection) -> None:
+    """Recode legacy text enums and JSON text payloads to the compact layout."""
+    _compact_table(conn, SessionEvent, {"event_type": EVENT_TYPE_NAMES, "state": STATE_NAMES})
+    _compact_table(conn, FlowContext, {"context_type": CONTEXT_TYPE_NAMES})
+
+
+def _v3_derived_tables(conn: Connection) -> None:
+    """Add segment, rollup, retention and replay tables plus composite indexes."""
+    has_rollups = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'focus_rollups'"
+    ).first()
+    _create_tables(conn, [SessionSegment, FocusRollup, FlowContextMinute, ReplayKeyframe])
+    _create_indexes(conn, [SessionEvent, FlowContext])
+    if not has_rollups:
+        # Rollups are maintained incrementally, so seed them from history once
+        with Session(bind=conn) as session:
+            rebuild_rollups(session)
+
+
+def _v4_merge_watermarks(conn: Connection) -> None:
+    _create_tables(conn, [MergeWatermark])
+
+
+def _v5_session_checkpoints(conn: Connection) -> None:
+    _create_tables(conn, [SessionCheckpoint])
+
+
+# Target version -> migration; keep in step with models.SCHEMA_VERSION
+MIGRATIONS: Dict[int, Callable[[Connection], None]] = {
+    1: _v1_base_tables,
+    2: _v2_compact_rows,
+    3: _v3_derived_tables,
+    4: _v4_merge_watermarks,
+    5: _v5_session_checkpoints,
+}
+
+
+def schema_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(engine: Engine) -> int:
+    """Bring the database up to ``SCHEMA_VERSION``.
+
+    Returns the number of migrations applied. Databases written by a newer
+    release are left untouched.
+    """
+    with engine.connect() as conn:
+        if schema_version(conn) >= SCHEMA_VERSION:
+            return 0
+
+        # Take the write lock first so concurrent openers migrate only once
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            current = schema_version(conn)
+            for version in range(current + 1, SCHEMA_VERSION + 1):
+                MIGRATIONS[version](conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {max(current, SCHEMA_VERSION)}")
+            conn.commit()
+        finally:
+            conn.rollback()
+        return max(0, SCHEMA_VERSION - current)
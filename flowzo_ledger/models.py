@@ -2,10 +2,88 @@
 """SQLModel models for FlowZo ledger storage."""
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
+from sqlalchemy import Column, Index, Integer, LargeBinary
+from sqlalchemy.types import TypeDecorator
 from sqlmodel import Field, SQLModel
 
+from .codec import decode_payload, encode_payload
+
+# Bumped whenever the on-disk layout changes
+SCHEMA_VERSION = 5
+
+# Integer codes are list positions: only ever append to these tuples
+STATE_NAMES = ("idle", "priming", "active", "cooldown", "completed", "aborted")
+EVENT_TYPE_NAMES = (
+    "state_transition",
+    "session_started",
+    "focus_phase_started",
+    "cooldown_started",
+    "session_completed",
+    "session_aborted",
+)
+CONTEXT_TYPE_NAMES = ("keystroke", "ide_state", "window_focus")
+
+
+class CodedString(TypeDecorator):
+    """String stored as a small integer code when it is a known value.
+
+    Unknown values are stored verbatim; SQLite's dynamic typing keeps codes
+    and legacy text rows side by side in the same column. Verbatim values
+    that would read back as codes (digit-only, e.g. ``"2"``) or that start
+    with ``escape`` are stored with an ``escape`` prefix.
+    """
+
+    impl = Integer
+    cache_ok = True
+    escape = "="
+
+    def __init__(self, names: Tuple[str, ...]) -> None:
+        super().__init__()
+        self.names = names
+        self._codes = {name: code for code, name in enumerate(names)}
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Any:
+        if value is None:
+            return None
+        code = self._codes.get(value)
+        if code is not None:
+            return code
+        value = str(value)
+        if value.isdigit() or value.startswith(self.escape):
+            return self.escape + value
+        return value
+
+    def process_result_value(self, value: Any, dialect: Any) -> Optional[str]:
+        if value is None:
+            return None
+        if isinstance(value, str) and value.startswith(self.escape):
+            return value[len(self.escape):]
+        # Codes come back as text from columns created with the old layout
+        if isinstance(value, str) and value.isdigit():
+            value = int(value)
+        if isinstance(value, int) and value < len(self.names):
+            return self.names[value]
+        return str(value)
+
+
+class Payload(TypeDecorator):
+    """Dict payload stored as codec-tagged bytes (see ``flowzo_ledger.codec``)."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Optional[bytes]:
+        if value is None or isinstance(value, bytes):
+            return value
+        return encode_payload(value)
+
+    def process_result_value(self, value: Any, dialect: Any) -> Optional[Dict[str, Any]]:
+        if value is None:
+            return None
+        return decode_payload(value)
+
 
 class SessionRecord(SQLModel, table=True):
     """Session record in the ledger."""
@@ -26,13 +104,14 @@ class SessionEvent(SQLModel, table=True):
     """Individual session event in the ledger."""
     
     __tablename__ = "session_events"
+    __table_args__ = (Index("ix_session_events_session_ts", "session_id", "timestamp"),)
     
     id: Optional[int] = Field(default=None, primary_key=True)
     session_id: str = Field(index=True)
     timestamp: float
-    event_type: str
-    state: str
-    data: str  # JSON string
+    event_type: str = Field(sa_column=Column(CodedString(EVENT_TYPE_NAMES), nullable=False))
+    state: str = Field(sa_column=Column(CodedString(STATE_NAMES), nullable=False))
+    data: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(Payload, nullable=False))
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -40,10 +119,91 @@ class FlowContext(SQLModel, table=True):
     """Flow context for session replay."""
     
     __tablename__ = "flow_contexts"
+    __table_args__ = (Index("ix_flow_contexts_session_ts", "session_id", "timestamp"),)
     
     id: Optional[int] = Field(default=None, primary_key=True)
     session_id: str = Field(index=True)
-    context_type: str  # "keystroke", "ide_state", "window_focus", etc.
+    # "keystroke", "ide_state", "window_focus", etc.
+    context_type: str = Field(sa_column=Column(CodedString(CONTEXT_TYPE_NAMES), nullable=False))
+    timestamp: float
+    data: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(Payload, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class SessionSegment(SQLModel, table=True):
+    """Monthly segment holding a session rolled out of the hot database."""
+    
+    __tablename__ = "session_segments"
+    
+    session_id: str = Field(primary_key=True)
+    month: str = Field(index=True)  # "YYYY-MM"
+
+
+class FocusRollup(SQLModel, table=True):
+    """Time spent per state, rolled up per UTC day or week."""
+    
+    __tablename__ = "focus_rollups"
+    
+    granularity: str = Field(primary_key=True)  # "day" or "week"
+    period_start: str = Field(primary_key=True)  # ISO date; weeks start on Monday
+    state: str = Field(primary_key=True)
+    seconds: float = 0.0
+    sessions: int = 0  # sessions that ended in this state ("completed"/"aborted")
+
+
+class FlowContextMinute(SQLModel, table=True):
+    """Per-minute flow context counts kept after raw contexts expire."""
+    
+    __tablename__ = "flow_context_minutes"
+    
+    session_id: str = Field(primary_key=True)
+    context_type: str = Field(
+        sa_column=Column(CodedString(CONTEXT_TYPE_NAMES), primary_key=True),
+    )
+    minute: int = Field(primary_key=True, index=True)  # epoch seconds, start of minute
+    count: int = 0
+
+
+class ReplayKeyframe(SQLModel, table=True):
+    """Snapshot of a session's replay state at a point in its timeline."""
+    
+    __tablename__ = "replay_keyframes"
+    
+    session_id: str = Field(primary_key=True)
+    position: int = Field(primary_key=True)  # timeline items applied so far
     timestamp: float
-    data: str  # JSON string
-    created_at: datetime = Field(default_factory=datetime.utcnow) 
\ No newline at end of file
+    # Keyset positions of the last event and context applied
+    event_timestamp: Optional[float] = None
+    event_id: Optional[int] = None
+    context_timestamp: Optional[float] = None
+    context_id: Optional[int] = None
+    snapshot: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(Payload, nullable=False))
+
+
+class MergeWatermark(SQLModel, table=True):
+    """How far another ledger file has been merged into this one."""
+    
+    __tablename__ = "merge_watermarks"
+    
+    source: str = Field(primary_key=True)  # resolved path of the merged file
+    # Latest created_at/updated_at values seen, as stored SQLite datetime text
+    sessions_updated_at: Optional[str] = None
+    events_created_at: Optional[str] = None
+    contexts_created_at: Optional[str] = None
+    merged_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class SessionCheckpoint(SQLModel, table=True):
+    """Latest FSM state of an unfinished session, for crash recovery."""
+    
+    __tablename__ = "session_checkpoints"
+    
+    session_id: str = Field(primary_key=True)
+    state: str = Field(sa_column=Column(CodedString(STATE_NAMES), nullable=False))
+    # Epoch seconds, as used by session events
+    start_time: float
+    phase_deadline: float  # when the current phase ends
+    duration_seconds: float
+    cooldown_seconds: float
+    pid: Optional[int] = None  # process running the session
+    updated_at: float
@@ -0,0 +1,176 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Time-indexed session replay over session events and flow contexts."""
+
+import asyncio
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .models import ReplayKeyframe
+
+EVENT = "event"
+CONTEXT = "context"
+
+KeysetPosition = Optional[Tuple[float, int]]
+
+
+class ReplayFrame(NamedTuple):
+    """One item of a session timeline."""
+
+    timestamp: float
+    kind: str  # EVENT or CONTEXT
+    type: str  # event_type or context_type
+    state: Optional[str]  # session state once this frame is applied
+    data: Dict[str, Any]
+    id: int
+
+
+class ReplaySnapshot(NamedTuple):
+    """Reconstructed session state at a point in time."""
+
+    timestamp: float
+    state: Optional[str]
+    contexts: Dict[str, Dict[str, Any]]  # latest payload per context type
+
+
+class _Cursor:
+    """Replay state while walking a timeline."""
+
+    def __init__(self, keyframe: Optional[ReplayKeyframe] = None) -> None:
+        self.position = 0
+        self.state: Optional[str] = None
+        self.contexts: Dict[str, Dict[str, Any]] = {}
+        self.event_after: KeysetPosition = None
+        self.context_after: KeysetPosition = None
+        if keyframe is not None:
+            self.position = keyframe.position
+            self.state = keyframe.snapshot["state"]
+            self.contexts = dict(keyframe.snapshot["contexts"])
+            if keyframe.event_id is not None:
+                self.event_after = (keyframe.event_timestamp, keyframe.event_id)
+            if keyframe.context_id is not None:
+                self.context_after = (keyframe.context_timestamp, keyframe.context_id)
+
+    def apply(self, frame: ReplayFrame) -> ReplayFrame:
+        self.position += 1
+        if frame.kind == EVENT:
+            self.state = frame.state
+            self.event_after = (frame.timestamp, frame.id)
+            return frame
+        self.contexts[frame.type] = frame.data
+        self.context_after = (frame.timestamp, frame.id)
+        return frame._replace(state=self.state)
+
+    def keyframe(self, session_id: str, timestamp: float) -> ReplayKeyframe:
+        return ReplayKeyframe(
+            session_id=session_id,
+            position=self.position,
+            timestamp=timestamp,
+            event_timestamp=self.event_after[0] if self.event_after else None,
+            event_id=self.event_after[1] if self.event_after else None,
+            context_timestamp=self.context_after[0] if self.context_after else None,
+            context_id=self.context_after[1] if self.context_after else None,
+            snapshot={"state": self.state, "contexts": dict(self.contexts)},
+        )
+
+
+class SessionReplay:
+    """Reconstructs and replays one session's timeline.
+
+    Keyframes snapshot the replay state every ``keyframe_interval`` timeline
+    items and are stored in the ledger, so seeking bisects them and then
+    applies at most one interval of rows instead of scanning the session.
+    """
+
+    def __init__(
+        self,
+        ledger: Any,
+        session_id: str,
+        keyframe_interval: int = 1000,
+        batch_size: int = 500,
+    ) -> None:
+        """Initialize replay for a session stored in ``ledger``."""
+        self.ledger = ledger
+        self.session_id = session_id
+        self.keyframe_interval = keyframe_interval
+        self.batch_size = batch_size
+        self._keyframes: Optional[List[ReplayKeyframe]] = None
+        self._keyframe_times: List[float] = []
+
+    def _frames(self, event_after: KeysetPosition = None, context_after: KeysetPosition = None) -> Iterator[ReplayFrame]:
+        """Merge events and contexts in (timestamp, events first, id) order."""
+        events = self.ledger.iter_session_events(
+            self.session_id, batch_size=self.batch_size, lightweight=True, after=event_after,
+        )
+        contexts = self.ledger.iter_flow_contexts(
+            self.session_id, batch_size=self.batch_size, lightweight=True, after=context_after,
+        )
+        try:
+            yield from heapq.merge(
+                (ReplayFrame(r.timestamp, EVENT, r.event_type, r.state, r.data, r.id) for r in events),
+                (ReplayFrame(r.timestamp, CONTEXT, r.context_type, None, r.data, r.id) for r in contexts),
+                key=lambda frame: (frame.timestamp, frame.kind != EVENT, frame.id),
+            )
+        finally:
+            # Release pooled connections when a caller stops early
+            events.close()
+            contexts.close()
+
+    def build_keyframes(self) -> int:
+        """Scan the session once and store a keyframe every interval."""
+        cursor = _Cursor()
+        keyframes = []
+        for frame in self._frames():
+            cursor.apply(frame)
+            if cursor.position % self.keyframe_interval == 0:
+                keyframes.append(cursor.keyframe(self.session_id, frame.timestamp))
+
+        self.ledger.save_replay_keyframes(self.session_id, keyframes)
+        self._set_keyframes(keyframes)
+        return len(keyframes)
+
+    def _set_keyframes(self, keyframes: List[ReplayKeyframe]) -> None:
+        self._keyframes = keyframes
+        self._keyframe_times = [keyframe.timestamp for keyframe in keyframes]
+
+    @property
+    def keyframes(self) -> List[ReplayKeyframe]:
+        """Stored keyframes, built on first use."""
+        if self._keyframes is None:
+            stored = self.ledger.get_replay_keyframes(self.session_id)
+            if stored:
+                self._set_keyframes(stored)
+            else:
+                self.build_keyframes()
+        return self._keyframes
+
+    def _seek_cursor(self, timestamp: float, inclusive: bool = True) -> _Cursor:
+        """Cursor positioned after every frame before (or at) ``timestamp``."""
+        keyframes = self.keyframes
+        index = (bisect_right if inclusive else bisect_left)(self._keyframe_times, timestamp) - 1
+        cursor = _Cursor(keyframes[index] if index >= 0 else None)
+        for frame in self._frames(cursor.event_after, cursor.context_after):
+            if frame.timestamp > timestamp or (frame.timestamp == timestamp and not inclusive):
+                break
+            cursor.apply(frame)
+        return cursor
+
+    def seek(self, timestamp: float) -> ReplaySnapshot:
+        """Reconstruct the session state at ``timestamp``."""
+        cursor = self._seek_cursor(timestamp)
+        return ReplaySnapshot(timestamp, cursor.state, cursor.contexts)
+
+    def timeline(self, start: Optional[float] = None) -> Iterator[ReplayFrame]:
+        """Stream frames from ``start`` (or the beginning) with state filled in."""
+        cursor = _Cursor() if start is None else self._seek_cursor(start, inclusive=False)
+        for frame in self._frames(cursor.event_after, cursor.context_after):
+            yield cursor.apply(frame)
+
+    async def play(self, start: Optional[float] = None, speed: float = 1.0) -> AsyncIterator[ReplayFrame]:
+        """Yield frames paced at ``speed`` times real time (``speed <= 0``: no pacing)."""
+        previous = start
+        for frame in self.timeline(start):
+            if speed > 0 and previous is not None and frame.timestamp > previous:
+                await asyncio.sleep((frame.timestamp - previous) / speed)
+            previous = frame.timestamp
+            yield frame
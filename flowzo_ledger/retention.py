@@ -0,0 +1,113 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Retention and downsampling for high-volume flow context data."""
+
+import time
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.engine import Engine
+
+SECONDS_PER_DAY = 86400
+
+
+class RetentionPolicy(BaseModel):
+    """How long flow contexts are kept at each resolution."""
+
+    raw_days: int = 7  # keep individual context rows this long
+    aggregate_days: int = 90  # then keep per-minute counts this long
+    batch_size: int = 5000  # rows per write transaction
+    vacuum_step_pages: int = 512  # pages released per incremental vacuum step
+
+
+def compact_flow_contexts(
+    engine: Engine,
+    policy: RetentionPolicy,
+    now: Optional[float] = None,
+) -> Dict[str, int]:
+    """Downsample old flow contexts, expire old aggregates and shrink the file.
+
+    Work is split into short transactions of ``policy.batch_size`` rows so
+    concurrent writers are only ever blocked for one batch. Replay keyframes
+    of sessions losing raw contexts are dropped, to be rebuilt on next use.
+    """
+    now = time.time() if now is None else now
+    raw_cutoff = now - policy.raw_days * SECONDS_PER_DAY
+    aggregate_cutoff = now - policy.aggregate_days * SECONDS_PER_DAY
+    batch = (
+        "SELECT id FROM flow_contexts WHERE timestamp < ? ORDER BY id LIMIT ?"
+    )
+
+    downsampled = 0
+    while True:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "INSERT INTO flow_context_minutes (session_id, context_type, minute, count) "
+                "SELECT session_id, context_type, CAST(timestamp / 60 AS INTEGER) * 60, COUNT(*) "
+                f"FROM flow_contexts WHERE id IN ({batch}) "
+                "GROUP BY 1, 2, 3 "
+                "ON CONFLICT (session_id, context_type, minute) "
+                "DO UPDATE SET count = count + excluded.count",
+                (raw_cutoff, policy.batch_size),
+            )
+            # Keyframes snapshot these rows and seek past their ids
+            conn.exec_driver_sql(
+                "DELETE FROM replay_keyframes WHERE session_id IN "
+                f"(SELECT session_id FROM flow_contexts WHERE id IN ({batch}))",
+                (raw_cutoff, policy.batch_size),
+            )
+            deleted = conn.exec_driver_sql(
+                f"DELETE FROM flow_contexts WHERE id IN ({batch})",
+                (raw_cutoff, policy.batch_size),
+            ).rowcount
+        downsampled += deleted
+        if deleted < policy.batch_size:
+            break
+
+    expired = 0
+    while True:
+        with engine.begin() as conn:
+            deleted = conn.exec_driver_sql(
+                "DELETE FROM flow_context_minutes WHERE rowid IN "
+                "(SELECT rowid FROM flow_context_minutes WHERE minute < ? LIMIT ?)",
+                (aggregate_cutoff, policy.batch_size),
+            ).rowcount
+        expired += deleted
+        if deleted < policy.batch_size:
+            break
+
+    return {
+        "downsampled": downsampled,
+        "expired_aggregates": expired,
+        "freed_pages": incremental_vacuum(engine, policy.vacuum_step_pages),
+    }
+
+
+def incremental_vacuum(engine: Engine, step_pages: int) -> int:
+    """Return free pages to the filesystem a few pages at a time.
+
+    Databases created before incremental auto-vacuum was enabled need one
+    full ``VACUUM`` (see ``full_vacuum``) before this can free anything.
+    """
+    freed = 0
+    with engine.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+            return 0
+        while True:
+            free_pages = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            if not free_pages:
+                break
+            step = min(step_pages, free_pages)
+            # executescript steps the pragma to completion; execute() frees one page
+            conn.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({step});")
+            freed += step
+    return freed
+
+
+def full_vacuum(engine: Engine) -> None:
+    """Rewrite the whole file once, switching it to incremental auto-vacuum.
+
+    This holds an exclusive lock for the duration; run it rarely.
+    """
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
@@ -0,0 +1,238 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Incrementally maintained focus-time rollups."""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, select
+
+from .models import EVENT_TYPE_NAMES, STATE_NAMES, CodedString, FocusRollup, SessionEvent
+from .segments import SegmentStore
+
+GRANULARITIES = ("day", "week")
+
+# Session outcomes counted in the ``sessions`` column, keyed by event type
+TERMINAL_EVENT_STATES = {"session_completed": "completed", "session_aborted": "aborted"}
+
+RollupKey = Tuple[str, str, str]  # (granularity, period_start, state)
+
+
+def period_starts(timestamp: float) -> Dict[str, str]:
+    """Return the UTC day and week (starting Monday) containing a timestamp."""
+    day = datetime.fromtimestamp(timestamp, tz=timezone.utc).date()
+    return {"day": day.isoformat(), "week": week_start(day).isoformat()}
+
+
+def week_start(day: date) -> date:
+    """Return the Monday of the week containing ``day``."""
+    return day - timedelta(days=day.weekday())
+
+
+class RollupAccumulator:
+    """Turns a stream of session events into per-period rollup deltas.
+
+    Time between two consecutive events of a session is credited to the
+    state of the earlier event, in the period where that interval started.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty cursors and deltas."""
+        # session_id -> (timestamp, state) of the session's latest event
+        self._cursors: Dict[str, Tuple[float, str]] = {}
+        self._seconds: Dict[RollupKey, float] = defaultdict(float)
+        self._sessions: Dict[RollupKey, int] = defaultdict(int)
+
+    def has_cursor(self, session_id: str) -> bool:
+        return session_id in self._cursors
+
+    def seed(self, session_id: str, timestamp: float, state: str) -> None:
+        """Resume a session whose earlier events were logged by another process."""
+        self._cursors[session_id] = (timestamp, state)
+
+    def add_event(self, session_id: str, timestamp: float, event_type: str, state: str) -> None:
+        """Account for one logged event."""
+        previous = self._cursors.get(session_id)
+        if previous is not None:
+            previous_ts, previous_state = previous
+            if timestamp > previous_ts:
+                for granularity, start in period_starts(previous_ts).items():
+                    self._seconds[(granularity, start, previous_state)] += timestamp - previous_ts
+
+        outcome = TERMINAL_EVENT_STATES.get(event_type)
+        if outcome is None:
+            # SessionEngine passes SessionState members
+            self._cursors[session_id] = (timestamp, getattr(state, "value", state))
+            return
+
+        self._cursors.pop(session_id, None)
+        for granularity, start in period_starts(timestamp).items():
+            self._sessions[(granularity, start, outcome)] += 1
+
+    def write(self, session: Session) -> None:
+        """Upsert accumulated deltas inside the caller's transaction.
+
+        Deltas are kept until ``clear()``, so a failed commit can be retried.
+        """
+        keys = self._seconds.keys() | self._sessions.keys()
+        if not keys:
+            return
+        rows = [
+            {
+                "granularity": granularity,
+                "period_start": start,
+                "state": state,
+                "seconds": self._seconds.get((granularity, start, state), 0.0),
+                "sessions": self._sessions.get((granularity, start, state), 0),
+            }
+            for granularity, start, state in keys
+        ]
+        upsert_rollups(session, rows, additive=True)
+
+    def clear(self) -> None:
+        """Forget deltas once the transaction that wrote them has committed."""
+        self._seconds.clear()
+        self._sessions.clear()
+
+
+def upsert_rollups(session: Union[Session, Connection], rows: List[Dict[str, object]], additive: bool) -> None:
+    """Insert rollup rows, adding to (or replacing) existing totals."""
+    # Chunked to stay well under SQLite's bound-parameter limit
+    for offset in range(0, len(rows), 500):
+        statement = insert(FocusRollup).values(rows[offset:offset + 500])
+        seconds = statement.excluded.seconds
+        sessions = statement.excluded.sessions
+        if additive:
+            seconds = FocusRollup.seconds + seconds
+            sessions = FocusRollup.sessions + sessions
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["granularity", "period_start", "state"],
+                set_={"seconds": seconds, "sessions": sessions},
+            ),
+        )
+
+
+def last_event(session: Session, session_id: str) -> Optional[Tuple[float, str, str]]:
+    """Return (timestamp, event_type, state) of a session's latest stored event."""
+    statement = (
+        select(SessionEvent.timestamp, SessionEvent.event_type, SessionEvent.state)
+        .where(SessionEvent.session_id == session_id)
+        .order_by(SessionEvent.timestamp.desc(), SessionEvent.id.desc())
+        .limit(1)
+    )
+    row = session.exec(statement).first()
+    return tuple(row) if row else None
+
+
+DayTotals = Dict[Tuple[str, str], List[float]]  # (day, state) -> [seconds, sessions]
+
+
+def _add_days(conn: Connection, days: DayTotals, schema: str = "main", sessions: Optional[str] = None) -> None:
+    """Add one database's per-day state seconds and outcome counts to ``days``.
+
+    ``sessions`` is an optional SQL subquery of the session ids to count.
+    """
+    decode_state = CodedString(STATE_NAMES).process_result_value
+    event_types = CodedString(EVENT_TYPE_NAMES)
+    encode_event_type = event_types.process_bind_param
+    terminal_codes = [encode_event_type(event_type, None) for event_type in TERMINAL_EVENT_STATES]
+    placeholders = ", ".join("?" for _ in terminal_codes)
+    only = f"session_id IN ({sessions})" if sessions else "1"
+
+    intervals = conn.exec_driver_sql(
+        "SELECT date(prev_ts, 'unixepoch') AS day, prev_state, SUM(timestamp - prev_ts) "
+        "FROM (SELECT timestamp, "
+        "  LAG(timestamp) OVER w AS prev_ts, "
+        "  LAG(state) OVER w AS prev_state, "
+        "  LAG(event_type) OVER w AS prev_type "
+        f"  FROM {schema}.session_events WHERE {only} "
+        "  WINDOW w AS (PARTITION BY session_id ORDER BY timestamp, id)) "
+        f"WHERE prev_ts IS NOT NULL AND timestamp > prev_ts AND prev_type NOT IN ({placeholders}) "
+        "GROUP BY day, prev_state",
+        tuple(terminal_codes),
+    )
+    for day, raw_state, seconds in intervals:
+        days[(day, decode_state(raw_state, None))][0] += seconds
+
+    outcomes = conn.exec_driver_sql(
+        "SELECT date(timestamp, 'unixepoch') AS day, event_type, COUNT(*) "
+        f"FROM {schema}.session_events WHERE {only} AND event_type IN ({placeholders}) "
+        "GROUP BY day, event_type",
+        tuple(terminal_codes),
+    )
+    for day, code, count in outcomes:
+        outcome = TERMINAL_EVENT_STATES[event_types.process_result_value(code, None)]
+        days[(day, outcome)][1] += count
+
+
+def _rollup_rows(days: DayTotals) -> List[Dict[str, object]]:
+    """Turn per-day totals into day and week rollup rows."""
+    totals: Dict[RollupKey, List[float]] = defaultdict(lambda: [0.0, 0])
+    for (day, state), (seconds, sessions) in days.items():
+        week = week_start(date.fromisoformat(day)).isoformat()
+        for key in (("day", day, state), ("week", week, state)):
+            totals[key][0] += seconds
+            totals[key][1] += sessions
+    return [
+        {
+            "granularity": granularity,
+            "period_start": start,
+            "state": state,
+            "seconds": seconds,
+            "sessions": sessions,
+        }
+        for (granularity, start, state), (seconds, sessions) in totals.items()
+    ]
+
+
+def event_days(conn: Connection, segments: Optional[SegmentStore] = None) -> DayTotals:
+    """Per-day totals of every event in the database, and in ``segments``.
+
+    Segments are attached one at a time; ``conn`` must not be inside a
+    transaction the caller still needs.
+    """
+    days: DayTotals = defaultdict(lambda: [0.0, 0])
+    _add_days(conn, days)
+    for month in segments.months() if segments is not None else []:
+        with segments.attached(conn, [month]) as schemas:
+            _add_days(conn, days, schemas[month])
+    return days
+
+
+def rebuild_rollups(session: Session, days: Optional[DayTotals] = None) -> int:
+    """Replace every rollup row with ones recomputed from raw events in bulk.
+
+    Uses ``days`` from ``event_days`` if given, otherwise the events in the
+    session's own database. Returns the number of rollup rows written.
+    """
+    if days is None:
+        days = defaultdict(lambda: [0.0, 0])
+        _add_days(session.connection(), days)
+
+    session.execute(FocusRollup.__table__.delete())
+    rows = _rollup_rows(days)
+    upsert_rollups(session, rows, additive=False)
+    return len(rows)
+
+
+def session_days(conn: Connection, sessions: str) -> DayTotals:
+    """Per-day totals of the sessions selected by the SQL subquery ``sessions``."""
+    days: DayTotals = defaultdict(lambda: [0.0, 0])
+    _add_days(conn, days, sessions=sessions)
+    return days
+
+
+def apply_rollup_delta(conn: Connection, before: DayTotals, after: DayTotals) -> None:
+    """Add the change from ``before`` to ``after`` (see ``session_days``) to the rollups."""
+    delta: DayTotals = defaultdict(lambda: [0.0, 0])
+    for key, (seconds, sessions) in after.items():
+        delta[key][0] += seconds
+        delta[key][1] += sessions
+    for key, (seconds, sessions) in before.items():
+        delta[key][0] -= seconds
+        delta[key][1] -= sessions
+    rows = [row for row in _rollup_rows(delta) if row["seconds"] or row["sessions"]]
+    upsert_rollups(conn, rows, additive=True)
@@ -0,0 +1,191 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Per-month ledger segments with compressed cold storage."""
+
+import gzip
+import shutil
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel, create_engine
+
+from .models import FlowContext, SessionEvent, SessionRecord
+
+# Tables whose rows move out of the hot database into segments
+SEGMENT_TABLES = (SessionRecord.__table__, SessionEvent.__table__, FlowContext.__table__)
+
+# Sessions are only rolled once they can no longer receive events
+FINISHED_STATES = ("completed", "aborted")
+
+
+def month_key(moment: datetime) -> str:
+    """Return the ``YYYY-MM`` segment key for a datetime."""
+    return moment.strftime("%Y-%m")
+
+
+class SegmentStore:
+    """Monthly segment files stored next to the hot ledger database.
+
+    Closed months of ``ledger.db`` live in ``ledger.segments/ledger-YYYY-MM.db``,
+    so ledgers sharing a directory keep separate segments; archived months are
+    gzip-compressed to ``ledger-YYYY-MM.db.gz`` and decompressed into a
+    read-only cache copy whenever a query needs them.
+    """
+
+    def __init__(self, db_path: str, segments_dir: Optional[str] = None) -> None:
+        """Initialize segment store for the given hot database."""
+        if segments_dir:
+            self.directory = Path(segments_dir)
+        else:
+            path = Path(db_path)
+            self.directory = path.with_name(f"{path.stem}.segments")
+        self.cache_directory = self.directory / ".cache"
+
+    def segment_path(self, month: str) -> Path:
+        return self.directory / f"ledger-{month}.db"
+
+    def archive_path(self, month: str) -> Path:
+        return self.directory / f"ledger-{month}.db.gz"
+
+    def is_archived(self, month: str) -> bool:
+        return self.archive_path(month).exists()
+
+    def months(self) -> List[str]:
+        """List every month that has a segment, archived or not."""
+        if not self.directory.exists():
+            return []
+        months = {
+            path.name.removeprefix("ledger-").split(".")[0]
+            for path in self.directory.glob("ledger-*.db*")
+        }
+        return sorted(months)
+
+    def roll(self, conn: Connection, current_month: str, archive: bool = True) -> Dict[str, int]:
+        """Move finished sessions from closed months into their segments.
+
+        Each session moves together with all of its events and flow contexts.
+        Returns the number of sessions moved per month.
+        """
+        placeholders = ", ".join("?" for _ in FINISHED_STATES)
+        rows = conn.exec_driver_sql(
+            "SELECT strftime('%Y-%m', start_time) AS month, COUNT(*) FROM sessions "
+            f"WHERE strftime('%Y-%m', start_time) < ? AND state IN ({placeholders}) "
+            "GROUP BY month ORDER BY month",
+            (current_month, *FINISHED_STATES),
+        ).all()
+
+        moved: Dict[str, int] = {}
+        for month, count in rows:
+            self._roll_month(conn, month, placeholders)
+            moved[month] = count
+            if archive and not self.is_archived(month):
+                self.archive(month)
+        return moved
+
+    def _roll_month(self, conn: Connection, month: str, placeholders: str) -> None:
+        """Copy one month's finished sessions to its segment, then delete them."""
+        rearchive = self.is_archived(month)
+        if rearchive:
+            self.restore(month)
+        path = self._ensure_segment(month)
+
+        conn.exec_driver_sql("ATTACH DATABASE ? AS rolling", (str(path),))
+        try:
+            conn.exec_driver_sql(
+                "CREATE TEMP TABLE rolling_sessions AS SELECT session_id FROM sessions "
+                f"WHERE strftime('%Y-%m', start_time) = ? AND state IN ({placeholders})",
+                (month, *FINISHED_STATES),
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO session_segments (session_id, month) "
+                "SELECT session_id, ? FROM rolling_sessions",
+                (month,),
+            )
+            for table in SEGMENT_TABLES:
+                # Row ids are local to each file; the hot table reuses freed ids
+                columns = ", ".join(column.name for column in table.columns if column.name != "id")
+                conn.exec_driver_sql(
+                    f"INSERT INTO rolling.{table.name} ({columns}) SELECT {columns} "
+                    f"FROM main.{table.name} "
+                    "WHERE session_id IN (SELECT session_id FROM rolling_sessions)"
+                )
+                conn.exec_driver_sql(
+                    f"DELETE FROM main.{table.name} "
+                    "WHERE session_id IN (SELECT session_id FROM rolling_sessions)"
+                )
+            # Keyframes point at hot-database row ids; they are rebuilt on demand
+            conn.exec_driver_sql(
+                "DELETE FROM main.replay_keyframes "
+                "WHERE session_id IN (SELECT session_id FROM rolling_sessions)"
+            )
+            conn.commit()
+        finally:
+            conn.rollback()
+            conn.exec_driver_sql("DROP TABLE IF EXISTS temp.rolling_sessions")
+            conn.exec_driver_sql("DETACH DATABASE rolling")
+
+        if rearchive:
+            self.archive(month)
+
+    def _ensure_segment(self, month: str) -> Path:
+        """Create the writable segment file for a month if needed."""
+        path = self.segment_path(month)
+        if not path.exists():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            engine = create_engine(f"sqlite:///{path}")
+            SQLModel.metadata.create_all(engine, tables=list(SEGMENT_TABLES))
+            engine.dispose()
+        return path
+
+    def archive(self, month: str) -> Path:
+        """Compress a closed segment into its read-only archived form."""
+        path = self.segment_path(month)
+        archive_path = self.archive_path(month)
+        with path.open("rb") as src, gzip.open(archive_path, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        path.unlink()
+        self._cached_path(month).unlink(missing_ok=True)
+        return archive_path
+
+    def restore(self, month: str) -> Path:
+        """Decompress an archived segment back into a writable file."""
+        path = self.segment_path(month)
+        archive_path = self.archive_path(month)
+        with gzip.open(archive_path, "rb") as src, path.open("wb") as dst:
+            shutil.copyfileobj(src, dst)
+        archive_path.unlink()
+        self._cached_path(month).unlink(missing_ok=True)
+        return path
+
+    def _cached_path(self, month: str) -> Path:
+        return self.cache_directory / f"ledger-{month}.db"
+
+    def open_segment(self, month: str) -> str:
+        """Return a read-only SQLite URI for a month's segment."""
+        if not self.is_archived(month):
+            return f"{self.segment_path(month).resolve().as_uri()}?mode=ro"
+
+        cached = self._cached_path(month)
+        archive_path = self.archive_path(month)
+        if not cached.exists() or cached.stat().st_mtime < archive_path.stat().st_mtime:
+            self.cache_directory.mkdir(parents=True, exist_ok=True)
+            with gzip.open(archive_path, "rb") as src, cached.open("wb") as dst:
+                shutil.copyfileobj(src, dst)
+        return f"{cached.resolve().as_uri()}?mode=ro&immutable=1"
+
+    @contextmanager
+    def attached(self, conn: Connection, months: Sequence[str]) -> Iterator[Dict[str, str]]:
+        """Attach month segments to a connection, yielding month -> schema name."""
+        schemas: Dict[str, str] = {}
+        try:
+            for month in months:
+                schema = f"segment_{month.replace('-', '_')}"
+                conn.exec_driver_sql(f"ATTACH DATABASE ? AS {schema}", (self.open_segment(month),))
+                schemas[month] = schema
+            yield schemas
+        finally:
+            conn.rollback()
+            for schema in schemas.values():
+                conn.exec_driver_sql(f"DETACH DATABASE {schema}")
@@ -0,0 +1,39 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Smoke tests keeping the benchmark suite runnable."""
+
+from benchmarks.bench_ledger import compare, run
+from benchmarks.synthetic import SyntheticConfig, generate_sessions
+
+
+def test_synthetic_sessions_shape() -> None:
+    """Test generated sessions match the configured shape."""
+    config = SyntheticConfig(sessions=3, events_per_session=12, contexts_per_minute=2, focus_minutes=5)
+    sessions = list(generate_sessions(config))
+    
+    assert len(sessions) == 3
+    for session in sessions:
+        assert len(session.events) == 12
+        assert len(session.contexts) == 10
+        assert session.events[0]["event_type"] == "session_started"
+        assert session.events[-1]["event_type"] == "session_completed"
+        timestamps = [event["timestamp"] for event in session.events]
+        assert timestamps == sorted(timestamps)
+
+
+def test_ledger_benchmark_suite_runs() -> None:
+    """Test a tiny benchmark run reports every metric and compares cleanly."""
+    config = SyntheticConfig(sessions=5, events_per_session=10, contexts_per_minute=1, focus_minutes=5)
+    results = run(config, insert_sessions=2, repeat=3)
+    
+    assert results["rows"] == {"sessions": 5, "events": 50, "contexts": 25}
+    metrics = results["metrics"]
+    for name in (
+        "insert_direct_events_per_second",
+        "insert_write_behind_events_per_second",
+        "get_session_events_p95_ms",
+        "get_recent_sessions_p50_ms",
+        "db_size_bytes",
+        "bulk_load_peak_memory_bytes",
+    ):
+        assert metrics[name] > 0
+    assert compare(results, results, threshold=0.0) == []
@@ -0,0 +1,125 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Test the flowzo daemon and its thin client."""
+
+import asyncio
+import io
+import json
+import socket
+import threading
+
+import pytest
+import pytest_asyncio
+from rich.console import Console
+
+from flowzo_cli.client import run_in_daemon
+from flowzo_cli.daemon import FlowDaemon
+from flowzo_cli.framing import encode_frame, read_frame
+from flowzo_cli.session import SessionState
+from flowzo_ledger.async_ledger import AsyncFlowLedger
+
+
+class FakeIntegration:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def get_next_issue(self):
+        self.calls += 1
+        return None
+
+
+@pytest_asyncio.fixture
+async def daemon(tmp_path):
+    async with AsyncFlowLedger(str(tmp_path / "ledger.db")) as ledger:
+        async with FlowDaemon(tmp_path / "daemon.sock", ledger=ledger) as server:
+            yield server
+
+
+async def _client(daemon: FlowDaemon, request: dict, terminal: bool = False):
+    """Run ``request`` through the blocking client; returns (exit code, output)."""
+    out = io.StringIO()
+    console = Console(file=out, width=80, color_system=None, force_terminal=terminal, force_interactive=terminal)
+    code = await asyncio.to_thread(run_in_daemon, request, console, daemon.path)
+    return code, out.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_daemon_runs_commands_with_warm_clients(daemon) -> None:
+    """Test commands run in the daemon, reusing its integration clients."""
+    github = daemon.clients["github"] = FakeIntegration()
+
+    for _ in range(2):
+        code, output = await _client(daemon, {"command": "next", "source": "github"})
+        assert code == 0
+        assert "No assigned GitHub issues found" in output
+    assert github.calls == 2
+
+    code, output = await _client(daemon, {"command": "bogus"})
+    assert code == 2
+    assert "Unknown daemon command" in output
+
+
+@pytest.mark.asyncio
+async def test_daemon_runs_sessions(daemon) -> None:
+    """Test a session runs in the daemon and is written to its ledger."""
+    request = {"command": "start", "duration": 0.1, "cooldown": 0.05, "priming": 0.05, "output": "json"}
+    code, output = await _client(daemon, request)
+
+    assert code == 0
+    events = json.loads(output)
+    assert events[-1]["event_type"] == "session_completed"
+    record = await daemon.ledger.get_session_record(events[0]["session_id"])
+    assert record.state == "completed"
+    assert not daemon.sessions
+
+
+@pytest.mark.asyncio
+async def test_daemon_runs_sessions_with_live_ui(daemon, monkeypatch) -> None:
+    """Test the progress UI's refresh thread never writes to the socket itself."""
+    threads = set()
+    write = asyncio.StreamWriter.write
+
+    def recording_write(self, data):
+        threads.add(threading.current_thread())
+        write(self, data)
+
+    monkeypatch.setattr(asyncio.StreamWriter, "write", recording_write)
+    request = {"command": "start", "duration": 0.3, "cooldown": 0.05, "priming": 0.05, "output": "ui"}
+    code, output = await _client(daemon, request, terminal=True)
+
+    assert code == 0
+    assert "Session complete!" in output
+    assert threads == {threading.current_thread()}
+
+
+@pytest.mark.asyncio
+async def test_daemon_aborts_session_when_client_hangs_up(daemon) -> None:
+    """Test closing the connection aborts the session the client started."""
+    reader, writer = await asyncio.open_unix_connection(str(daemon.path))
+    writer.write(encode_frame({"command": "start", "duration": 60, "output": "json_stream"}))
+    first = await read_frame(reader)
+    assert json.loads(first["text"])["event_type"] == "state_transition"
+    (engine,) = daemon.sessions.values()
+
+    writer.close()
+    for _ in range(100):
+        if not daemon.sessions:
+            break
+        await asyncio.sleep(0.01)
+    assert not daemon.sessions
+    assert engine.state == SessionState.IDLE
+    assert engine.events[-1].event_type == "session_aborted"
+
+
+def test_client_falls_back_without_daemon(tmp_path, monkeypatch) -> None:
+    """Test the client reports no daemon, so commands run in-process."""
+    console = Console(file=io.StringIO())
+    assert run_in_daemon({"command": "status"}, console, tmp_path / "missing.sock") is None
+
+    # A socket left behind by a dead daemon counts as no daemon
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(str(tmp_path / "stale.sock"))
+    stale.close()
+    assert run_in_daemon({"command": "status"}, console, tmp_path / "stale.sock") is None
+
+    monkeypatch.setenv("FLOWZO_NO_DAEMON", "1")
+    assert run_in_daemon({"command": "status"}, console, tmp_path / "missing.sock") is None
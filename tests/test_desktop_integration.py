@@ -10,13 +10,15 @@ from pathlib import Path
 
 import pytest
 
+from flowzo_cli.clock import VirtualClock
+from flowzo_cli.feed import StateFeedServer, follow_state_feed
 from flowzo_cli.session import SessionEngine
 
 
 @pytest.mark.asyncio
 async def test_session_engine_json_output():
     """Test that SessionEngine produces JSON output compatible with desktop overlay."""
-    engine = SessionEngine("desktop_test")
+    engine = SessionEngine("desktop_test", clock=VirtualClock())
     
     # Run a very short session
     await engine.start_session(duration=1, priming_duration=0.1)
@@ -132,4 +134,48 @@ def test_rust_workspace_config():
     # Verify workspace configuration
     assert "[workspace]" in content
     assert "flowzo_desktop" in content
-    assert "resolver = \"2\"" in content 
\ No newline at end of file
+    assert "resolver = \"2\"" in content 
+
+
+@pytest.mark.asyncio
+async def test_state_feed_streams_session_to_overlay(tmp_path):
+    """Test the overlay feed sends a snapshot, then deltas through each phase."""
+    engine = SessionEngine("feed_test")
+    engine.cooldown_duration = 0.2
+    async with StateFeedServer(tmp_path / "run" / "feed.sock", refresh_hz=50) as server:
+        # Only this user may reach the socket
+        assert server.path.parent.stat().st_mode & 0o777 == 0o700
+        assert server.path.stat().st_mode & 0o777 == 0o600
+
+        updates = follow_state_feed(server.path)
+        first = await updates.__anext__()
+        assert first["state"] == "idle"
+        assert set(first) == {
+            "session_id", "state", "elapsed_seconds", "remaining_seconds", "total_duration", "task",
+        }
+
+        states = []
+
+        async def collect():
+            async for state in updates:
+                states.append(state)
+                if state["state"] == "idle":
+                    return
+
+        collector = asyncio.create_task(collect())
+        server.attach(engine)
+        await engine.start_session(duration=0.3, priming_duration=0.1)
+        await asyncio.wait_for(collector, timeout=5)
+
+        phases = [state["state"] for state in states]
+        assert [phase for i, phase in enumerate(phases) if i == 0 or phases[i - 1] != phase] == [
+            "priming", "active", "cooldown", "idle",
+        ]
+        assert all(state["session_id"] == "feed_test" for state in states)
+
+        # A reconnecting client starts from a snapshot of the current state
+        async for state in follow_state_feed(server.path):
+            assert state == states[-1]
+            break
+
+    assert not (tmp_path / "run" / "feed.sock").exists()
@@ -2,14 +2,30 @@
 """Integration tests for FlowZo ledger storage."""
 
 import asyncio
+import csv
+import gzip
+import io
+import json
+import sqlite3
+import subprocess
+import sys
 import tempfile
-from datetime import datetime
+import time
+from datetime import date, datetime, timezone
 from pathlib import Path
 
 import pytest
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session as SQLModelSession
 
-from flowzo_cli.session import SessionEngine
+from flowzo_cli.clock import VirtualClock
+from flowzo_cli.session import SessionEngine, SessionState, recover_sessions
+from flowzo_ledger.async_ledger import AsyncFlowLedger
 from flowzo_ledger.database import FlowLedger
+from flowzo_ledger.export import export_table, open_export
+from flowzo_ledger.migrations import migrate
+from flowzo_ledger.models import SCHEMA_VERSION
+from flowzo_ledger.retention import RetentionPolicy
 
 
 @pytest.fixture
@@ -88,13 +104,13 @@ def test_ledger_flow_context(temp_ledger):
     
     assert context.session_id == session_id
     assert context.context_type == "keystroke"
-    assert '"key": "ctrl+s"' in context.data
+    assert context.data == {"key": "ctrl+s", "file": "main.py"}
 
 
 @pytest.mark.asyncio
 async def test_session_engine_with_ledger(temp_ledger):
     """Test SessionEngine integration with ledger."""
-    engine = SessionEngine("integration_test", ledger=temp_ledger)
+    engine = SessionEngine("integration_test", ledger=temp_ledger, clock=VirtualClock())
     
     # Run a short session
     await engine.start_session(duration=1, priming_duration=0.1)
@@ -115,6 +131,38 @@ async def test_session_engine_with_ledger(temp_ledger):
     assert "session_completed" in event_types
 
 
+def test_session_engine_spills_events_to_ledger(temp_ledger):
+    """Test events evicted from the engine's buffer are still in the ledger."""
+    engine = SessionEngine("spilled", ledger=temp_ledger, max_events=3)
+    for _ in range(5):
+        engine._emit_event("tick")
+    
+    assert len(engine.events) == 3
+    assert engine.events.spilled == 2
+    assert len(temp_ledger.get_session_events("spilled")) == 5
+
+
+@pytest.mark.asyncio
+async def test_session_engine_exports_spilled_events(temp_ledger):
+    """Test exporting a session with more events than its buffer holds."""
+    async with AsyncFlowLedger(ledger=temp_ledger) as async_ledger:
+        for ledger in (temp_ledger, async_ledger):
+            session_id = f"spilled_{type(ledger).__name__}"
+            engine = SessionEngine(
+                session_id, ledger=ledger, max_events=3, clock=VirtualClock(),
+            )
+            await engine.start_session(duration=1, priming_duration=1)
+            assert engine.events.spilled == 5
+            
+            exported = json.loads(engine.export_events_json())
+            assert [event["event_type"] for event in exported] == [
+                event.event_type for event in temp_ledger.get_session_events(session_id)
+            ]
+            assert len(exported) == engine.events.total
+            buffered = [event.model_dump() for event in engine.events]
+            assert exported[-3:] == json.loads(json.dumps(buffered))
+
+
 def test_ledger_recent_sessions(temp_ledger):
     """Test retrieving recent sessions."""
     # Create multiple session records
@@ -132,4 +180,708 @@ def test_ledger_recent_sessions(temp_ledger):
     # Should be ordered by created_at desc
     assert recent[0].session_id == "session_4"
     assert recent[1].session_id == "session_3"
-    assert recent[2].session_id == "session_2" 
\ No newline at end of file
+    assert recent[2].session_id == "session_2" 
+
+
+def test_ledger_write_behind_batches_events():
+    """Test that write-behind mode queues events until a flush threshold."""
+    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
+        ledger = FlowLedger(tmp.name, write_behind=True, batch_size=3, flush_interval=60)
+    
+    try:
+        for i in range(2):
+            ledger.log_session_event(
+                session_id="batched",
+                timestamp=1000.0 + i,
+                event_type="state_transition",
+                state="active",
+                data={"step": i},
+            )
+        assert len(ledger._pending_events) == 2
+        
+        # Reaching the batch size writes every queued event at once
+        ledger.log_session_event(
+            session_id="batched",
+            timestamp=1002.0,
+            event_type="state_transition",
+            state="active",
+            data={"step": 2},
+        )
+        assert ledger._pending_events == []
+        assert len(ledger.get_session_events("batched")) == 3
+        
+        # Terminal events force a flush regardless of batch size
+        ledger.log_session_event(
+            session_id="batched",
+            timestamp=1003.0,
+            event_type="session_completed",
+            state="idle",
+            data={},
+        )
+        assert ledger._pending_events == []
+        
+        # Closing the ledger flushes anything still queued
+        ledger.log_session_event(
+            session_id="batched",
+            timestamp=1004.0,
+            event_type="state_transition",
+            state="idle",
+            data={},
+        )
+        ledger.close()
+        assert len(FlowLedger(tmp.name).get_session_events("batched")) == 5
+    finally:
+        Path(tmp.name).unlink(missing_ok=True)
+
+
+def test_ledger_failed_flush_keeps_queue(tmp_path, monkeypatch):
+    """Test a flush whose commit fails is retried by the next one."""
+    ledger = FlowLedger(str(tmp_path / "ledger.db"), write_behind=True, batch_size=100, flush_interval=60)
+    day = datetime(2024, 1, 10, 9, 0).timestamp()
+    ledger.log_session_event("busy", day, "state_transition", "active", {})
+    ledger.log_session_event("busy", day + 100, "state_transition", "cooldown", {})
+    
+    def busy(self):
+        raise OperationalError("COMMIT", {}, Exception("database is locked"))
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(SQLModelSession, "commit", busy)
+        with pytest.raises(OperationalError):
+            ledger.flush()
+    assert len(ledger._pending_events) == 2
+    
+    assert ledger.flush() == 2
+    assert len(ledger.get_session_events("busy")) == 2
+    (active,) = [r for r in ledger.get_focus_stats(date(2024, 1, 10), date(2024, 1, 10)) if r.state == "active"]
+    assert active.seconds == 100.0
+
+
+def test_ledger_connections_use_wal(temp_ledger):
+    """Test that pooled connections are configured for concurrent access."""
+    with temp_ledger.engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+        busy_timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+    
+    assert journal_mode == "wal"
+    assert busy_timeout == 5000
+
+
+def test_ledger_compact_storage(temp_ledger):
+    """Test that enums are stored as integer codes and payloads as bytes."""
+    temp_ledger.log_session_event(
+        session_id="compact",
+        timestamp=1234567890.0,
+        event_type="session_started",
+        state="priming",
+        data={"duration": 1500},
+    )
+    temp_ledger.log_session_event(
+        session_id="compact",
+        timestamp=1234567891.0,
+        event_type="custom_event",
+        state="active",
+        data={},
+    )
+    
+    with temp_ledger.engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            "SELECT typeof(event_type), typeof(state), typeof(data) "
+            "FROM session_events ORDER BY timestamp"
+        ).all()
+    assert tuple(rows[0]) == ("integer", "integer", "blob")
+    # Unknown event types are kept verbatim
+    assert rows[1][0] == "text"
+    
+    events = temp_ledger.get_session_events("compact")
+    assert events[0].event_type == "session_started"
+    assert events[0].state == "priming"
+    assert events[0].data == {"duration": 1500}
+    assert events[1].event_type == "custom_event"
+    
+    # Names that look like codes or escapes still round-trip
+    for offset, event_type in enumerate(["2", "=x"]):
+        temp_ledger.log_session_event(
+            session_id="verbatim",
+            timestamp=1234567892.0 + offset,
+            event_type=event_type,
+            state="active",
+            data={},
+        )
+    assert [e.event_type for e in temp_ledger.get_session_events("verbatim")] == ["2", "=x"]
+
+
+def test_ledger_reads_legacy_rows(temp_ledger):
+    """Test that rows written with the JSON text layout still decode."""
+    with temp_ledger.engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO session_events "
+            "(session_id, timestamp, event_type, state, data, created_at) "
+            "VALUES ('legacy', 1.0, 'session_started', 'priming', "
+            "'{\"duration\": 60}', '2024-01-01 00:00:00')"
+        )
+    
+    events = temp_ledger.get_session_events("legacy")
+    assert events[0].event_type == "session_started"
+    assert events[0].state == "priming"
+    assert events[0].data == {"duration": 60}
+
+
+def test_ledger_rolls_months_into_archived_segments(tmp_path):
+    """Test that closed months move to compressed segments and stay readable."""
+    ledger = FlowLedger(str(tmp_path / "ledger.db"))
+    for session_id, start_time, state in [
+        ("january", datetime(2024, 1, 15), "completed"),
+        ("february", datetime(2024, 2, 10), "completed"),
+        ("unfinished", datetime(2024, 2, 11), "active"),
+        ("current", datetime(2024, 3, 1), "completed"),
+    ]:
+        ledger.create_session_record(
+            session_id=session_id,
+            start_time=start_time,
+            duration_seconds=1500,
+            state=state,
+        )
+        ledger.log_session_event(
+            session_id=session_id,
+            timestamp=start_time.timestamp(),
+            event_type="session_started",
+            state="priming",
+            data={"duration": 1500},
+        )
+    
+    moved = ledger.roll_segments(now=datetime(2024, 3, 5))
+    assert moved == {"2024-01": 1, "2024-02": 1}
+    assert ledger.segments.months() == ["2024-01", "2024-02"]
+    assert ledger.segments.is_archived("2024-01")
+    
+    # The hot database only keeps current and unfinished sessions
+    hot = {record.session_id for record in ledger.get_recent_sessions(limit=10)}
+    assert hot == {"unfinished", "current"}
+    
+    # Rolled sessions are transparently read back from archived segments
+    record = ledger.get_session_record("january")
+    assert record is not None
+    assert record.state == "completed"
+    events = ledger.get_session_events("january")
+    assert events[0].data == {"duration": 1500}
+    
+    # Another ledger in the same directory has segments of its own
+    assert ledger.segments.directory == tmp_path / "ledger.segments"
+    assert FlowLedger(str(tmp_path / "other.db")).get_session_record("january") is None
+    
+    in_range = ledger.get_sessions_between(datetime(2024, 1, 1), datetime(2024, 3, 1))
+    assert [r.session_id for r in in_range] == ["january", "february", "unfinished"]
+
+
+def test_ledger_iter_session_events_keyset(temp_ledger):
+    """Test streaming events in timestamp order across page boundaries."""
+    # Logged out of order, with a timestamp tie straddling a page boundary
+    for timestamp in [5.0, 1.0, 3.0, 3.0, 2.0, 4.0, 3.0]:
+        temp_ledger.log_session_event(
+            session_id="stream",
+            timestamp=timestamp,
+            event_type="state_transition",
+            state="active",
+            data={"ts": timestamp},
+        )
+    
+    events = list(temp_ledger.iter_session_events("stream", batch_size=2))
+    assert [event.timestamp for event in events] == [1.0, 2.0, 3.0, 3.0, 3.0, 4.0, 5.0]
+    assert len({event.id for event in events}) == 7
+    
+    rows = list(temp_ledger.iter_session_events("stream", since_ts=4.0, lightweight=True))
+    assert [(row.timestamp, row.data) for row in rows] == [(4.0, {"ts": 4.0}), (5.0, {"ts": 5.0})]
+
+
+def test_ledger_iter_sessions(temp_ledger):
+    """Test streaming session records in start-time order."""
+    for day in [3, 1, 2]:
+        temp_ledger.create_session_record(
+            session_id=f"day_{day}",
+            start_time=datetime(2024, 1, day),
+            duration_seconds=1500,
+        )
+    
+    sessions = list(temp_ledger.iter_sessions(batch_size=1))
+    assert [s.session_id for s in sessions] == ["day_1", "day_2", "day_3"]
+    
+    rows = list(temp_ledger.iter_sessions(since=datetime(2024, 1, 2), lightweight=True))
+    assert [row.session_id for row in rows] == ["day_2", "day_3"]
+
+
+def test_ledger_focus_rollups(temp_ledger):
+    """Test that rollups are maintained incrementally and match a rebuild."""
+    day = datetime(2024, 1, 10, 9, 0).timestamp()
+    for offset, event_type, state in [
+        (0, "state_transition", "priming"),
+        (60, "state_transition", "active"),
+        (1560, "state_transition", "cooldown"),
+        (1740, "session_completed", "idle"),
+    ]:
+        temp_ledger.log_session_event(
+            session_id="rollup",
+            timestamp=day + offset,
+            event_type=event_type,
+            state=state,
+            data={},
+        )
+    
+    def totals(granularity):
+        stats = temp_ledger.get_focus_stats(
+            datetime(2024, 1, 8).date(), datetime(2024, 1, 14).date(), granularity
+        )
+        return {(r.period_start, r.state): (r.seconds, r.sessions) for r in stats}
+    
+    daily = totals("day")
+    assert daily[("2024-01-10", "active")] == (1500.0, 0)
+    assert daily[("2024-01-10", "priming")] == (60.0, 0)
+    assert daily[("2024-01-10", "cooldown")] == (180.0, 0)
+    assert daily[("2024-01-10", "completed")] == (0.0, 1)
+    assert totals("week")[("2024-01-08", "active")] == (1500.0, 0)
+    
+    incremental = (daily, totals("week"))
+    assert temp_ledger.rebuild_rollups() == 8
+    assert (totals("day"), totals("week")) == incremental
+
+
+def test_ledger_rollups_resume_across_instances(temp_ledger):
+    """Test that a new ledger instance continues a session's rollup."""
+    temp_ledger.log_session_event(
+        session_id="resumed",
+        timestamp=1704877200.0,
+        event_type="state_transition",
+        state="active",
+        data={},
+    )
+    
+    other = FlowLedger(temp_ledger.db_path)
+    other.log_session_event(
+        session_id="resumed",
+        timestamp=1704877200.0 + 300,
+        event_type="session_completed",
+        state="idle",
+        data={},
+    )
+    
+    stats = other.get_focus_stats(datetime(2024, 1, 10).date(), datetime(2024, 1, 10).date())
+    assert {(r.state, r.seconds) for r in stats} == {("active", 300.0), ("completed", 0.0)}
+
+
+def _log_rolled_session(ledger, session_id, start_time, active_seconds=100):
+    """Log a finished session of ``active_seconds`` focus starting at ``start_time``."""
+    ledger.create_session_record(session_id, start_time, active_seconds, state="completed")
+    t0 = start_time.replace(tzinfo=timezone.utc).timestamp()
+    ledger.log_session_events([
+        {"session_id": session_id, "timestamp": t0, "event_type": "state_transition", "state": "active", "data": {}},
+        {"session_id": session_id, "timestamp": t0 + active_seconds, "event_type": "session_completed", "state": "idle", "data": {}},
+    ])
+
+
+def test_ledger_rebuild_rollups_includes_segments(tmp_path):
+    """Test rebuilding rollups keeps the stats of months rolled into segments."""
+    ledger = FlowLedger(str(tmp_path / "ledger.db"))
+    _log_rolled_session(ledger, "january", datetime(2026, 1, 12, 9))
+    _log_rolled_session(ledger, "current", datetime(2026, 3, 2, 9))
+    
+    def active_seconds():
+        stats = ledger.get_focus_stats(date(2026, 1, 1), date(2026, 3, 31))
+        return {r.period_start: r.seconds for r in stats if r.granularity == "day" and r.state == "active"}
+    
+    expected = {"2026-01-12": 100.0, "2026-03-02": 100.0}
+    assert active_seconds() == expected
+    assert ledger.roll_segments(now=datetime(2026, 3, 5)) == {"2026-01": 1}
+    assert active_seconds() == expected
+    
+    ledger.rebuild_rollups()
+    assert active_seconds() == expected
+
+
+@pytest.mark.asyncio
+async def test_session_engine_with_async_ledger(temp_ledger):
+    """Test SessionEngine writing through the AsyncFlowLedger writer thread."""
+    async with AsyncFlowLedger(ledger=temp_ledger) as ledger:
+        engine = SessionEngine("async_test", ledger=ledger, clock=VirtualClock())
+        await engine.start_session(duration=0.1, priming_duration=0.1)
+        
+        record = await ledger.get_session_record("async_test")
+        assert record.state == "completed"
+        
+        streamed = [event async for event in ledger.iter_session_events("async_test", batch_size=3)]
+        assert [event.event_type for event in streamed] == [event.event_type for event in engine.events]
+        sessions = [row async for row in ledger.iter_table("sessions")]
+        assert [row.session_id for row in sessions] == ["async_test"]
+        assert (await ledger.get_replay_keyframes("async_test")) == []
+
+
+def test_session_engine_aborts_outside_event_loop(tmp_path):
+    """Test aborting without a running loop still writes through an AsyncFlowLedger."""
+    ledger = AsyncFlowLedger(str(tmp_path / "ledger.db"))
+    engine = SessionEngine("sync_abort", ledger=ledger)
+    asyncio.run(engine._begin_session(60, 5))
+    
+    engine.abort_session()
+    record = ledger.submit(ledger.ledger.get_session_record, "sync_abort").result()
+    assert record.state == "aborted"
+    assert ledger.submit(ledger.ledger.get_session_checkpoints).result() == []
+    events = ledger.submit(ledger.ledger.get_session_events, "sync_abort").result()
+    assert events[-1].event_type == "session_aborted"
+    ledger.close()
+
+
+@pytest.mark.asyncio
+async def test_session_engine_reports_undrained_write_errors(temp_ledger, monkeypatch):
+    """Test a failed ledger write after an abort nobody drains is still reported."""
+    async with AsyncFlowLedger(ledger=temp_ledger) as ledger:
+        engine = SessionEngine("aborted", ledger=ledger)
+        await engine._begin_session(60, 5)
+        await engine.drain()
+    
+        async def fail(*args, **kwargs):
+            raise OSError("disk full")
+    
+        monkeypatch.setattr(ledger, "update_session_record", fail)
+        reported = []
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(lambda loop, context: reported.append(context["exception"]))
+        try:
+            engine.abort_session()
+            for _ in range(100):
+                if reported or not engine._pending_writes:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            loop.set_exception_handler(None)
+    
+        assert [str(exc) for exc in reported] == ["disk full"]
+        assert engine._pending_writes == []
+        # A drain waiting for a failed write raises it instead
+        engine._ledger_write("update_session_record", session_id="aborted", state="aborted")
+        with pytest.raises(OSError, match="disk full"):
+            await engine.drain()
+
+
+def test_ledger_flow_context_retention(temp_ledger):
+    """Test downsampling old flow contexts into per-minute aggregates."""
+    now = 1704877200.0
+    day = 86400
+    # Two old keystrokes in the same minute, one old ancient one, one fresh
+    for timestamp in [now - 10 * day, now - 10 * day + 30, now - 100 * day, now - 60]:
+        temp_ledger.log_flow_context(
+            session_id="retained",
+            context_type="keystroke",
+            timestamp=timestamp,
+            data={"key": "a"},
+        )
+    
+    policy = RetentionPolicy(raw_days=7, aggregate_days=90, batch_size=1)
+    result = temp_ledger.compact_flow_contexts(policy, now=now)
+    assert result["downsampled"] == 3
+    assert result["expired_aggregates"] == 1
+    
+    with temp_ledger.engine.connect() as conn:
+        remaining = conn.exec_driver_sql("SELECT timestamp FROM flow_contexts").all()
+        minutes = conn.exec_driver_sql(
+            "SELECT minute, count FROM flow_context_minutes"
+        ).all()
+        auto_vacuum = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar()
+    
+    assert [row[0] for row in remaining] == [now - 60]
+    assert [tuple(row) for row in minutes] == [(int((now - 10 * day) // 60) * 60, 2)]
+    assert auto_vacuum == 2  # incremental
+
+
+def test_ledger_retention_drops_stale_keyframes(temp_ledger):
+    """Test downsampling a session's contexts invalidates its replay keyframes."""
+    now = 1704877200.0
+    for session_id, start in [("old", now - 10 * 86400), ("fresh", now - 3600)]:
+        for i in range(20):
+            temp_ledger.log_flow_context(session_id, "keystroke", start + i, {"n": i})
+        assert temp_ledger.replay(session_id, keyframe_interval=5).build_keyframes() == 4
+    
+    temp_ledger.compact_flow_contexts(RetentionPolicy(raw_days=7), now=now)
+    assert temp_ledger.get_replay_keyframes("old") == []
+    assert len(temp_ledger.get_replay_keyframes("fresh")) == 4
+    
+    # Rebuilt keyframes only cover the contexts that are left
+    replay = temp_ledger.replay("old", keyframe_interval=5)
+    assert replay.keyframes == []
+    assert replay.seek(now).contexts == {}
+
+
+@pytest.mark.asyncio
+async def test_ledger_session_replay_seek(temp_ledger):
+    """Test keyframe-indexed seeking against a full timeline scan."""
+    states = ["priming", "active", "cooldown", "completed"]
+    for i, state in enumerate(states):
+        temp_ledger.log_session_event("replayed", 1000.0 + i * 100, "state_transition", state, {})
+    for i in range(400):
+        temp_ledger.log_flow_context("replayed", ("keystroke", "ide_state")[i % 2], 1000.0 + i, {"n": i})
+    
+    replay = temp_ledger.replay("replayed", keyframe_interval=50)
+    assert replay.build_keyframes() == len(temp_ledger.get_replay_keyframes("replayed")) == 8
+    
+    frames = list(replay.timeline())
+    assert len(frames) == 404
+    assert [frame.timestamp for frame in frames] == sorted(frame.timestamp for frame in frames)
+    
+    for target in [999.0, 1000.0, 1149.5, 1250.0, 1399.0, 2000.0]:
+        expected_state, expected_contexts = None, {}
+        for frame in frames:
+            if frame.timestamp > target:
+                break
+            expected_state = frame.state
+            if frame.kind == "context":
+                expected_contexts[frame.type] = frame.data
+        snapshot = replay.seek(target)
+        assert (snapshot.state, snapshot.contexts) == (expected_state, expected_contexts)
+    
+    resumed = [frame async for frame in temp_ledger.replay("replayed").play(start=1250.0, speed=0)]
+    assert resumed == [frame for frame in frames if frame.timestamp >= 1250.0]
+    assert resumed[0].state == "cooldown"
+
+
+def test_ledger_export_streams_ndjson_and_csv(tmp_path):
+    """Test exporting hot and segment rows over a date range."""
+    ledger = FlowLedger(str(tmp_path / "ledger.db"))
+    for session_id, start in [("old", datetime(2024, 1, 10, 9)), ("new", datetime(2024, 3, 5, 9))]:
+        ledger.create_session_record(session_id, start, 60, state="completed")
+        ts = start.replace(tzinfo=timezone.utc).timestamp()
+        ledger.log_session_event(session_id, ts, "session_started", "active", {"duration": 60})
+        ledger.log_session_event(session_id, ts + 60, "session_completed", "completed", {})
+    ledger.roll_segments(now=datetime(2024, 3, 10))
+    
+    out = io.StringIO()
+    assert export_table(ledger, "events", out, batch_size=1) == 4
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [line["session_id"] for line in lines] == ["old", "old", "new", "new"]
+    assert lines[0]["data"] == {"duration": 60}
+    assert "id" not in lines[0]
+    
+    path = str(tmp_path / "sessions.csv.gz")
+    progress = []
+    with open_export(path) as out:
+        count = export_table(
+            ledger, "sessions", out, "csv",
+            start=datetime(2024, 2, 1), end=datetime(2024, 4, 1), progress=progress.append,
+        )
+    assert count == 1 and progress[-1] == 1
+    with gzip.open(path, "rt", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["session_id"], row["start_time"]) for row in rows] == [("new", "2024-03-05T09:00:00")]
+    ledger.close()
+
+
+def test_ledger_export_windows_agree_off_utc(tmp_path, monkeypatch):
+    """Test a UTC export window selects sessions and events alike on a non-UTC host."""
+    monkeypatch.setenv("TZ", "Etc/GMT+5")
+    time.tzset()
+    try:
+        ledger = FlowLedger(str(tmp_path / "ledger.db"))
+        # As SessionEngine writes them: local start times, epoch event times
+        # 22:43 UTC on Jan 31, and 04:00 UTC on Feb 1
+        times = {"late_utc": 1_706_741_000, "next_day": 1_706_760_000}
+        for session_id, ts in times.items():
+            start = datetime.fromtimestamp(ts)
+            ledger.create_session_record(session_id, start, 60, state="completed")
+            ledger.log_session_event(session_id, ts, "session_started", "active", {})
+        
+        window = {"start": datetime(2024, 1, 31, 20), "end": datetime(2024, 2, 1)}
+        sessions = [row.session_id for row in ledger.iter_table("sessions", **window)]
+        events = [row.session_id for row in ledger.iter_table("events", **window)]
+        assert sessions == events == ["late_utc"]
+        ledger.close()
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_ledger_merge_deduplicates_and_resyncs(tmp_path):
+    """Test merging a second machine's ledger, then re-syncing it."""
+    laptop = FlowLedger(str(tmp_path / "laptop.db"))
+    (tmp_path / "desktop").mkdir()
+    desktop = FlowLedger(str(tmp_path / "desktop" / "ledger.db"))
+    
+    # Both machines know the shared session's first event
+    for ledger in (laptop, desktop):
+        ledger.create_session_record("shared", datetime(2024, 5, 1, 9), 60, state="active")
+        ledger.log_session_event("shared", 100.0, "session_started", "active", {})
+    desktop.log_session_event("shared", 160.0, "session_completed", "completed", {})
+    desktop.update_session_record("shared", end_time=datetime(2024, 5, 1, 9, 1), state="completed")
+    desktop.create_session_record("desk_only", datetime(2024, 5, 2, 9), 60, state="completed")
+    desktop.log_flow_context("desk_only", "keystroke", 200.0, {"key": "a"})
+    
+    merged = laptop.merge(desktop.db_path)
+    assert merged == {"sessions": 2, "session_events": 1, "flow_contexts": 1}
+    assert [e.event_type for e in laptop.get_session_events("shared")] == ["session_started", "session_completed"]
+    assert laptop.get_session_record("shared").state == "completed"
+    assert laptop.get_focus_stats(datetime(1970, 1, 1).date(), datetime(1970, 1, 1).date())
+    
+    # Re-sync only picks up what is new; the overlap window is de-duplicated
+    assert laptop.merge(desktop.db_path) == {"sessions": 0, "session_events": 0, "flow_contexts": 0}
+    desktop.log_flow_context("desk_only", "keystroke", 201.0, {"key": "b"})
+    assert laptop.merge(desktop.db_path)["flow_contexts"] == 1
+    assert [c.timestamp for c in laptop.iter_flow_contexts("desk_only")] == [200.0, 201.0]
+    
+    with pytest.raises(ValueError):
+        laptop.merge(laptop.db_path)
+    laptop.close()
+    desktop.close()
+
+
+def test_ledger_merge_keeps_rolled_month_rollups(tmp_path):
+    """Test merging after rolling segments adds to, rather than rebuilds, rollups."""
+    laptop = FlowLedger(str(tmp_path / "laptop.db"))
+    (tmp_path / "desktop").mkdir()
+    desktop = FlowLedger(str(tmp_path / "desktop" / "ledger.db"))
+    _log_rolled_session(laptop, "january", datetime(2026, 1, 12, 9))
+    assert laptop.roll_segments(now=datetime(2026, 3, 5)) == {"2026-01": 1}
+    
+    # A session both machines started, finished on the desktop, plus a new one
+    t0 = datetime(2026, 3, 2, 9).replace(tzinfo=timezone.utc).timestamp()
+    for ledger in (laptop, desktop):
+        ledger.create_session_record("shared", datetime(2026, 3, 2, 9), 300, state="active")
+        ledger.log_session_event("shared", t0, "state_transition", "active", {})
+    desktop.log_session_event("shared", t0 + 300, "session_completed", "idle", {})
+    _log_rolled_session(desktop, "desk_only", datetime(2026, 3, 3, 9), active_seconds=50)
+    
+    assert laptop.merge(desktop.db_path)["session_events"] == 3
+    
+    def totals():
+        stats = laptop.get_focus_stats(date(2026, 1, 1), date(2026, 3, 31))
+        return {(r.period_start, r.state): (r.seconds, r.sessions) for r in stats if r.granularity == "day"}
+    
+    merged = totals()
+    assert merged[("2026-01-12", "active")] == (100.0, 0)
+    assert merged[("2026-03-02", "active")] == (300.0, 0)
+    assert merged[("2026-03-02", "completed")] == (0.0, 1)
+    assert merged[("2026-03-03", "active")] == (50.0, 0)
+    laptop.rebuild_rollups()
+    assert totals() == merged
+    
+    # Re-merging changes nothing
+    laptop.merge(desktop.db_path)
+    assert totals() == merged
+
+
+def test_ledger_migrates_legacy_database(tmp_path):
+    """Test opening a pre-versioning ledger upgrades it once, in place."""
+    db_path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(
+            "CREATE TABLE sessions (id INTEGER PRIMARY KEY, session_id VARCHAR UNIQUE, "
+            "start_time DATETIME, end_time DATETIME, duration_seconds INTEGER, state VARCHAR, "
+            "created_at DATETIME, updated_at DATETIME);"
+            "CREATE TABLE session_events (id INTEGER PRIMARY KEY, session_id VARCHAR, "
+            "timestamp FLOAT, event_type VARCHAR, state VARCHAR, data VARCHAR, created_at DATETIME);"
+            "CREATE TABLE flow_contexts (id INTEGER PRIMARY KEY, session_id VARCHAR, "
+            "context_type VARCHAR, timestamp FLOAT, data VARCHAR, created_at DATETIME);"
+            "INSERT INTO session_events (session_id, timestamp, event_type, state, data, created_at) VALUES "
+            "('old', 0.0, 'session_started', 'active', '{\"duration\": 60}', '2024-01-01 00:00:00'),"
+            "('old', 60.0, 'session_completed', 'completed', '{}', '2024-01-01 00:00:00'),"
+            "('old', 61.0, 'custom_event', 'completed', '{}', '2024-01-01 00:00:00');"
+            "INSERT INTO flow_contexts (session_id, context_type, timestamp, data, created_at) VALUES "
+            "('old', 'keystroke', 1.0, '{\"key\": \"a\"}', '2024-01-01 00:00:00');"
+        )
+    
+    ledger = FlowLedger(db_path)
+    with ledger.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA user_version").scalar() == SCHEMA_VERSION
+        kinds = conn.exec_driver_sql(
+            "SELECT typeof(event_type), typeof(state), typeof(data) FROM session_events ORDER BY id"
+        ).all()
+        indexes = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    
+    assert [tuple(kind) for kind in kinds] == [
+        ("integer", "integer", "blob"),
+        ("integer", "integer", "blob"),
+        ("text", "integer", "blob"),  # unknown names stay verbatim
+    ]
+    assert {"ix_session_events_session_ts", "ix_flow_contexts_session_ts"} <= indexes
+    assert [event.data for event in ledger.get_session_events("old")] == [{"duration": 60}, {}, {}]
+    assert [context.data for context in ledger.iter_flow_contexts("old")] == [{"key": "a"}]
+    # Rollups are seeded from existing history
+    day = datetime(1970, 1, 1).date()
+    assert {r.state: r.seconds for r in ledger.get_focus_stats(day, day)} == {"active": 60.0, "completed": 0.0}
+    
+    # Already current: no further DDL
+    assert migrate(ledger.engine) == 0
+    ledger.close()
+
+
+def test_ledger_session_cache(temp_ledger):
+    """Test the read-through session cache and its invalidation."""
+    temp_ledger.create_session_record("cached_1", datetime(2024, 1, 1), 60)
+    assert temp_ledger.get_session_record("missing") is None
+    assert temp_ledger.get_session_record("missing") is None
+    
+    first = temp_ledger.get_session_record("cached_1")
+    assert temp_ledger.get_session_record("cached_1") is first
+    assert [r.session_id for r in temp_ledger.get_recent_sessions(5)] == ["cached_1"]
+    assert [r.session_id for r in temp_ledger.get_recent_sessions(2)] == ["cached_1"]
+    
+    # Writes through the ledger update cached entries precisely
+    temp_ledger.update_session_record("cached_1", state="completed")
+    assert temp_ledger.get_session_record("cached_1").state == "completed"
+    assert temp_ledger.get_recent_sessions(5)[0].state == "completed"
+    temp_ledger.create_session_record("missing", datetime(2024, 1, 2), 60)
+    assert temp_ledger.get_session_record("missing").session_id == "missing"
+    assert [r.session_id for r in temp_ledger.get_recent_sessions(5)] == ["missing", "cached_1"]
+    
+    stats = temp_ledger.cache_stats()
+    assert stats["record_hits"] == 5
+    assert stats["record_misses"] == 1
+    assert stats["recent_hits"] == 2
+    assert stats["recent_misses"] == 2
+    
+    # Writes from another process show up once entries expire
+    reader = FlowLedger(temp_ledger.db_path, cache_ttl=0.0)
+    assert reader.get_session_record("missing").state == "idle"
+    temp_ledger.update_session_record("missing", state="aborted")
+    assert reader.get_session_record("missing").state == "aborted"
+    reader.close()
+
+
+@pytest.mark.asyncio
+async def test_session_recovery_from_checkpoints(temp_ledger):
+    """Test orphaned sessions are resumed or closed from their checkpoints."""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    dead_pid = process.pid
+    
+    # Two sessions whose process "crashed" in the active phase
+    for session_id, duration in [("expired", 30), ("resumable", 600)]:
+        engine = SessionEngine(session_id, ledger=temp_ledger)
+        engine.cooldown_duration = 0.05
+        await engine._begin_session(duration, priming_duration=0)
+        engine._enter_active()
+        for i in range(100):
+            engine._emit_event("tick", {"i": i})
+        await engine.drain()
+    with temp_ledger.engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE session_checkpoints SET pid = ?", (dead_pid,))
+    
+    # Sessions still owned by this process are left alone
+    live = SessionEngine("live", ledger=temp_ledger)
+    await live._begin_session(600, priming_duration=0)
+    
+    expired_deadline = next(
+        cp.phase_deadline for cp in temp_ledger.get_session_checkpoints() if cp.session_id == "expired"
+    )
+    recovered = await recover_sessions(temp_ledger, now=expired_deadline + 60)
+    assert recovered.closed == ["expired"]
+    assert [engine.session_id for engine in recovered.resumed] == ["resumable"]
+    
+    record = temp_ledger.get_session_record("expired")
+    assert record.state == "aborted"
+    assert record.end_time == datetime.fromtimestamp(expired_deadline)
+    aborted = temp_ledger.get_session_events("expired")[-1]
+    assert aborted.event_type == "session_aborted"
+    assert aborted.data == {"aborted_from_state": "active", "recovered": True}
+    
+    resumed = recovered.resumed[0]
+    assert resumed.state == SessionState.ACTIVE
+    assert len(resumed.events) == 0
+    resumed.phase_deadline = 0  # pretend the focus phase is already over
+    await resumed.resume_session()
+    assert temp_ledger.get_session_record("resumable").state == "completed"
+    assert [cp.session_id for cp in temp_ledger.get_session_checkpoints()] == ["live"]
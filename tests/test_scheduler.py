@@ -0,0 +1,127 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Test the timer wheel and SessionScheduler."""
+
+import asyncio
+
+import pytest
+
+from flowzo_cli.clock import VirtualClock
+from flowzo_cli.scheduler import SessionScheduler, TimerWheel
+from flowzo_cli.session import SessionEngine, SessionState
+
+
+def test_timer_wheel_fires_in_deadline_order() -> None:
+    """Test timers fire on the first tick after their deadline, across wheel turns."""
+    wheel = TimerWheel(tick=1.0, slots=4)
+    fired = []
+    for deadline in [9.0, 2.5, 2.0, 5.0]:
+        wheel.schedule_at(deadline, fired.append, deadline)
+    cancelled = wheel.schedule_at(3.0, fired.append, 3.0)
+    assert len(wheel) == 5
+    
+    assert cancelled.cancel()
+    assert not cancelled.cancel()
+    assert wheel.advance(2.0) == 1
+    assert fired == [2.0]
+    # 9.0 shares a bucket with 5.0 but is a wheel turn further out
+    assert wheel.advance(5.0) == 2
+    assert fired == [2.0, 2.5, 5.0]
+    assert wheel.advance(10.0) == 1
+    assert fired == [2.0, 2.5, 5.0, 9.0]
+    assert len(wheel) == 0
+
+
+def test_timer_wheel_skips_idle_ticks() -> None:
+    """Test an empty wheel jumps ahead instead of stepping through idle ticks."""
+    wheel = TimerWheel(tick=0.001, slots=8)
+    assert wheel.advance(3600.0) == 0
+    fired = []
+    wheel.schedule_at(3600.0015, fired.append, "late")
+    wheel.advance(3600.005)
+    assert fired == ["late"]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_many_sessions() -> None:
+    """Test one scheduler drives many sessions through every phase."""
+    engines = [SessionEngine(f"hosted_{i}") for i in range(200)]
+    for engine in engines:
+        engine.cooldown_duration = 0.02
+    
+    async with SessionScheduler(tick=0.005) as scheduler:
+        done = [await scheduler.start(engine, duration=0.05, priming_duration=0.02) for engine in engines]
+        aborted = scheduler.abort(engines[0])
+        finals = await asyncio.gather(*done)
+        assert len(scheduler) == 0
+    
+    assert aborted.event_type == "session_aborted"
+    assert finals[0] is aborted
+    assert all(final.event_type == "session_completed" for final in finals[1:])
+    assert [event.event_type for event in engines[1].events] == [
+        "state_transition", "session_started",
+        "state_transition", "focus_phase_started",
+        "state_transition", "cooldown_started",
+        "state_transition", "session_completed",
+    ]
+    assert all(engine.state == SessionState.IDLE for engine in engines)
+    with pytest.raises(ValueError, match="not scheduled"):
+        scheduler.abort(engines[1])
+
+
+def test_timer_wheel_callback_errors() -> None:
+    """Test a raising callback does not stop the rest of its batch."""
+    def fail(label):
+        raise RuntimeError(label)
+    
+    errors = []
+    wheel = TimerWheel(tick=1.0, slots=4, on_error=lambda timer, exc: errors.append(str(exc)))
+    fired = []
+    wheel.schedule_at(1.0, fail, "boom")
+    wheel.schedule_at(1.0, fired.append, "after")
+    assert wheel.advance(1.0) == 2
+    assert (errors, fired) == (["boom"], ["after"])
+    
+    # Without a handler the error propagates and the batch resumes next time
+    wheel = TimerWheel(tick=1.0, slots=4)
+    fired = []
+    wheel.schedule_at(1.0, fail, "boom")
+    wheel.schedule_at(1.0, fired.append, "after")
+    with pytest.raises(RuntimeError):
+        wheel.advance(1.0)
+    assert wheel.advance(1.0) == 1
+    assert fired == ["after"]
+
+
+class FailingEngine(SessionEngine):
+    def _enter_active(self) -> None:
+        raise OSError("ledger write failed")
+
+
+@pytest.mark.asyncio
+async def test_scheduler_isolates_failing_sessions() -> None:
+    """Test a session whose transition raises fails alone."""
+    engines = [FailingEngine("failing"), SessionEngine("healthy")]
+    for engine in engines:
+        engine.cooldown_duration = 0.01
+    
+    async with SessionScheduler(tick=0.005) as scheduler:
+        failing, healthy = [await scheduler.start(engine, duration=0.02, priming_duration=0.01) for engine in engines]
+        with pytest.raises(OSError, match="ledger write failed"):
+            await failing
+        assert (await asyncio.wait_for(healthy, 1)).event_type == "session_completed"
+        assert len(scheduler) == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_on_virtual_clock() -> None:
+    """Test a scheduler on a virtual clock finishes hour-long sessions without waiting."""
+    clock = VirtualClock(start=0.0)
+    engines = [SessionEngine(f"sim_{i}", clock=clock, cooldown_duration=60) for i in range(100)]
+    
+    async with SessionScheduler(tick=1, clock=clock) as scheduler:
+        done = [await scheduler.start(engine, duration=3600 + i, priming_duration=60) for i, engine in enumerate(engines)]
+        finals = await asyncio.wait_for(asyncio.gather(*done), timeout=30)
+        with pytest.raises(ValueError, match="different clock"):
+            await scheduler.start(SessionEngine("wall_clock"), duration=60)
+    
+    assert [final.timestamp for final in finals] == [60 + 3600 + i + 60 for i in range(100)]
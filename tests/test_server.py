@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Test the HTTP and WebSocket API served by ``flowzo serve``."""
+
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import SyntheticConfig, populate
+from flowzo_cli.server import create_app
+from flowzo_ledger.database import FlowLedger
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "ledger.db")
+
+
+@pytest.fixture
+def client(db_path):
+    with TestClient(create_app(db_path=db_path, tick=0.005)) as client:
+        yield client
+
+
+def _sse_events(response):
+    """Parse (event, data) pairs from a Server-Sent Events stream."""
+    event = None
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            yield event, json.loads(line[len("data: "):])
+
+
+def test_session_lifecycle_over_http(client) -> None:
+    """Test starting a session, following it over SSE, then reading its history."""
+    response = client.post("/sessions", json={"duration": 0.1, "priming_duration": 0.05, "cooldown_duration": 0.05})
+    assert response.status_code == 201
+    session_id = response.json()["session_id"]
+    assert response.json()["state"] == "priming"
+    assert [status["session_id"] for status in client.get("/sessions").json()] == [session_id]
+
+    with client.stream("GET", f"/sessions/{session_id}/stream") as stream:
+        events = [event for event, _ in _sse_events(stream)]
+    assert "focus_phase_started" in events
+    assert events[-1] == "session_completed"
+
+    # Once finished the session is served from the ledger
+    for _ in range(100):
+        record = client.get(f"/sessions/{session_id}").json()
+        if record["state"] == "completed":
+            break
+    assert record["running"] is False
+    assert record["state"] == "completed"
+
+    with client.stream("GET", f"/sessions/{session_id}/events") as response:
+        assert response.headers["content-type"] == "application/x-ndjson"
+        history = [json.loads(line) for line in response.iter_lines() if line]
+    assert history[0]["event_type"] == "state_transition"
+    assert "session_completed" in [event["event_type"] for event in history]
+
+
+def test_abort_session_over_websocket(client) -> None:
+    """Test a WebSocket client sees a session aborted over HTTP."""
+    session_id = client.post("/sessions", json={"duration": 60, "session_id": "ws_test"}).json()["session_id"]
+
+    with client.websocket_connect(f"/sessions/{session_id}/ws") as websocket:
+        aborted = client.post(f"/sessions/{session_id}/abort")
+        assert aborted.status_code == 200
+        assert aborted.json()["event_type"] == "session_aborted"
+        while (event := websocket.receive_json())["event_type"] != "session_aborted":
+            pass
+        assert event["data"]["aborted_from_state"] == "priming"
+
+    assert client.post(f"/sessions/{session_id}/abort").status_code == 404
+    assert client.post("/sessions", json={"duration": 1, "session_id": "ws_test"}).status_code == 409
+    assert client.get("/sessions/unknown").status_code == 404
+    assert client.post("/sessions", json={"duration": 0}).status_code == 422
+
+
+def test_ledger_queries_stream_history(db_path) -> None:
+    """Test session history is streamed in full and stats are validated."""
+    with FlowLedger(db_path) as ledger:
+        populate(ledger, SyntheticConfig(sessions=1200, contexts_per_minute=0))
+        assert ledger.roll_segments(archive=False, now=datetime(2024, 4, 1))
+
+    with TestClient(create_app(db_path=db_path)) as client:
+        with client.stream("GET", "/ledger/sessions") as response:
+            sessions = [json.loads(line) for line in response.iter_lines() if line]
+        assert len(sessions) == 1200
+        assert sessions[0]["start_time"] < sessions[-1]["start_time"]
+
+        assert client.get("/ledger/stats", params={"start": "2024-01-01", "end": "2024-12-31", "by": "month"}).status_code == 400
+        stats = client.get("/ledger/stats", params={"start": "2024-01-01", "end": "2024-12-31"}).json()
+        assert isinstance(stats, list)
@@ -2,16 +2,20 @@
 """Test SessionEngine FSM functionality."""
 
 import asyncio
+import io
 import json
 import pytest
 
-from flowzo_cli.session import SessionEngine, SessionState
+from flowzo_cli import session as session_module
+from flowzo_cli.clock import VirtualClock
+from flowzo_cli.session import SessionEngine, SessionState, SubscriptionOverflow, stream_events_ndjson
 
 
 @pytest.mark.asyncio
 async def test_session_engine_full_cycle() -> None:
     """Test complete session cycle: idle → priming → active → cooldown → idle."""
-    engine = SessionEngine("test_session")
+    clock = VirtualClock(start=1_700_000_000.0)
+    engine = SessionEngine("test_session", clock=clock)
     
     # Initial state
     assert engine.state == SessionState.IDLE
@@ -32,6 +36,10 @@ async def test_session_engine_full_cycle() -> None:
     assert "focus_phase_started" in event_types
     assert "cooldown_started" in event_types
     assert "session_completed" in event_types
+    
+    # Virtual time jumps straight to each phase deadline
+    assert clock.time() == pytest.approx(1_700_000_000.0 + 0.1 + 1 + engine.cooldown_duration)
+    assert engine.events[-1].data["total_duration"] == pytest.approx(0.1 + 1 + engine.cooldown_duration)
 
 
 def test_session_engine_abort() -> None:
@@ -93,4 +101,136 @@ def test_session_engine_invalid_abort() -> None:
     engine = SessionEngine()
     
     with pytest.raises(ValueError, match="No active session to abort"):
-        engine.abort_session() 
\ No newline at end of file
+        engine.abort_session() 
+
+
+def test_session_engine_bounded_events() -> None:
+    """Test the event buffer keeps only the newest events."""
+    engine = SessionEngine("bounded", max_events=2)
+    
+    engine.transition_to(SessionState.PRIMING)
+    engine.transition_to(SessionState.ACTIVE)
+    engine.abort_session()
+    
+    assert len(engine.events) == 2
+    assert engine.events.total == 3
+    assert engine.events.spilled == 1
+    assert [event.event_type for event in engine.events] == ["state_transition", "session_aborted"]
+    assert engine.events[0].session_id is engine.events[1].session_id
+    
+    events = json.loads(engine.export_events_json())
+    assert [event["state"] for event in events] == ["active", "active"]
+    assert events[1]["data"] == {"aborted_from_state": "active"}
+
+
+
+def test_session_engine_event_history_is_stable() -> None:
+    """Test emitted events keep their data, and all events without a ledger."""
+    engine = SessionEngine("stable")
+    assert engine.events.max_events is None
+    
+    data = {"note": "before"}
+    engine._emit_event("tick", data)
+    data["note"] = "after"
+    assert engine.events[0].data == {"note": "before"}
+
+
+@pytest.mark.asyncio
+async def test_session_engine_subscribe() -> None:
+    """Test subscribers receive filtered events as they are emitted."""
+    engine = SessionEngine("subscribed")
+    engine.cooldown_duration = 0.05
+    
+    with engine.subscribe(["state_transition"]) as transitions:
+        session = asyncio.create_task(engine.start_session(duration=0.05, priming_duration=0.05))
+        session.add_done_callback(lambda _: transitions.close())
+        states = [event.data["to_state"] async for event in transitions]
+    await session
+    
+    assert states == [SessionState.PRIMING, SessionState.ACTIVE, SessionState.COOLDOWN, SessionState.IDLE]
+    assert not engine._subscribers
+
+
+@pytest.mark.asyncio
+async def test_session_engine_subscriber_overflow() -> None:
+    """Test each overflow policy once a subscriber's queue is full."""
+    engine = SessionEngine()
+    oldest = engine.subscribe(maxsize=2)
+    newest = engine.subscribe(maxsize=2, overflow="drop_newest")
+    strict = engine.subscribe(maxsize=2, overflow="error")
+    
+    for state in [SessionState.PRIMING, SessionState.ACTIVE, SessionState.COOLDOWN]:
+        engine.transition_to(state)
+    for subscription in (oldest, newest):
+        subscription.close()
+    
+    assert [event.data["to_state"] async for event in oldest] == [SessionState.ACTIVE, SessionState.COOLDOWN]
+    assert [event.data["to_state"] async for event in newest] == [SessionState.PRIMING, SessionState.ACTIVE]
+    assert oldest.dropped == newest.dropped == strict.dropped == 1
+    with pytest.raises(SubscriptionOverflow):
+        [event async for event in strict]
+    
+    with pytest.raises(ValueError, match="Unknown overflow policy"):
+        engine.subscribe(overflow="block")
+
+
+@pytest.mark.asyncio
+async def test_session_engine_ndjson_stream(monkeypatch) -> None:
+    """Test streaming one compact JSON line per event, with and without orjson."""
+    engine = SessionEngine("streamed_café")
+    out = io.BytesIO()
+    
+    with engine.subscribe() as events:
+        writer = asyncio.create_task(stream_events_ndjson(events, out))
+        engine.transition_to(SessionState.PRIMING)
+        engine._emit_event("tick")
+        engine.abort_session()
+    assert await writer == 3
+    
+    lines = out.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == json.loads(engine.export_events_json())
+    assert all(b" " not in line for line in lines)
+    
+    monkeypatch.setattr(session_module, "orjson", None)
+    assert [session_module.event_json_line(event) for event in engine.events] == [line + b"\n" for line in lines]
+
+
+@pytest.mark.asyncio
+async def test_virtual_clock_runs_concurrent_sessions_in_order() -> None:
+    """Test many sessions share virtual time and complete at their own deadlines."""
+    clock = VirtualClock(start=0.0)
+    engines = [SessionEngine(f"sim_{i}", clock=clock, max_events=8, cooldown_duration=i % 3) for i in range(2000)]
+    
+    await asyncio.gather(*(engine.start_session(duration=60 + i, priming_duration=5) for i, engine in enumerate(engines)))
+    
+    for i, engine in enumerate(engines):
+        started, completed = engine.events[0], engine.events[-1]
+        assert started.timestamp == 0.0
+        assert completed.event_type == "session_completed"
+        assert completed.timestamp == pytest.approx(5 + 60 + i + i % 3)
+    assert clock.time() == pytest.approx(5 + 60 + 1999 + 1999 % 3)
+    # With nothing left sleeping the clock stops driving the loop
+    assert clock._runner.done()
+
+
+@pytest.mark.asyncio
+async def test_virtual_clock_advance_by_hand() -> None:
+    """Test advancing a virtual clock wakes only the sleepers that are due."""
+    clock = VirtualClock(start=0.0, auto=False)
+    woken = []
+    
+    async def sleeper(seconds):
+        await clock.sleep(seconds)
+        woken.append(seconds)
+    
+    tasks = [asyncio.create_task(sleeper(seconds)) for seconds in (3, 1, 2)]
+    await asyncio.sleep(0)
+    clock.advance(2)
+    await asyncio.sleep(0)
+    assert woken == [1, 2]
+    with pytest.raises(ValueError):
+        clock.advance(-1)
+    clock.advance(1)
+    await asyncio.gather(*tasks)
+    assert woken == [1, 2, 3]
+    assert clock._runner is None
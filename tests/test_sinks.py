@@ -0,0 +1,134 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+"""Test the event sink pipeline."""
+
+import asyncio
+import time
+
+import pytest
+
+from flowzo_cli.session import SessionEngine
+from flowzo_cli.sinks import EventSink, EventsDropped
+
+
+class GatedSink(EventSink):
+    """Records batches, but only writes while its gate is open."""
+
+    def __init__(self, **options) -> None:
+        super().__init__(**options)
+        self.gate = asyncio.Event()
+        self.batches = []
+
+    async def write(self, events) -> None:
+        await self.gate.wait()
+        self.batches.append([event.data["i"] for event in events])
+
+    @property
+    def received(self):
+        return [i for batch in self.batches for i in batch]
+
+
+class SyncSink(EventSink):
+    """Records events, writing them straight away when no loop is running."""
+
+    def __init__(self, **options) -> None:
+        super().__init__(**options)
+        self.received = []
+
+    async def write(self, events) -> None:
+        self.write_sync(events)
+
+    def write_sync(self, events) -> bool:
+        self.received.extend(event.data["i"] for event in events)
+        return True
+
+
+class FailingSink(EventSink):
+    async def write(self, events) -> None:
+        raise RuntimeError("sink unavailable")
+
+
+def _emit(engine: SessionEngine, count: int) -> None:
+    for i in range(count):
+        engine._emit_event("tick", {"i": i})
+
+
+@pytest.mark.asyncio
+async def test_slow_sink_does_not_delay_emit() -> None:
+    """Test emitting only enqueues while a stalled sink catches up in batches."""
+    engine = SessionEngine("sinks")
+    sink = engine.add_sink(GatedSink(batch_size=4, max_queue=100))
+
+    start = time.perf_counter()
+    _emit(engine, 10)
+    assert time.perf_counter() - start < 0.05
+
+    sink.gate.set()
+    await engine.drain()
+    assert sink.batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+@pytest.mark.asyncio
+async def test_sink_overflow_policies() -> None:
+    """Test drop and block policies once a sink's queue is full."""
+    engine = SessionEngine("sinks")
+    engine.sinks.max_pending = 3
+    oldest = engine.add_sink(GatedSink(max_queue=2, policy="drop_oldest"))
+    newest = engine.add_sink(GatedSink(max_queue=2, policy="drop_newest"))
+    blocking = engine.add_sink(GatedSink(max_queue=2, policy="block"))
+
+    _emit(engine, 1)
+    await asyncio.sleep(0)  # dispatch event 0; each writer takes it and stalls
+    await asyncio.sleep(0)
+    _emit(engine, 10)
+    await asyncio.sleep(0)  # dispatch until the blocking sink is full
+
+    for sink in (oldest, newest, blocking):
+        sink.gate.set()
+    with pytest.raises(EventsDropped) as dropped:
+        await engine.drain()
+    await engine.drain()  # Each drop is reported once
+
+    # The pipeline held 3 events for the blocked sink and dropped the rest
+    assert dropped.value.count == engine.sinks.dropped == 7
+    assert blocking.received == [0, 0, 1, 2]
+    assert newest.received == [0, 0, 1]
+    assert oldest.received == [0, 1, 2]
+    assert [stats["dropped"] for stats in engine.sinks.stats()] == [1, 1, 0]
+
+
+@pytest.mark.asyncio
+async def test_sink_errors_surface_on_drain() -> None:
+    """Test a failing sink neither blocks others nor goes unnoticed."""
+    engine = SessionEngine("sinks")
+    engine.add_sink(FailingSink())
+    healthy = engine.add_sink(GatedSink())
+    healthy.gate.set()
+
+    _emit(engine, 3)
+    with pytest.raises(RuntimeError, match="sink unavailable"):
+        await engine.drain()
+    assert healthy.received == [0, 1, 2]
+    await engine.drain()
+
+
+def test_sinks_written_without_event_loop() -> None:
+    """Test sinks that can write synchronously get events emitted outside a loop."""
+    engine = SessionEngine("no_loop")
+    sync_sink = engine.add_sink(SyncSink())
+    gated = engine.add_sink(GatedSink())
+    _emit(engine, 3)
+    assert sync_sink.received == [0, 1, 2]
+    assert gated.received == []
+
+    # The rest wait for a loop, and are not written twice to the others
+    gated.gate.set()
+    asyncio.run(engine.drain())
+    _emit(engine, 1)
+    assert gated.received == [0, 1, 2]
+    assert sync_sink.received == [0, 1, 2, 0]
+
+
+def test_event_sink_requires_write() -> None:
+    """Test sinks must implement ``write``."""
+    with pytest.raises(TypeError):
+        EventSink()